@@ -8,23 +8,88 @@ import requests
 # import cv2
 # import numpy as np
 
+try:
+    from backend import analysis_cache
+    from backend.reframe import analyze_crop_track, CROP_TRACKS
+except ImportError:
+    import analysis_cache
+    from reframe import analyze_crop_track, CROP_TRACKS
+
 # Settings
 TEMP_AUDIO_DIR = "processing"
 os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
 MODEL_SIZE = "base"
 
+def transcript_cache_name():
+    # Transcripts depend on the model (same default as audio_transcriber.py)
+    return f"transcript_{os.getenv('WHISPER_MODEL', 'tiny.en')}.json"
+
+# Audio reaches Whisper as 16 kHz mono float32 PCM read straight from ffmpeg's stdout and
+# handed to the transcriber over its pipe (no WAV written to disk and read back).
+# AUDIO_CACHE=flac also keeps a compressed copy in the analysis cache, so transcribing
+# known footage again (e.g. with another WHISPER_MODEL) decodes ~25 KB/s of FLAC instead
+# of the whole source. AUDIO_EXTRACT_MODE=wav restores the file-based path.
+AUDIO_EXTRACT_MODE = os.getenv("AUDIO_EXTRACT_MODE", "stream")
+AUDIO_CACHE = os.getenv("AUDIO_CACHE", "flac")
+WHISPER_SAMPLE_RATE = 16000
+
+def extract_pcm(video_path):
+    """
+    Decodes the audio track to 16 kHz mono float32 PCM in memory (bytes).
+    Returns None if ffmpeg can't decode it (the caller falls back to extract_audio).
+    """
+    import subprocess
+    key = analysis_cache.content_key(video_path)
+    cached = analysis_cache.lookup_file(key, "audio.flac") if AUDIO_CACHE == "flac" else None
+
+    command = ["ffmpeg", "-nostdin", "-y", "-i", cached or video_path,
+               "-vn", "-acodec", "pcm_f32le", "-f", "f32le", "-ar", str(WHISPER_SAMPLE_RATE), "-ac", "1", "pipe:1"]
+    tmp_path = None
+    if cached:
+        print(f"      Decoding cached audio {cached}...")
+    else:
+        print(f"      Streaming audio from {os.path.basename(video_path)}...")
+        if AUDIO_CACHE == "flac":
+            # Second output of the same decode: the compressed cache entry
+            tmp_path = analysis_cache.temp_path(key, "audio.flac")
+            command += ["-vn", "-acodec", "flac", "-ar", str(WHISPER_SAMPLE_RATE), "-ac", "1", tmp_path]
+
+    try:
+        result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"      ⚠️ FFmpeg PCM streaming failed: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    if tmp_path:
+        analysis_cache.commit_file(tmp_path, key, "audio.flac")
+    return result.stdout
+
+def purge_legacy_audio():
+    # Older versions left one <name>.wav per analyzed video directly in processing/
+    for name in os.listdir(TEMP_AUDIO_DIR):
+        path = os.path.join(TEMP_AUDIO_DIR, name)
+        if name.lower().endswith(".wav") and os.path.isfile(path):
+            try:
+                os.remove(path)
+                print(f"🧹 Removed legacy audio {path}")
+            except OSError:
+                pass
+
 def extract_audio(video_path):
     """
     Extracts audio from video using FFmpeg directly (faster & more robust than MoviePy).
     """
-    base_name = os.path.basename(video_path)
-    audio_path = os.path.join(TEMP_AUDIO_DIR, f"{base_name}.wav")
-    
-    # If audio already exists, skip
-    if os.path.exists(audio_path): 
-        print(f"      Audio already exists: {audio_path}")
-        return audio_path
-    
+    # Cached by content (two different "clip1.mp4" files never share audio)
+    key = analysis_cache.content_key(video_path)
+    cached = analysis_cache.lookup_file(key, "audio.wav")
+    if cached:
+        print(f"      Audio already exists: {cached}")
+        return cached
+
+    audio_path = analysis_cache.entry_path(key, "audio.wav")
+    tmp_path = analysis_cache.temp_path(key, "audio.wav")
     print(f"      Extracting audio to {audio_path}...")
     
     try:
@@ -33,74 +98,218 @@ def extract_audio(video_path):
         command = [
             "ffmpeg", "-i", video_path, 
             "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", 
-            "-y", audio_path
+            "-y", tmp_path
         ]
         
         # Run silently
         subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         
-        return audio_path
+        committed = analysis_cache.commit_file(tmp_path, key, "audio.wav")
+        if not committed:
+            raise RuntimeError("extracted audio vanished before it was cached")
+        return committed
         
     except Exception as e:
         print(f"      ⚠️ FFmpeg extraction failed: {e}. Falling back to MoviePy.")
         
         try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            tmp_path = analysis_cache.temp_path(key, "audio.wav")
             from moviepy import VideoFileClip
             video = VideoFileClip(video_path)
-            video.audio.write_audiofile(audio_path, logger=None)
+            video.audio.write_audiofile(tmp_path, logger=None)
             video.close()
-            return audio_path
+            committed = analysis_cache.commit_file(tmp_path, key, "audio.wav")
+            if not committed:
+                raise RuntimeError("extracted audio vanished before it was cached")
+            return committed
         except Exception as e2:
              print(f"      ❌ MoviePy also failed: {e2}")
              raise e2
 
-def transcribe_audio(audio_path):
-    print(f"      [2/3] Transcribing Audio for {os.path.basename(audio_path)}...")
-    
-    import subprocess
-    import sys
-    
+# Rough resident size of one loaded Whisper model on CPU (GB)
+WHISPER_MODEL_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "turbo": 6, "large": 10}
+
+def _total_memory_gb():
     try:
-        process = subprocess.Popen(
-            [sys.executable, "backend/audio_transcriber.py", audio_path],
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def default_transcribe_workers(max_workers=3):
+    """
+    How many transcriber processes (= loaded models) a batch runs at once: one per 4 cores
+    and at most half the RAM in models, between 1 and max_workers.
+    """
+    model = os.getenv("WHISPER_MODEL", "tiny.en").split(".")[0].split("-")[0]
+    model_gb = WHISPER_MODEL_GB.get(model, 2)
+    by_cpu = (os.cpu_count() or 1) // 4
+    memory = _total_memory_gb()
+    by_memory = int(memory * 0.5 // model_gb) if memory else 1
+    return max(1, min(max_workers, by_cpu, by_memory))
+
+# --- PERSISTENT TRANSCRIBER ---
+# Whisper runs in ONE long-lived child process (audio_transcriber.py --serve) that loads
+# WHISPER_MODEL once and takes audio over a JSON-lines pipe (a file path, or a header line
+# followed by raw float32 PCM bytes). It stays a separate process,
+# so a torch crash/OOM still can't take the worker down: the file that crashed gets the
+# fallback clips and the next file starts a fresh transcriber.
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT_SECONDS", "1800"))
+
+class TranscriberService:
+    def __init__(self, timeout=TRANSCRIBE_TIMEOUT, threads=None):
+        import threading
+        self.timeout = timeout
+        self.threads = threads
+        self.process = None
+        self.responses = None
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def _start(self):
+        import subprocess
+        import sys
+        import queue
+        import threading
+
+        print("      🎙️ Starting transcriber service...")
+        env = dict(os.environ)
+        if self.threads and "OMP_NUM_THREADS" not in env:
+            # Parallel transcribers split the cores instead of oversubscribing them
+            env["OMP_NUM_THREADS"] = str(self.threads)
+        self.process = subprocess.Popen(
+            [sys.executable, "backend/audio_transcriber.py", "--serve"],
+            env=env,
+            stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            stderr=None # Model/inference logs go straight to the worker log
         )
-        
-        stdout, stderr = process.communicate()
-        
-        if process.returncode != 0:
-            print(f"Error in transcription: {stderr}")
-            # Fallback mock
-            return [{
-                "start": 0.0,
-                "end": 5.0,
-                "text": "[Transcription Failed]",
-                "visual_data": {}
-            }]
+        # A reader thread lets us wait with a timeout (and notice a dead child)
+        self.responses = queue.Queue()
+        def read(proc, q):
+            for line in proc.stdout:
+                try: q.put(json.loads(line))
+                except ValueError: pass
+            q.put(None) # EOF: the child exited
+        threading.Thread(target=read, args=(self.process, self.responses), daemon=True).start()
+
+        ready = self._next_response(timeout=600)
+        if not ready or not ready.get("ready"):
+            self.stop()
+            raise RuntimeError(f"Transcriber failed to start: {ready.get('error') if ready else 'process exited'}")
+
+    def _next_response(self, timeout):
+        import queue
+        try:
+            return self.responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-        # Parse the JSON output from the script
-        # The script might print logs, but the last line should be the JSON
-        lines = stdout.strip().split('\n')
-        result_json_str = lines[-1] 
-        return json.loads(result_json_str)
-                
+    def transcribe(self, audio):
+        """
+        audio: file path, or 16 kHz mono float32 PCM bytes (see extract_pcm).
+        Returns the clips list. Raises if the transcriber fails, crashes or times out.
+        """
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self._start()
+
+            self.next_id += 1
+            req_id = self.next_id
+            try:
+                if isinstance(audio, bytes):
+                    header = {"id": req_id, "pcm_bytes": len(audio)}
+                    self.process.stdin.write(json.dumps(header).encode() + b"\n")
+                    self.process.stdin.write(audio)
+                else:
+                    self.process.stdin.write(json.dumps({"id": req_id, "audio_path": audio}).encode() + b"\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self.stop()
+                raise RuntimeError(f"Transcriber pipe closed: {e}")
+
+            response = self._next_response(self.timeout)
+            if response is None:
+                # Crashed or hung: drop it, the next call starts a new one
+                self.stop()
+                raise RuntimeError("Transcriber crashed or timed out")
+            if response.get("id") != req_id or not response.get("ok"):
+                raise RuntimeError(response.get("error") or "Unexpected transcriber response")
+            return response["clips"]
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close() # EOF -> the serve loop exits
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+_transcriber = None
+
+def transcriber_threads():
+    # Cores per transcriber when TRANSCRIBE_WORKERS of them run at once
+    return max(1, (os.cpu_count() or 1) // max(1, TRANSCRIBE_WORKERS))
+
+def get_transcriber():
+    global _transcriber
+    if _transcriber is None:
+        import atexit
+        _transcriber = TranscriberService(threads=transcriber_threads())
+        atexit.register(_transcriber.stop)
+    return _transcriber
+
+def transcribe_audio(audio, service=None, cache_key=None, label=None):
+    """
+    audio: audio file path or PCM bytes (see TranscriberService.transcribe)
+    service: a TranscriberService (defaults to the shared one)
+    cache_key: analysis cache key of the source; successful transcripts are stored there
+    """
+    if label is None:
+        label = os.path.basename(audio) if isinstance(audio, str) else "PCM stream"
+    print(f"      [2/3] Transcribing Audio for {label}...")
+    
+    try:
+        clips = (service or get_transcriber()).transcribe(audio)
+        if cache_key:
+            analysis_cache.store_json(cache_key, transcript_cache_name(), clips)
+        return clips
     except Exception as e:
-        print(f"Failed to run isolated transcriber: {e}")
+        print(f"Error in transcription: {e}")
+        # Fallback mock
         return [{
             "start": 0.0,
             "end": 5.0,
-            "text": "[System Failure]",
+            "text": "[Transcription Failed]",
             "visual_data": {}
         }]
 
 def analyze_visuals(video_path, clips):
-    # Same as before
+    # Metrics per clip midpoint are cached by source content; only new midpoints are sampled
+    try:
+        key = analysis_cache.content_key(video_path)
+        known = analysis_cache.load_json(key, "visual.json") or {}
+    except OSError:
+        key, known = None, {}
+
+    def merge():
+        for clip in clips:
+            mid_point = (clip["start"] + clip["end"]) / 2
+            clip["visual_data"] = known.get(str(mid_point), {"brightness": "unknown", "emotion": "unknown"})
+        return clips
+
     # Prepare timestamps to analyze
     timestamps = []
     for clip in clips:
-        timestamps.append((clip["start"], clip["end"]))
+        if str((clip["start"] + clip["end"]) / 2) not in known:
+            timestamps.append((clip["start"], clip["end"]))
+    if not timestamps:
+        print(f"      Visual metrics cached for {os.path.basename(video_path)}")
+        return merge()
     
     import subprocess
     import sys
@@ -120,10 +329,8 @@ def analyze_visuals(video_path, clips):
         
         if process.returncode != 0:
             print(f"Error in visual analysis: {stderr}")
-            # Fallback if it fails
-            for clip in clips:
-                clip["visual_data"] = {"brightness": "unknown", "emotion": "unknown"}
-            return clips
+            # Fallback if it fails (cached midpoints still count)
+            return merge()
 
         # Parse the JSON output from the script
         # The script prints some logs, but the last line should be the JSON
@@ -131,21 +338,202 @@ def analyze_visuals(video_path, clips):
         result_json_str = lines[-1] 
         results = json.loads(result_json_str)
         
-        # Merge back
-        for clip in clips:
-            mid_point = (clip["start"] + clip["end"]) / 2
-            key = str(mid_point)
-            if key in results:
-                clip["visual_data"] = results[key]
-            else:
-                clip["visual_data"] = {"brightness": "unknown", "emotion": "unknown"}
+        # Merge back (frames that could not be read are not cached)
+        known.update({k: v for k, v in results.items() if v.get("brightness") != "unknown"})
+        if key:
+            analysis_cache.store_json(key, "visual.json", known)
                 
     except Exception as e:
         print(f"Failed to run isolated visual analyzer: {e}")
-        for clip in clips:
-             clip["visual_data"] = {"brightness": "unknown", "emotion": "unknown"}
 
-    return clips
+    return merge()
+
+# --- STAGED ANALYSIS PIPELINE ---
+# Videos of a batch are analyzed concurrently by a bounded number of workers per stage, each
+# driving child processes. Transcription, the dominant cost, runs TRANSCRIBE_WORKERS models
+# in parallel (by default as many as cores and memory allow, capped at 3). Results come back
+# in input order and merge_analysis_results() numbers clips from them, so IDs are deterministic.
+# The batch runs as three stages connected by bounded queues, so they overlap across files:
+#   extract (ffmpeg, I/O bound)  -> transcribe (Whisper, CPU bound) -> visuals (OpenCV)
+# With CROP_TRACKS=analysis the crop track runs too. It only needs the source, so it starts
+# right away on its own pool: it is a full decode of the source and would otherwise queue
+# every clip-midpoint visuals task behind it. By default tracks wait for a portrait export.
+# Every stage's heavy lifting already happens in a child process (ffmpeg, the transcriber
+# service, visual_analyzer.py), so plain threads are enough to drive them in parallel.
+# Each transcribe worker owns one TranscriberService (= one loaded model).
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "0")) or default_transcribe_workers()
+VISUAL_WORKERS = int(os.getenv("VISUAL_WORKERS", "2"))
+CROP_TRACK_WORKERS = int(os.getenv("CROP_TRACK_WORKERS", "1"))
+# Share of each video's progress that is its crop track (when computed here)
+CROP_TRACK_WEIGHT = 0.15
+# Extracted audio waiting for a transcriber (backpressure on extraction; streamed PCM is
+# held in memory, ~230 MB per hour of audio)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+def analyze_videos(video_paths_list, progress_callback=None, progress_span=80):
+    """
+    Analyzes every video (audio, transcript, visuals, crop track) through the staged pipeline.
+    Returns [(clips, track)] in input order (track is None unless CROP_TRACKS is "analysis"). progress_callback gets the aggregate 0-progress_span.
+    """
+    import queue
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    total = len(video_paths_list)
+    with_tracks = CROP_TRACKS == "analysis"
+    track_weight = CROP_TRACK_WEIGHT if with_tracks else 0.0
+    # Per video: audio -> transcript -> visuals (0-1), and the crop track (0 or 1)
+    fractions = [0.0] * total
+    tracks_done = [0.0] * total
+    progress_lock = threading.Lock()
+    stop = threading.Event()
+    errors = []
+
+    def report(message):
+        if progress_callback:
+            done = sum((1 - track_weight) * f + track_weight * t for f, t in zip(fractions, tracks_done))
+            progress_callback(done / total * progress_span, message)
+
+    def update(index, fraction, message):
+        with progress_lock:
+            fractions[index] = max(fractions[index], fraction)
+            report(message)
+
+    def stage(fn):
+        # Any stage failure stops the whole pipeline; the first error is re-raised below
+        def run(*args):
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ Analysis stage failed: {e}")
+                errors.append(e)
+                stop.set()
+        return run
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    todo = queue.Queue()
+    for i, path in enumerate(video_paths_list):
+        todo.put((i, path))
+    audio_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    def crop_track(index, path):
+        track = analyze_crop_track(path)
+        with progress_lock:
+            tracks_done[index] = 1.0
+            report(f"Crop Track: {os.path.basename(path)}")
+        return track
+
+    visual_pool = ThreadPoolExecutor(max_workers=max(1, VISUAL_WORKERS))
+    track_pool = ThreadPoolExecutor(max_workers=max(1, CROP_TRACK_WORKERS))
+    track_futures = [track_pool.submit(crop_track, i, path) for i, path in enumerate(video_paths_list)] if with_tracks else []
+    visual_futures = {}
+
+    def visuals(index, path, clips):
+        print(f"      [3/3] Analyzing Visuals for {path}...")
+        clips = analyze_visuals(path, clips)
+        update(index, 1.0, f"Analyzed: {os.path.basename(path)}")
+        return clips
+
+    @stage
+    def extract_worker():
+        while not stop.is_set():
+            try:
+                index, path = todo.get_nowait()
+            except queue.Empty:
+                return
+            # Known footage: the transcript is a cache lookup (no extraction, no Whisper)
+            key = analysis_cache.content_key(path)
+            clips = analysis_cache.load_json(key, transcript_cache_name())
+            if clips is not None:
+                print(f"      Transcript cached for {os.path.basename(path)}")
+                update(index, 0.6, f"Visual Analysis: {os.path.basename(path)}")
+                visual_futures[index] = visual_pool.submit(visuals, index, path, clips)
+                continue
+
+            update(index, 0.05, f"Extracting Audio: {os.path.basename(path)}")
+            print(f"      [1/3] Extracting Audio for {path}...")
+            audio = extract_pcm(path) if AUDIO_EXTRACT_MODE == "stream" else None
+            if audio is None:
+                audio = extract_audio(path)
+            update(index, 0.3, f"Transcribing: {os.path.basename(path)}")
+            if not put(audio_queue, (index, path, audio, key)):
+                return
+
+    @stage
+    def transcribe_worker(service):
+        try:
+            while not stop.is_set():
+                try:
+                    item = audio_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    return
+                index, path, audio, key = item
+                clips = transcribe_audio(audio, service, cache_key=key, label=os.path.basename(path))
+                update(index, 0.6, f"Visual Analysis: {os.path.basename(path)}")
+                visual_futures[index] = visual_pool.submit(visuals, index, path, clips)
+        finally:
+            if service is not _transcriber:
+                service.stop()
+
+    print(f"🧵 Analysis pipeline: {total} videos, {EXTRACT_WORKERS} extract / {TRANSCRIBE_WORKERS} transcribe / {VISUAL_WORKERS} visual / {CROP_TRACK_WORKERS if with_tracks else 0} crop track workers")
+    # Worker 0 reuses the shared transcriber (keeps its model warm for the next batch)
+    services = [get_transcriber()] + [TranscriberService(threads=transcriber_threads()) for _ in range(max(1, TRANSCRIBE_WORKERS) - 1)]
+    extractors = [threading.Thread(target=extract_worker, daemon=True) for _ in range(max(1, EXTRACT_WORKERS))]
+    transcribers = [threading.Thread(target=transcribe_worker, args=(svc,), daemon=True) for svc in services]
+    for t in extractors + transcribers:
+        t.start()
+
+    try:
+        for t in extractors:
+            t.join()
+        # One end marker per transcriber once extraction is done
+        for _ in transcribers:
+            put(audio_queue, None)
+        for t in transcribers:
+            while t.is_alive():
+                t.join(timeout=0.5)
+                if stop.is_set():
+                    break
+        if errors:
+            raise errors[0]
+
+        return [(visual_futures[i].result(), track_futures[i].result() if with_tracks else None) for i in range(total)]
+    finally:
+        stop.set()
+        visual_pool.shutdown(wait=not errors, cancel_futures=True)
+        track_pool.shutdown(wait=not errors, cancel_futures=True)
+
+def merge_analysis_results(video_paths_list, results):
+    """
+    Joins analyze_videos() results into the master timeline, in input order (clip IDs
+    never depend on which worker finished first).
+    Returns (master_timeline, reframe_tracks keyed by source file name).
+    """
+    master_timeline = []
+    reframe_tracks = {}
+    global_id_counter = 1
+    for video_path, (clips, track) in zip(video_paths_list, results):
+        if track:
+            reframe_tracks[os.path.basename(video_path)] = track
+
+        # Tag them with the Source File (CRITICAL for editing later)
+        for clip in clips:
+            clip["id"] = global_id_counter  # Unique ID across ALL videos
+            clip["source_video"] = os.path.basename(video_path) # Remember where it came from
+            master_timeline.append(clip)
+            global_id_counter += 1
+    return master_timeline, reframe_tracks
 
 # --- NEW: THE BATCH PROCESSOR ---
 def process_batch_pipeline(video_paths_list, project_name="Project_01", output_dir="uploads", progress_callback=None, user_description=None, api_key=None):
@@ -160,36 +548,14 @@ def process_batch_pipeline(video_paths_list, project_name="Project_01", output_d
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         
-    master_timeline = []
-    global_id_counter = 1
-    total_videos = len(video_paths_list)
-    
-    for i, video_path in enumerate(video_paths_list):
-        base_progress = (i / total_videos) * 80
-        progress_per_video = 80 / total_videos
-        
-        print(f"   ...Processing {os.path.basename(video_path)}")
-        if progress_callback: progress_callback(base_progress + 5, f"Extracting Audio: {os.path.basename(video_path)}")
-        
-        # 1. Run our standard analysis
-        print(f"      [1/3] Extracting Audio for {video_path}...")
-        audio_path = extract_audio(video_path)
-        
-        if progress_callback: progress_callback(base_progress + (progress_per_video * 0.3), f"Transcribing: {os.path.basename(video_path)}")
-        print(f"      [2/3] Transcribing Audio for {video_path}...")
-        clips = transcribe_audio(audio_path)
-        
-        if progress_callback: progress_callback(base_progress + (progress_per_video * 0.6), f"Visual Analysis: {os.path.basename(video_path)}")
-        print(f"      [3/3] Analyzing Visuals for {video_path}...")
-        clips = analyze_visuals(video_path, clips)
-        
-        # 2. Tag them with the Source File (CRITICAL for editing later)
-        for clip in clips:
-            clip["id"] = global_id_counter  # Unique ID across ALL videos
-            clip["source_video"] = os.path.basename(video_path) # Remember where it came from
-            master_timeline.append(clip)
-            global_id_counter += 1
-            
+    # 1. Analyze all videos concurrently, 2. merge in input order
+    results = analyze_videos(video_paths_list, progress_callback)
+    # Keep the analysis cache within its disk quota (never dropping this batch's sources)
+    analysis_cache.evict(protect={analysis_cache.content_key(p) for p in video_paths_list})
+    purge_legacy_audio()
+
+    master_timeline, reframe_tracks = merge_analysis_results(video_paths_list, results)
+
     # 3. Save the Master JSON
     if progress_callback: progress_callback(85, "Saving analysis data...")
     project_data = {
@@ -203,6 +569,13 @@ def process_batch_pipeline(video_paths_list, project_name="Project_01", output_d
         json.dump(project_data, f, indent=4)
         
     print(f"✅ BATCH COMPLETE! Master JSON saved to: {output_json_path}")
+
+    # Crop tracks go next to the analysis, not in it (it's fed to Gemini and the chat)
+    if reframe_tracks:
+        tracks_path = os.path.join(output_dir, f"{project_name}_reframe.json")
+        with open(tracks_path, "w") as f:
+            json.dump(reframe_tracks, f)
+        print(f"📱 Reframe tracks saved to: {tracks_path}")
     
     # 4. Generate XML EDL for Frontend
     if progress_callback: progress_callback(90, "AI Generating Timeline (this may take a moment)...")
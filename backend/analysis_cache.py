@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+# Content-Addressed Analysis Cache
+# Extracted audio, transcripts, visual metrics and crop tracks are stored per source
+# CONTENT (fast partial hash + size), not per file name: two projects uploading different
+# "clip1.mp4" files never collide, and the same footage re-uploaded (or reused by a Shorts
+# project) is never analyzed twice. Entries are directories, evicted LRU to a disk quota.
+
+ANALYSIS_CACHE_DIR = os.path.join("processing", "analysis_cache")
+ANALYSIS_CACHE_MAX_MB = float(os.getenv("ANALYSIS_CACHE_MAX_MB", "5000"))
+# Bump when extraction / transcript / visual formats change
+ANALYSIS_CACHE_VERSION = 1
+# Bytes hashed from the start, middle and end of the file
+HASH_CHUNK = 1024 * 1024
+# Entries used this recently (or with a temp file written this recently) may belong to
+# another worker's running analysis: eviction leaves them alone
+EVICT_GRACE_SECONDS = float(os.getenv("ANALYSIS_CACHE_EVICT_GRACE_SECONDS", "3600"))
+
+_key_memo = {}
+
+def content_key(path):
+    """
+    sha256 over size + three 1 MB samples (start/middle/end). Memoized per (path, size, mtime).
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key in _key_memo:
+        return _key_memo[memo_key]
+
+    h = hashlib.sha256(f"v{ANALYSIS_CACHE_VERSION}:{st.st_size}:".encode())
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, st.st_size // 2 - HASH_CHUNK // 2), max(0, st.st_size - HASH_CHUNK)}):
+            f.seek(offset)
+            h.update(f.read(HASH_CHUNK))
+    key = h.hexdigest()[:32]
+    _key_memo[memo_key] = key
+    return key
+
+def entry_path(key, name, cache_dir=ANALYSIS_CACHE_DIR):
+    entry = os.path.join(cache_dir, key)
+    os.makedirs(entry, exist_ok=True)
+    return os.path.join(entry, name)
+
+def touch(key, cache_dir=ANALYSIS_CACHE_DIR):
+    # Entry mtime drives LRU eviction
+    try:
+        os.utime(os.path.join(cache_dir, key), None)
+    except OSError:
+        pass
+
+def lookup_file(key, name, cache_dir=ANALYSIS_CACHE_DIR):
+    """
+    Path of a cached file in the entry (and bumps the entry for LRU), or None.
+    """
+    path = os.path.join(cache_dir, key, name)
+    if not os.path.exists(path):
+        return None
+    touch(key, cache_dir)
+    return path
+
+def temp_path(key, name, cache_dir=ANALYSIS_CACHE_DIR):
+    # Write here, then commit_file() -> readers never see a half-written file.
+    # Unique per call: the analysis stages are threads of one process, and two sources
+    # with the same content can be cached at the same time.
+    entry = os.path.dirname(entry_path(key, name, cache_dir))
+    base, ext = os.path.splitext(name)
+    fd, path = tempfile.mkstemp(prefix=f"{base}.", suffix=f".tmp{ext}", dir=entry)
+    os.close(fd)
+    return path
+
+def commit_file(tmp_path, key, name, cache_dir=ANALYSIS_CACHE_DIR):
+    """
+    Moves a finished temp file into the entry. Returns the cached path, or None when the
+    temp file is gone and no other writer committed the same file meanwhile.
+    """
+    path = entry_path(key, name, cache_dir)
+    try:
+        os.replace(tmp_path, path)
+    except FileNotFoundError:
+        # Lost a race: whoever committed first holds the same content
+        if os.path.exists(path):
+            return path
+        print(f"⚠️ Analysis cache temp file vanished before commit: {tmp_path}")
+        return None
+    return path
+
+def load_json(key, name, cache_dir=ANALYSIS_CACHE_DIR):
+    path = lookup_file(key, name, cache_dir)
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Analysis cache entry unreadable ({path}): {e}")
+        return None
+
+def store_json(key, name, data, cache_dir=ANALYSIS_CACHE_DIR):
+    # A failed cache write never fails the analysis that produced the data
+    try:
+        tmp = temp_path(key, name, cache_dir)
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+    except OSError as e:
+        print(f"⚠️ Could not cache {name} for {key}: {e}")
+        return None
+    return commit_file(tmp, key, name, cache_dir)
+
+def _scan_entry(path, now, grace):
+    """
+    Returns (size, busy). busy: a temp file is still being written. Temp files older
+    than `grace` are leftovers of a crashed writer and are deleted.
+    """
+    total, busy = 0, False
+    for name in os.listdir(path):
+        file_path = os.path.join(path, name)
+        try:
+            if ".tmp" in name:
+                if now - os.path.getmtime(file_path) < grace:
+                    busy = True
+                else:
+                    os.remove(file_path)
+                    continue
+            total += os.path.getsize(file_path)
+        except OSError:
+            pass
+    return total, busy
+
+def evict(protect=(), cache_dir=ANALYSIS_CACHE_DIR, max_mb=ANALYSIS_CACHE_MAX_MB, grace=EVICT_GRACE_SECONDS):
+    """
+    Deletes least recently used entries until the cache fits in max_mb.
+    Entries in `protect` (keys of the batch being analyzed) are kept, and so are entries
+    used in the last `grace` seconds or still being written (other workers' batches).
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    protect = set(protect)
+    now = time.time()
+    entries = []
+    for key in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, key)
+        if not os.path.isdir(path):
+            continue
+        try:
+            mtime = os.path.getmtime(path)
+            size, busy = _scan_entry(path, now, grace)
+        except OSError:
+            continue
+        entries.append((mtime, size, key, path, busy or now - mtime < grace))
+
+    total = sum(e[1] for e in entries)
+    max_bytes = int(max_mb * 1024 * 1024)
+    for _, size, key, path, in_use in sorted(entries):
+        if total <= max_bytes:
+            break
+        if key in protect or in_use:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        print(f"🧹 Evicted analysis cache entry {key} ({size / (1024 * 1024):.1f} MB)")
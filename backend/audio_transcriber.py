@@ -1,64 +1,133 @@
-
 import sys
 import json
 import os
 
-def transcribe_audio_file(audio_path):
-    print(f"Loading Whisper Model for {audio_path}...", file=sys.stderr)
-    try:
+# Two ways to run:
+#   python audio_transcriber.py <audio_path>   -> one file, prints the clips JSON (legacy)
+#   python audio_transcriber.py --serve        -> loads WHISPER_MODEL once, then answers
+#       JSON-lines requests on stdin with {"id", "ok", "clips"|"error"} on stdout until
+#       stdin closes (see ai_engine.TranscriberService). A request is either
+#       {"id", "audio_path"} or {"id", "pcm_bytes": N} followed by N bytes of raw 16 kHz
+#       mono float32 PCM (streamed from ffmpeg, never written to disk).
+
+_model = None
+
+def load_model():
+    global _model
+    if _model is None:
         import whisper
         import warnings
-        
+
         # Suppress FP16 warning on CPU
         warnings.filterwarnings("ignore")
-        
+
         model_size = os.getenv("WHISPER_MODEL", "tiny.en")
-        
+        print(f"Loading Whisper Model ({model_size})...", file=sys.stderr)
+
         # Load model (standard OpenAI Whisper)
-        model = whisper.load_model(model_size)
-        
-        # Transcribe
-        result = model.transcribe(audio_path, word_timestamps=True)
-        
-        clips = []
-        for s in result.get("segments", []):
-            clip_words = []
-            if "words" in s:
-                for w in s["words"]:
-                    # OpenAI Whisper structure: {word, start, end, probability}
-                    prob = w.get("probability", 1.0)
-                    if prob >= 0.20:
-                        clip_words.append({
-                            "word": w.get("word", "").strip(),
-                            "start": round(w.get("start"), 2),
-                            "end": round(w.get("end"), 2),
-                            "probability": round(prob, 2)
-                        })
-            
-            # Rebuild text
-            clean_text = " ".join([w["word"] for w in clip_words])
-            final_text = clean_text if clean_text.strip() else s.get("text", "").strip()
-            
-            clips.append({
-                "start": round(s.get("start"), 2),
-                "end": round(s.get("end"), 2),
-                "text": final_text,
-                "words": clip_words,
-                "visual_data": {} 
-            })
-            
+        _model = whisper.load_model(model_size)
+    return _model
+
+def transcribe_to_clips(audio):
+    """
+    audio: file path or float32 array (or anything whisper's transcribe accepts). Returns the clips list.
+    """
+    model = load_model()
+
+    # Transcribe
+    result = model.transcribe(audio, word_timestamps=True)
+
+    clips = []
+    for s in result.get("segments", []):
+        clip_words = []
+        if "words" in s:
+            for w in s["words"]:
+                # OpenAI Whisper structure: {word, start, end, probability}
+                prob = w.get("probability", 1.0)
+                if prob >= 0.20:
+                    clip_words.append({
+                        "word": w.get("word", "").strip(),
+                        "start": round(w.get("start"), 2),
+                        "end": round(w.get("end"), 2),
+                        "probability": round(prob, 2)
+                    })
+
+        # Rebuild text
+        clean_text = " ".join([w["word"] for w in clip_words])
+        final_text = clean_text if clean_text.strip() else s.get("text", "").strip()
+
+        clips.append({
+            "start": round(s.get("start"), 2),
+            "end": round(s.get("end"), 2),
+            "text": final_text,
+            "words": clip_words,
+            "visual_data": {}
+        })
+    return clips
+
+def transcribe_audio_file(audio_path):
+    print(f"Loading Whisper Model for {audio_path}...", file=sys.stderr)
+    try:
+        clips = transcribe_to_clips(audio_path)
         print(json.dumps(clips))
-        
+
     except Exception as e:
         print(f"Transcription Error: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
+def serve():
+    # stdout is the response channel: anything else printed (libraries, tqdm) goes to stderr
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    def respond(payload):
+        out.write(json.dumps(payload) + "\n")
+        out.flush()
+
+    try:
+        load_model()
+    except Exception as e:
+        respond({"ready": False, "error": str(e)})
+        sys.exit(1)
+    respond({"ready": True, "model": os.getenv("WHISPER_MODEL", "tiny.en")})
+
+    stdin = sys.stdin.buffer
+    while True:
+        line = stdin.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        req_id = None
+        try:
+            request = json.loads(line)
+            req_id = request.get("id")
+            if "pcm_bytes" in request:
+                import numpy as np
+                # Read the payload first so the stream stays in sync whatever happens next
+                data = stdin.read(request["pcm_bytes"])
+                if len(data) != request["pcm_bytes"]:
+                    raise EOFError("PCM stream ended early")
+                audio = np.frombuffer(data, dtype=np.float32)
+            else:
+                audio = request["audio_path"]
+            clips = transcribe_to_clips(audio)
+            respond({"id": req_id, "ok": True, "clips": clips})
+        except Exception as e:
+            print(f"Transcription Error: {e}", file=sys.stderr)
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            respond({"id": req_id, "ok": False, "error": str(e)})
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python audio_transcriber.py <audio_path>", file=sys.stderr)
+        print("Usage: python audio_transcriber.py <audio_path> | --serve", file=sys.stderr)
         sys.exit(1)
-        
-    audio_path = sys.argv[1]
-    transcribe_audio_file(audio_path)
+
+    if sys.argv[1] == "--serve":
+        serve()
+    else:
+        audio_path = sys.argv[1]
+        transcribe_audio_file(audio_path)
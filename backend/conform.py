@@ -0,0 +1,76 @@
+from collections import Counter
+
+try:
+    from backend import reframe
+except ImportError:
+    import reframe
+
+# Conform Planner
+# Decides the timeline format (resolution + frame rate) from the probed sources and
+# which clips actually need converting to it. Clips that already match get no
+# scale/setsar/fps filters, and a timeline where every source matches is a plain
+# chain concat (no per-frame scaling or canvas compositing).
+# The source frame rate is kept unless the encoder profile asks for a fixed one.
+# Portrait projects conform every clip with the reframe stage (crop + lanczos to 1080x1920).
+
+def source_geometry(info):
+    """
+    Display (width, height) of a probed source (ffmpeg auto-rotates 90/270 on decode).
+    """
+    w, h = info.get("width") or 0, info.get("height") or 0
+    if info.get("rotation") in (90, 270):
+        return h, w
+    return w, h
+
+def _square_pixels(info):
+    return info.get("sar") in (None, "", "1:1", "0:1")
+
+def timeline_format(infos, profile_fps=None, default_res=(1920, 1080), default_fps=30, render_mode='landscape'):
+    """
+    Returns (resolution, fps) for the timeline.
+    resolution: 1080x1920 for portrait, else the first source with a known size.
+    fps: the profile's, else the most common source rate (so a single odd clip
+    doesn't resample everything else).
+    """
+    infos = [i for i in infos if i]
+    res = default_res
+    if render_mode == 'portrait':
+        res = reframe.PORTRAIT_SIZE
+    else:
+        for info in infos:
+            w, h = source_geometry(info)
+            if w and h:
+                res = (w, h)
+                break
+
+    fps = profile_fps
+    if not fps:
+        rates = Counter(round(i["fps"], 3) for i in infos if i.get("fps"))
+        fps = rates.most_common(1)[0][0] if rates else default_fps
+    return res, fps
+
+def conform_filters(info, res, fps, render_mode='landscape', crop_points=None):
+    """
+    Only the conversions this source needs to match (res, fps). [] = already matches.
+    crop_points: portrait subject track for this clip (see reframe.track_points)
+    """
+    filters = []
+    geometry = tuple(source_geometry(info or {}))
+    if render_mode == 'portrait' and all(geometry):
+        filters.extend(reframe.portrait_filters(geometry[0], geometry[1], res, crop_points))
+        scaled = bool(filters)
+    else:
+        scaled = geometry != tuple(res)
+        if scaled:
+            filters.append(f"scale={res[0]}:{res[1]}")
+    if (scaled or not _square_pixels(info or {})) and "setsar=1" not in filters:
+        # reset sample aspect ratio to square pixels so the segments concat cleanly
+        filters.append("setsar=1")
+    if not info or abs((info.get("fps") or 0) - fps) > 0.01:
+        filters.append(f"fps={fps}")
+    return filters
+
+def describe(plan_count, total):
+    if plan_count == 0:
+        return f"📐 Conform: all {total} clips match the timeline format (no scale/fps conversion)"
+    return f"📐 Conform: {plan_count}/{total} clips need scale/fps conversion"
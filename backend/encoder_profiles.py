@@ -0,0 +1,88 @@
+import os
+
+# Named Encoder Profiles
+# One place for the x264 / audio settings every render engine uses.
+#   draft           -> previews back in seconds (big files, soft picture)
+#   balanced        -> default export (keeps the source frame rate)
+#   archival        -> final masters: slow preset, low CRF, keeps the source frame rate
+#   social-vertical -> capped bitrate + 30fps + short GOP for Shorts/Reels/TikTok uploads
+# fps None = keep the source frame rate. threads 0 = let ffmpeg decide.
+# Plain cut lists are stream copied (source packets, no encode) only when that honours the
+# profile (see stream_copy_compatible); "stream_copy": True accepts the source as it is.
+
+ENCODER_PROFILES = {
+    "draft": {
+        "preset": "ultrafast", "crf": 30, "maxrate": None, "bufsize": None,
+        "gop": 48, "fps": 24, "threads": 0, "audio_bitrate": "96k",
+    },
+    "balanced": {
+        "preset": "veryfast", "crf": 23, "maxrate": None, "bufsize": None,
+        "gop": 96, "fps": None, "threads": 4, "audio_bitrate": "160k",
+    },
+    "archival": {
+        "preset": "slow", "crf": 18, "maxrate": None, "bufsize": None,
+        "gop": 250, "fps": None, "threads": 0, "audio_bitrate": "320k",
+    },
+    "social-vertical": {
+        "preset": "medium", "crf": 21, "maxrate": "8M", "bufsize": "16M",
+        "gop": 60, "fps": 30, "threads": 4, "audio_bitrate": "192k",
+    },
+}
+
+DEFAULT_PROFILE = os.getenv("EXPORT_PROFILE", "balanced")
+
+def get_profile(name=None):
+    """
+    Returns the profile dict (with its 'name'). Unknown/empty names fall back to the default.
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in ENCODER_PROFILES:
+        print(f"⚠️ Unknown encoder profile '{name}', using '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE if DEFAULT_PROFILE in ENCODER_PROFILES else "balanced"
+    return dict(ENCODER_PROFILES[name], name=name)
+
+def x264_params(profile):
+    """
+    Rate control + GOP + pixel format output options (no codec/preset/threads).
+    Used as ffmpeg_params for MoviePy and inside full ffmpeg commands.
+    """
+    params = ["-pix_fmt", "yuv420p", "-g", str(profile["gop"])]
+    if profile.get("crf") is not None:
+        params.extend(["-crf", str(profile["crf"])])
+    if profile.get("maxrate"):
+        params.extend(["-maxrate", profile["maxrate"], "-bufsize", profile.get("bufsize") or profile["maxrate"]])
+    return params
+
+def video_codec_args(profile, threads=None):
+    """
+    Full ffmpeg video encoder options for the profile.
+    threads overrides the profile (e.g. 1 inside a process pool).
+    """
+    threads = profile["threads"] if threads is None else threads
+    args = ["-c:v", "libx264", "-preset", profile["preset"]] + x264_params(profile)
+    if threads:
+        args.extend(["-threads", str(threads)])
+    return args
+
+def audio_codec_args(profile):
+    return ["-c:a", "aac", "-b:a", profile["audio_bitrate"]]
+
+def stream_copy_compatible(profile, info):
+    """
+    Whether copying the source's packets (info = media_probe.get_media_info) gives what the
+    profile asks for: no bitrate cap, H.264 (the codec every profile encodes to) and the
+    profile's frame rate. Profiles with stream_copy=True take any source as it is.
+    """
+    if profile.get("maxrate"):
+        return False
+    if profile.get("stream_copy"):
+        return True
+    if info.get("video_codec") != "h264":
+        return False
+    return profile.get("fps") is None or abs(float(info.get("fps") or 0) - profile["fps"]) < 0.01
+
+def cache_params(profile):
+    """
+    The settings that change encoded pixels (for segment/export cache keys).
+    """
+    return {k: profile.get(k) for k in ("preset", "crf", "maxrate", "bufsize", "gop", "fps")}
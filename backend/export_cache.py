@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+try:
+    from backend.renderer import resolve_source_path, EXPORT_DIR
+    from backend.media_probe import file_identity
+except ImportError:
+    from renderer import resolve_source_path, EXPORT_DIR
+    from media_probe import file_identity
+
+# Content-Addressed Export Cache
+# Pressing Export on an unchanged project returns the previous artifact instead of re-rendering.
+# Key = hash(export-relevant project_data + identity of every source file).
+# Only artifacts recorded in the index are ever evicted (LRU, bounded by EXPORT_CACHE_MAX_MB).
+
+CACHE_VERSION = 2
+CACHE_INDEX = os.path.join(EXPORT_DIR, ".render_cache.json")
+EXPORT_CACHE_MAX_MB = float(os.getenv("EXPORT_CACHE_MAX_MB", "5000"))
+
+# project_data keys that change the rendered file. 'name' is part of the output filename,
+# so a renamed project never gets back a file carrying the old name.
+EXPORT_KEYS = [
+    'name', 'edl', 'clips', 'globalSettings', 'filter', 'overlays',
+    'bgMusic', 'audioClips', 'trackVolumes', 'renderMode', 'overlayBackend',
+]
+
+def _source_names(project_data):
+    names = set()
+    for clip in project_data.get('edl', project_data.get('clips', [])) or []:
+        if clip.get('source'): names.add(clip['source'])
+    bg = project_data.get('bgMusic') or {}
+    if bg.get('source'): names.add(bg['source'])
+    for clip in project_data.get('audioClips', []) or []:
+        if clip.get('source'): names.add(clip['source'])
+    return sorted(names)
+
+def export_cache_key(project_data, extra=None):
+    """
+    Canonical hash of everything that affects the export, or None if a source is missing.
+    """
+    relevant = {k: project_data.get(k) for k in EXPORT_KEYS if project_data.get(k) is not None}
+
+    sources = {}
+    for name in _source_names(project_data):
+        path = resolve_source_path(name, project_data)
+        if not os.path.exists(path):
+            return None
+        sources[name] = file_identity(path)
+
+    payload = {
+        "v": CACHE_VERSION,
+        "project": relevant,
+        "sources": sources,
+        "extra": extra,
+    }
+    canon = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+@contextmanager
+def _locked_index():
+    # Several render workers can share one exports/ folder
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    lock_path = CACHE_INDEX + ".lock"
+    with open(lock_path, "a") as lock_file:
+        if fcntl: fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            index = {}
+            if os.path.exists(CACHE_INDEX):
+                try:
+                    with open(CACHE_INDEX, "r") as f: index = json.load(f)
+                except Exception:
+                    index = {}
+            yield index
+            tmp_path = CACHE_INDEX + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, CACHE_INDEX)
+        finally:
+            if fcntl: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def lookup(key):
+    """
+    Returns the cached export path for this key (and marks it recently used), or None.
+    """
+    if not key:
+        return None
+    with _locked_index() as index:
+        entry = index.get(key)
+        if not entry:
+            return None
+        if not os.path.exists(entry["path"]):
+            del index[key]
+            return None
+        entry["last_used"] = time.time()
+        print(f"♻️ Export cache hit: {entry['path']}")
+        return entry["path"]
+
+def store(key, output_path):
+    """
+    Records a finished export under its key, then evicts old entries past the quota.
+    """
+    if not key or not output_path or not os.path.exists(output_path):
+        return
+    with _locked_index() as index:
+        now = time.time()
+        index[key] = {
+            "path": output_path,
+            "size": os.path.getsize(output_path),
+            "created": now,
+            "last_used": now,
+        }
+        _evict(index, int(EXPORT_CACHE_MAX_MB * 1024 * 1024), keep=key)
+
+def _evict(index, max_bytes, keep=None):
+    total = sum(e.get("size", 0) for e in index.values())
+    # Least recently used first
+    for key, entry in sorted(index.items(), key=lambda kv: kv[1].get("last_used", 0)):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        path = entry["path"]
+        for p in [path, os.path.splitext(path)[0] + ".srt"]:
+            try:
+                if os.path.exists(p): os.remove(p)
+            except Exception as e:
+                print(f"⚠️ Export cache eviction failed for {p}: {e}")
+        total -= entry.get("size", 0)
+        del index[key]
+        print(f"🧹 Evicted cached export: {path}")
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+
+# FFmpeg Progress Reporting
+# ffmpeg writes machine-readable key=value blocks to -progress pipe:1 (frame, fps,
+# out_time_us, speed, progress=continue|end). We parse those instead of regexing stderr,
+# and coalesce job updates to one every PROGRESS_INTERVAL seconds (each update is a
+# Redis save_meta round-trip), publishing encode speed and ETA alongside the percentage.
+
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL_SECONDS", "1.0"))
+
+class ProgressThrottle:
+    """
+    Drops progress updates that arrive faster than `interval` (the final one always passes).
+    """
+    def __init__(self, callback, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.last = 0.0
+
+    def __call__(self, payload, force=False):
+        if not self.callback:
+            return
+        now = time.monotonic()
+        if force or now - self.last >= self.interval:
+            self.last = now
+            self.callback(payload)
+
+def _parse_speed(value):
+    # "1.53x" -> 1.53, "N/A" -> None
+    try:
+        return float(value.strip().rstrip("x"))
+    except (AttributeError, ValueError):
+        return None
+
+def _parse_out_time(block):
+    # out_time_us is microseconds; out_time_ms is ALSO microseconds (historical ffmpeg quirk)
+    for key in ("out_time_us", "out_time_ms"):
+        try:
+            return max(0.0, int(block[key]) / 1_000_000)
+        except (KeyError, ValueError):
+            continue
+    return None
+
+def run_ffmpeg(cmd, total_duration, progress_callback=None, start=0, span=100, message="Rendering"):
+    """
+    Runs an ffmpeg command (list starting with "ffmpeg") and reports progress mapped
+    into [start, start + span]. Raises on failure; exceptions raised by the callback
+    (e.g. cancellation) stop ffmpeg and propagate.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+    total_duration = max(total_duration or 0, 0.001)
+    throttle = ProgressThrottle(progress_callback)
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        bufsize=1
+    )
+
+    # Drain stderr on a thread (keep the tail for errors) so the pipe never fills up
+    stderr_tail = deque(maxlen=50)
+    def drain():
+        for line in process.stderr:
+            stderr_tail.append(line)
+    drain_thread = threading.Thread(target=drain, daemon=True)
+    drain_thread.start()
+
+    started = time.monotonic()
+    block = {}
+    try:
+        for line in process.stdout:
+            key, sep, value = line.strip().partition("=")
+            if not sep:
+                continue
+            block[key] = value
+            if key != "progress":
+                continue
+
+            # End of one progress block
+            done = value == "end"
+            out_time = _parse_out_time(block)
+            if out_time is not None:
+                fraction = min(1.0, out_time / total_duration)
+                speed = _parse_speed(block.get("speed"))
+                if not speed and out_time > 0:
+                    speed = out_time / max(0.001, time.monotonic() - started)
+                eta = (total_duration - out_time) / speed if speed else None
+                throttle({
+                    "status": "processing",
+                    "progress": min(99, start + fraction * span),
+                    "message": f"{message}... {int(fraction * 100)}%",
+                    "speed": round(speed, 2) if speed else None,
+                    "fps": _parse_speed(block.get("fps")),
+                    "eta_seconds": round(max(0.0, eta), 1) if eta is not None else None,
+                }, force=done)
+            block = {}
+    except Exception as e:
+        # Catch cancellation from callback
+        print(f"🛑 Render Interrupted: {e}")
+        process.terminate()
+        process.wait()
+        raise e
+
+    process.wait()
+    drain_thread.join(timeout=5)
+    if process.returncode != 0:
+        print(f"FFmpeg Error:\n{''.join(stderr_tail)}")
+        raise Exception("FFmpeg Rendering Failed (Check server logs)")
@@ -0,0 +1,288 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+# Color Grading Compiler
+# A grading config (temperature/exposure/contrast/saturation + named preset) is turned
+# into a short list of primitive ops, then compiled ONCE per clip into lookup tables:
+#   - separable grades (no channel mixing): three uint8 LUTs, one gather per channel
+#   - grades with a gray blend (saturation, Noir, Vivid...): a 3x3 matrix of 256-entry
+#     fixed-point tables, out_c = sum_k T[c][k][in_k] >> 8 (integer math only)
+# apply_ops_float() is the reference float pipeline (also used to bake .cube files).
+
+FIXED_POINT_BITS = 8
+
+def _contrast(factor):
+    # (img - 128) * factor + 128
+    return ("contrast", factor)
+
+def _gain(r, g=None, b=None):
+    if g is None: g = r
+    if b is None: b = r
+    return ("affine", (r, g, b), (0.0, 0.0, 0.0))
+
+def _offset(v):
+    return ("affine", (1.0, 1.0, 1.0), (v, v, v))
+
+def _blend(factor):
+    # gray + (img - gray) * factor, gray = mean(R, G, B)
+    return ("blend", factor)
+
+# Named filter presets (same look as the original NumPy implementation)
+PRESET_OPS = {
+    # High contrast, slight desaturation, moody
+    "Cinematic": [_contrast(1.2), _gain(0.95)],
+    # Shadow -> Teal, Highlight -> Orange, then contrast bump
+    "Teal & Orange": [("teal_orange",), _contrast(1.1)],
+    # Sepia-ish: R * 1.1, B * 0.85, lower contrast, lift blacks
+    "Vintage": [_gain(1.1, 1.0, 0.85), _contrast(0.9), _offset(10.0)],
+    # B&W + High Contrast
+    "Noir": [_blend(0.0), _contrast(1.5)],
+    # Boost sat strongly
+    "Vivid": [_blend(1.5)],
+    # Boost sat + Warm temp
+    "Vivid Warm": [_blend(1.3), _gain(1.1, 1.0, 0.9)],
+    # Boost sat + Cool temp
+    "Vivid Cool": [_blend(1.3), _gain(0.9, 1.0, 1.1)],
+    # Desaturated + High Contrast
+    "Dramatic": [_blend(0.8), _contrast(1.4)],
+    "Mono": [_blend(0.0)],
+    "B&W": [_blend(0.0)],
+    # B&W + Brightness push + Contrast
+    "Silvertone": [_blend(0.0), _contrast(1.2), _gain(1.1)],
+}
+
+def parse_grading(grading_settings):
+    """
+    Returns (temp, exp, con, sat, filter_name) or None if the settings can't be parsed.
+    """
+    try:
+        temp = float(grading_settings.get('temperature', 5600))
+        exp = float(grading_settings.get('exposure', 0.0))
+        con = float(grading_settings.get('contrast', 0))
+        sat = float(grading_settings.get('saturation', 100))
+        filter_name = grading_settings.get('filterSuggestion', 'None')
+    except:
+        return None
+    return temp, exp, con, sat, filter_name
+
+def grading_ops(grading_settings):
+    """
+    Translates grading settings into the primitive op list (empty list = no-op).
+    """
+    parsed = parse_grading(grading_settings)
+    if parsed is None:
+        return []
+    temp, exp, con, sat, filter_name = parsed
+
+    ops = []
+    # 1. Temperature (Simplified)
+    if temp != 5600:
+        val = (temp - 5600) / 5000.0 # -0.8 to +0.8
+        ops.append(_gain(1 + (val * 0.2), 1.0, 1 - (val * 0.2)))
+    # 2. Exposure
+    if exp != 0:
+        ops.append(_gain(2 ** exp))
+    # 3. Contrast (pivot around 128)
+    if con != 0:
+        ops.append(_contrast(1 + (con / 100.0)))
+    # 4. Saturation (simple RGB average as gray)
+    if sat != 100:
+        ops.append(_blend(sat / 100.0))
+    # 5. Presets
+    ops.extend(PRESET_OPS.get(filter_name, []))
+    return ops
+
+def is_neutral_grading(grading_settings):
+    """
+    True when the grade leaves pixels untouched: no ops at all ('Natural Grade' and other
+    unknown preset names, default sliders, or settings that can't be parsed).
+    Shared by the renderers and the LUT baker so they agree on what needs grading.
+    """
+    return not grading_ops(grading_settings)
+
+def _run_ops(img, ops):
+    # Runs the ops without the final clip (out-of-range values matter before a blend)
+    for op in ops:
+        kind = op[0]
+        if kind == "affine":
+            img = img * np.asarray(op[1]) + np.asarray(op[2])
+        elif kind == "contrast":
+            img = (img - 128.0) * op[1] + 128.0
+        elif kind == "blend":
+            gray = np.mean(img, axis=-1, keepdims=True)
+            img = gray + (img - gray) * op[1]
+        elif kind == "teal_orange":
+            r = img[..., 0]
+            b = img[..., 2]
+            # Boost Red in highlights (Orange), Blue in shadows (Teal)
+            img[..., 0] = np.clip(np.where(r > 128, r * 1.2, r * 0.9), 0, 255)
+            img[..., 2] = np.clip(np.where(b < 128, b * 1.2, b * 0.9), 0, 255)
+    return img
+
+def apply_ops_float(img, ops):
+    """
+    Reference float pipeline. img is a float array [..., 3] in 0-255.
+    Returns the clipped float result.
+    """
+    return np.clip(_run_ops(img, ops), 0, 255)
+
+def _compile_separable(ops):
+    # Every op acts on each channel alone -> evaluate the pipeline on a gray ramp
+    ramp = np.repeat(np.arange(256, dtype=np.float64)[:, None], 3, axis=1)
+    out = apply_ops_float(ramp, ops).astype(np.uint8)
+    luts = [np.ascontiguousarray(out[:, c]) for c in range(3)]
+
+    def apply(frame):
+        graded = np.empty_like(frame)
+        for c in range(3):
+            graded[..., c] = luts[c][frame[..., c]]
+        return graded
+    return apply
+
+def _compile_blend(ops, blend_idx):
+    # Split into: pre (per-channel, any shape) -> gray blend(s) -> post (per-channel affine)
+    pre = ops[:blend_idx]
+    rest = ops[blend_idx:]
+
+    factor = 1.0
+    while rest and rest[0][0] == "blend":
+        factor *= rest[0][1]
+        rest = rest[1:]
+
+    scale = np.ones(3)
+    offset = np.zeros(3)
+    for op in rest:
+        if op[0] == "contrast":
+            op = ("affine", (op[1],) * 3, (128.0 - 128.0 * op[1],) * 3)
+        if op[0] != "affine":
+            return None # e.g. saturation + Teal & Orange: not separable this way
+        scale, offset = scale * np.asarray(op[1]), offset * np.asarray(op[1]) + np.asarray(op[2])
+
+    ramp = np.repeat(np.arange(256, dtype=np.float64)[:, None], 3, axis=1)
+    pre_vals = _run_ops(ramp, pre)
+
+    one = float(1 << FIXED_POINT_BITS)
+    def fixed(t):
+        return np.round(t * one).astype(np.int32)
+
+    # Diagonal term: the channel's own value (+ post offset)
+    diag = [fixed(scale[c] * factor * pre_vals[:, c] + offset[c]) for c in range(3)]
+
+    if np.allclose(scale, scale[0]):
+        # Same post scale on every channel -> the gray term is shared (6 gathers total)
+        mix = [fixed(scale[0] * (1.0 - factor) / 3.0 * pre_vals[:, k]) for k in range(3)]
+
+        def apply(frame):
+            r, g, b = frame[..., 0], frame[..., 1], frame[..., 2]
+            gray = mix[0][r] + mix[1][g] + mix[2][b]
+            graded = np.empty_like(frame)
+            for c in range(3):
+                acc = diag[c][frame[..., c]] + gray
+                acc >>= FIXED_POINT_BITS
+                np.clip(acc, 0, 255, out=acc)
+                graded[..., c] = acc
+            return graded
+        return apply
+
+    # Per-channel post scale (Vivid Warm/Cool) -> full 3x3 table matrix
+    tables = [[fixed(scale[c] * (1.0 - factor) / 3.0 * pre_vals[:, k]) + (diag[c] if k == c else 0)
+               for k in range(3)] for c in range(3)]
+
+    def apply(frame):
+        r, g, b = frame[..., 0], frame[..., 1], frame[..., 2]
+        graded = np.empty_like(frame)
+        for c in range(3):
+            acc = tables[c][0][r] + tables[c][1][g] + tables[c][2][b]
+            acc >>= FIXED_POINT_BITS
+            np.clip(acc, 0, 255, out=acc)
+            graded[..., c] = acc
+        return graded
+    return apply
+
+def compile_grading(grading_settings):
+    """
+    Compiles grading settings into a uint8 frame -> uint8 frame function built on LUTs.
+    Returns None when the grade is a no-op.
+    """
+    ops = grading_ops(grading_settings)
+    if not ops:
+        return None
+
+    blend_idx = next((i for i, op in enumerate(ops) if op[0] == "blend"), None)
+    if blend_idx is None:
+        return _compile_separable(ops)
+
+    compiled = _compile_blend(ops, blend_idx)
+    if compiled is not None:
+        return compiled
+
+    # Fallback: float pipeline (only saturation + Teal & Orange lands here)
+    def apply(frame):
+        return apply_ops_float(frame.astype(np.float64), ops).astype(np.uint8)
+    return apply
+
+# --- .cube export for ffmpeg lut3d ---
+# Same grade, baked into a 3D LUT so ffmpeg can run it natively in the filtergraph.
+
+LUT_CACHE_DIR = os.path.join("processing", "luts")
+CUBE_SIZE = 33
+
+def grading_key(grading_settings, size=CUBE_SIZE):
+    """
+    Stable hash of the effective grade (two configs that grade identically share a key).
+    """
+    ops = grading_ops(grading_settings)
+    canon = json.dumps([size, [[op[0]] + [_round_nested(v) for v in op[1:]] for op in ops]])
+    return hashlib.sha1(canon.encode("utf-8")).hexdigest()[:16]
+
+def _round_nested(v):
+    if isinstance(v, (list, tuple)):
+        return [round(float(x), 6) for x in v]
+    return round(float(v), 6)
+
+def write_cube_lut(grading_settings, path, size=CUBE_SIZE):
+    """
+    Bakes the grade into an Adobe/Resolve style .cube file (R changes fastest).
+    """
+    ops = grading_ops(grading_settings)
+    steps = np.linspace(0.0, 255.0, size)
+    # Lattice in .cube order: for b, for g, for r
+    b, g, r = np.meshgrid(steps, steps, steps, indexing="ij")
+    lattice = np.stack([r, g, b], axis=-1).reshape(-1, 3)
+    graded = apply_ops_float(lattice, ops) / 255.0
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write('TITLE "GravityEdits Grade"\n')
+        f.write(f"LUT_3D_SIZE {size}\n")
+        f.write("DOMAIN_MIN 0.0 0.0 0.0\n")
+        f.write("DOMAIN_MAX 1.0 1.0 1.0\n")
+        for row in graded:
+            f.write(f"{row[0]:.6f} {row[1]:.6f} {row[2]:.6f}\n")
+    # Atomic so concurrent renders never read a half-written LUT
+    os.replace(tmp_path, path)
+    return path
+
+def get_cube_lut(grading_settings, cache_dir=LUT_CACHE_DIR):
+    """
+    Returns the cached .cube path for this grade (baking it on first use), or None if neutral.
+    """
+    if is_neutral_grading(grading_settings):
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"grade_{grading_key(grading_settings)}.cube")
+    if not os.path.exists(path):
+        print(f"🎨 Baking grade LUT -> {path}")
+        write_cube_lut(grading_settings, path)
+    return path
+
+def lut3d_filter(grading_settings):
+    """
+    ffmpeg filter string for the grade ('' when neutral).
+    """
+    path = get_cube_lut(grading_settings)
+    if not path:
+        return ""
+    return f"lut3d=file='{path}'"
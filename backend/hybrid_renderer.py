@@ -1,603 +1,495 @@
 import os
 import subprocess
-from moviepy import VideoFileClip, CompositeVideoClip, AudioFileClip, CompositeAudioClip
 import traceback
 import time
 
 # Try to import from renderer, assuming it's in the same package
 # We use conditional import or try/except to handle running as script vs module
 try:
-    from backend.renderer import create_motion_text, RenderLogger
+    from backend.renderer import create_motion_text, RenderLogger, merge_grading, is_clip_kept, clip_times, resolve_source_path, prepare_overlay, rasterize_overlay, overlay_input_args, overlay_filters
+    from backend.grading import lut3d_filter, grading_key
+    from backend import segment_cache, encoder_profiles
+    from backend.media_probe import get_media_info
+    from backend.workspace import JobWorkspace
+    from backend.ffmpeg_progress import run_ffmpeg
+    from backend import conform, reframe
+    from backend import text_overlays
 except ImportError:
     try:
-        from renderer import create_motion_text, RenderLogger
+        from renderer import create_motion_text, RenderLogger, merge_grading, is_clip_kept, clip_times, resolve_source_path, prepare_overlay, rasterize_overlay, overlay_input_args, overlay_filters
+        from grading import lut3d_filter, grading_key
+        import segment_cache, encoder_profiles
+        from media_probe import get_media_info
+        from workspace import JobWorkspace
+        from ffmpeg_progress import run_ffmpeg
+        import conform, reframe
+        import text_overlays
     except ImportError:
         # Fallback if we can't find it
         print("⚠️ Warning: Could not import renderer.create_motion_text")
         create_motion_text = None
 
-# Robust audio_loop import (same as renderer.py)
-try:
-    from moviepy.audio.fx.all import audio_loop
-except ImportError:
-    try:
-        from moviepy.audio.fx.audio_loop import audio_loop
-    except ImportError:
-        # Manual implementation if missing
-        from moviepy.audio.AudioClip import concatenate_audioclips
-        def audio_loop(audioclip, duration=None, n=None):
-            if duration is not None:
-                n = int(duration / audioclip.duration) + 1
-            elif n is None:
-                n = 1
-            clips = [audioclip] * n
-            new_clip = concatenate_audioclips(clips)
-            if duration is not None:
-                new_clip = new_clip.subclipped(0, duration)
-            return new_clip
-
-TEMP_DIR = "temp_assets"
-
-def ensure_temp_dir():
-    if not os.path.exists(TEMP_DIR):
-        os.makedirs(TEMP_DIR)
-    return TEMP_DIR
-
-def resolve_source_path(source_name, project_data, upload_dir="uploads"):
-    """
-    Replicates the path resolution logic from renderer.py
-    """
-    # Priority 1: Uploads folder
-    source_path = os.path.join(upload_dir, os.path.basename(source_name))
-    
-    # Priority 2: Project Specific Folder
-    if not os.path.exists(source_path):
-        p_name = project_data.get('name', '')
-        safe_name = "".join(c for c in p_name if c.isalnum() or c in (' ', '_', '-')).strip()
-        project_media_path = os.path.join("projects", safe_name, "source_media", os.path.basename(source_name))
-        
-        if os.path.exists(project_media_path):
-            source_path = project_media_path
-        else:
-            # Try heuristic for Shorts
-            parts = safe_name.split('_')
-            if len(parts) > 1:
-                base_name = parts[0]
-                heuristic_path = os.path.join("projects", base_name, "source_media", os.path.basename(source_name))
-                if os.path.exists(heuristic_path):
-                    source_path = heuristic_path
-
-    # Priority 3: Absolute Fallback
-    if not os.path.exists(source_path):
-        abs_fallback = os.path.join("/Users/saieshwarrampelli/Downloads/GravityEdits/source_media", os.path.basename(source_name))
-        if os.path.exists(abs_fallback):
-            source_path = abs_fallback
-        
-        # Priority 4: Search blindly (Extension fix)
-        if not os.path.exists(source_path) and '.' not in source_name:
-            for ext in ['.mp4', '.mov', '.mkv']:
-                test_path = source_path + ext
-                if os.path.exists(test_path):
-                    source_path = test_path
-                    break
-    
-    return source_path
 
-def generate_text_overlay_asset(overlay_data, base_size, idx):
+def generate_text_overlay_asset(overlay_data, base_size, idx, ws):
     """
-    Generates a transparent video file for a text overlay.
+    Rasterizes a text overlay once to a bbox-sized RGBA PNG.
+    Returns (path, overlay, size) or None.
     """
     try:
-        content = overlay_data.get('content', '')
-        start = float(overlay_data.get('start', 0))
-        dur = float(overlay_data.get('duration', 2.0))
-        style = overlay_data.get('style', 'pop')
-        
-        f_size = overlay_data.get('fontSize')
-        p_x = overlay_data.get('positionX')
-        p_y = overlay_data.get('positionY')
-        t_color = overlay_data.get('textColor', 'white')
-        font_fam = overlay_data.get('fontFamily', 'Arial-Bold')
-        
-        mult = 1.0
-        if f_size is not None:
-            try:
-                mult = float(f_size) / 4.0
-            except: pass
-            
-        custom_pos = None
-        if p_x is not None and p_y is not None:
-            try:
-                custom_pos = (float(p_x)/100.0, float(p_y)/100.0)
-            except: pass
-        
-        # Safe Max Width
-        max_w = int(base_size[0] * 0.8) if base_size else 1000
-
-        txt_clip = create_motion_text(
-            content, 
-            duration=dur, 
-            style=style, 
-            fontsize_mult=mult, 
-            pos=custom_pos, 
-            color=t_color, 
-            font=font_fam, 
-            max_width=max_w
-        )
-        
-        if not txt_clip:
-            print(f"⚠️ TextClip failed for overlay {idx}. Using RED BOX fallback.")
-            from moviepy.video.VideoClip import ColorClip
-            # Create a Red Box 500x100
-            txt_clip = ColorClip(size=(500, 100), color=(255, 0, 0), duration=dur)
-            # We can't easily add text 'ERROR' without TextClip, so just Red Box.
-        
-        # 2. THE FIX: Explicit Duration on Clip
-        txt_clip = txt_clip.with_duration(dur)
-        
-        # 3. THE FIX: Composite Logic
-        w, h = base_size
-        
-        # We must place the text on a transparent canvas
-        final_clip = CompositeVideoClip(
-            [txt_clip], 
-            size=(w, h), 
-            bg_color=None, # Transparent
-            use_bgclip=False 
-        ).with_duration(dur) # <--- CRITICAL: Set duration on the Composite
-
-        output_path = os.path.join(ensure_temp_dir(), f"overlay_{idx}.mov")
-        
-        # 4. Render with Alpha
-        final_clip.write_videofile(
-            output_path, 
-            fps=30, # Match project FPS (User snippet said 24, but 30 is safer for sync)
-            codec="png", # 'png' is safer for Alpha than prores_ks on some systems
-            ffmpeg_params=['-pix_fmt', 'rgba'], # Ensures Alpha Channel is written
-            logger="bar"
-        )
-        
-        # DEBUG: Check if file exists and has size
-        if os.path.exists(output_path):
-             sz = os.path.getsize(output_path)
-             print(f"  - Generated Overlay {idx}: {output_path} ({sz} bytes)")
-        else:
-             print(f"  - ⚠️ Failed to generate {output_path}")
-        
-        return output_path, start, dur
+        ov = prepare_overlay(overlay_data, base_size[0], base_size[1])
+        if not ov:
+            return None
+
+        output_path = ws.path(f"overlay_{idx}.png")
+        size = rasterize_overlay(ov, output_path)
+        if not size:
+            print(f"⚠️ TextClip failed for overlay {idx}. Skipping.")
+            return None
+
+        print(f"  - Generated Overlay {idx}: {output_path} ({size[0]}x{size[1]})")
+        return output_path, ov, size
     
     except Exception as e:
         print(f"Failed to generate text asset {idx}: {e}")
         traceback.print_exc()
         return None
 
-def build_ffmpeg_filter_complex(clips_info, text_assets, total_duration, base_res=(1920, 1080)):
+# Overlay/timeline frame rate when the profile keeps the source rate
+DEFAULT_FPS = 30
+
+# Missing segments of one source are cut from ONE decoder (split + trim, one output file
+# per cut) instead of one ffmpeg process per cut, so decoders scale with sources.
+# A batch never decodes through a gap longer than SEGMENT_BATCH_MAX_GAP seconds (seeking is
+# cheaper) and holds at most SEGMENT_BATCH_SIZE outputs (each one is a live x264 encoder).
+SEGMENT_BATCH_SIZE = int(os.getenv("SEGMENT_BATCH_SIZE", "8"))
+SEGMENT_BATCH_MAX_GAP = float(os.getenv("SEGMENT_BATCH_MAX_GAP", "10"))
+
+def _clip_video_filters(clip):
+    filters = []
+    # Grading: same look as the MoviePy path, baked into a cached .cube LUT
+    # and run natively by ffmpeg (covers exposure + named presets too)
+    grade_filter = lut3d_filter(clip.get('grading', {}))
+    if grade_filter:
+        filters.append(grade_filter)
+    # Scale / SAR / fps only where this source differs from the timeline (see conform.py)
+    filters.extend(clip.get('conform', []))
+    return filters
+
+def plan_segment_batches(jobs):
     """
-    Constructs the filter_complex string for FFmpeg.
-    clips_info: list of dict {path, start, end, grading}
-    text_assets: list of tuples (path, start, dur)
-    base_res: tuple (width, height) target resolution
+    jobs: list of (key, clip, tmp_path). Groups them per source in source order,
+    splitting on large gaps and at SEGMENT_BATCH_SIZE.
     """
-    inputs = []
+    by_source = {}
+    for job in jobs:
+        by_source.setdefault(job[1]['path'], []).append(job)
+
+    batches = []
+    for items in by_source.values():
+        items.sort(key=lambda j: j[1]['start'])
+        batch = []
+        batch_end = 0.0
+        for job in items:
+            clip = job[1]
+            if batch and (len(batch) >= SEGMENT_BATCH_SIZE or clip['start'] - batch_end > SEGMENT_BATCH_MAX_GAP):
+                batches.append(batch)
+                batch = []
+            if not batch:
+                batch_end = clip['end']
+            batch.append(job)
+            batch_end = max(batch_end, clip['end'])
+        if batch:
+            batches.append(batch)
+    return batches
+
+def render_segment_batch(batch, profile):
+    """
+    Encodes every cut of the batch (all from one source) in a single ffmpeg process:
+    one seeked input, split into trim + grade + conform chains, one video-only output per cut.
+    """
+    path = batch[0][1]['path']
+    seek = min(clip['start'] for _, clip, _ in batch)
+    until = max(clip['end'] for _, clip, _ in batch)
+
+    chains = []
+    if len(batch) == 1:
+        sources = ["0:v:0"]
+    else:
+        sources = [f"s{k}" for k in range(len(batch))]
+        chains.append(f"[0:v:0]split={len(batch)}" + "".join(f"[{l}]" for l in sources))
+
+    for k, (_, clip, _) in enumerate(batch):
+        # Times are relative to the seek point (input -ss resets timestamps to 0)
+        filters = [
+            f"trim=start={clip['start'] - seek:.3f}:end={clip['end'] - seek:.3f}",
+            "setpts=PTS-STARTPTS",
+        ] + _clip_video_filters(clip)
+        chains.append(f"[{sources[k]}]{','.join(filters)}[out{k}]")
+
+    cmd = [
+        "ffmpeg", "-y", "-ss", f"{seek:.3f}", "-t", f"{until - seek:.3f}", "-i", path,
+        "-filter_complex", ";".join(chains),
+    ]
+    for k, (_, _, tmp_path) in enumerate(batch):
+        cmd.extend(["-map", f"[out{k}]", "-an"])
+        cmd.extend(encoder_profiles.video_codec_args(profile))
+        # Common timescale so segments with different frame rates concat without drift
+        cmd.extend(["-video_track_timescale", "90000", tmp_path])
+
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        print(f"FFmpeg Error:\n{result.stderr[-2000:]}")
+        raise Exception(f"Segment render failed for {path}")
+
+def render_clip_segments(clips_info, base_res, fps, profile, progress_callback=None):
+    """
+    Returns one cached segment path per clip, encoding only clips whose
+    trim/grade/resolution changed since an earlier export.
+    """
+    seg_paths = []
+    to_render = {}
+    for clip in clips_info:
+        key = segment_cache.segment_key("hybrid", clip['path'], clip['start'], clip['end'], {
+            "grading": grading_key(clip.get('grading') or {}),
+            "base_res": list(base_res),
+            "fps": fps,
+            "conform": clip.get('conform', []),
+            "encoder": encoder_profiles.cache_params(profile),
+        })
+        cached = segment_cache.lookup(key)
+        seg_paths.append(cached or segment_cache.segment_path(key))
+        if not cached and key not in to_render:
+            to_render[key] = (key, clip, segment_cache.temp_segment_path(key))
+
+    batches = plan_segment_batches(list(to_render.values()))
+    print(f"🧩 Segments: {len(clips_info) - len(to_render)} cached, {len(to_render)} to render in {len(batches)} batches")
+    done = 0
+    for batch in batches:
+        if progress_callback:
+            progress_callback({
+                "status": "processing",
+                "progress": 40 + (done / len(to_render)) * 30,
+                "message": f"Rendering clip {done+1}/{len(to_render)}"
+            })
+        try:
+            render_segment_batch(batch, profile)
+            for key, _, tmp_path in batch:
+                segment_cache.commit(tmp_path, key)
+        finally:
+            for _, _, tmp_path in batch:
+                if os.path.exists(tmp_path): os.remove(tmp_path)
+        done += len(batch)
+    return seg_paths
+
+def build_ffmpeg_filter_complex(base_list_path, text_assets, base_res, fps=DEFAULT_FPS):
+    """
+    Constructs the inputs + filter_complex for the final pass.
+    base_list_path: concat list of the clip segments (input 0)
+    text_assets: list of tuples (png_path, overlay, size)
+    """
+    inputs = ["-f", "concat", "-safe", "0", "-i", base_list_path]
     filter_chains = []
-    concat_inputs = []
-    
-    # 1. Process Main Video Clips
-    for i, clip in enumerate(clips_info):
-        inputs.append("-i")
-        inputs.append(clip['path'])
-        
-        # Filter Chain for this clip
-        # [i:v]trim=start=S:end=E,setpts=PTS-STARTPTS,eq=...[v_i]
-        
-        # Grading
-        grading = clip.get('grading', {})
-        filters = []
-        
-        # Trim
-        # Note: FFmpeg trim takes input stream time. 
-        # clip['start'] and clip['end'] from user JSON refer to the SOURCE file timestamps
-        # So `trim=start=X:end=Y` works perfectly.
-        start = clip['start']
-        end = clip['end']
-        filters.append(f"trim=start={start}:end={end}")
-        filters.append("setpts=PTS-STARTPTS")
-        
-        # Grading Eq
-        # eq=contrast=...:brightness=...:saturation=...
-        # Map our numpy grading to eq/colorbalance
-        # Temp -> colorbalance?
-        grade_filts = []
-        
-        con = float(grading.get('contrast', 0))
-        # numpy: (img - 128) * factor + 128. approx mapping?
-        # ffmpeg eq: contrast=1.0 is neutral.
-        # our numpy: factor = 1 + (con/100).
-        c_val = 1.0 + (con / 100.0)
-        
-        sat = float(grading.get('saturation', 100))
-        s_val = sat / 100.0
-        
-        exp = float(grading.get('exposure', 0))
-        # exposure in ev? eq brightness is additive shift.
-        # eq doesn't have exposure. colorlevels or curves?
-        # approximate with brightness? No, exposure is mult.
-        # eq has gamma?
-        # Let's simple mapping: brightness shift?
-        # exposure=1 -> double signal. brightness=0.1?
-        # Let's skip precise exposure mapping for now or use gamma.
-        # Actually `eq` has `contrast, brightness, saturation, gamma`.
-        
-        if c_val != 1.0 or s_val != 1.0:
-            grade_filts.append(f"eq=contrast={c_val}:saturation={s_val}")
-            
-        # Temperature (Kelvin)
-        # Using `colortemperature` if available, or `colorbalance`
-        temp = float(grading.get('temperature', 5600))
-        if temp != 5600:
-            # Simple shifting red/blue
-            # > 5600 -> Warm (Red up, Blue down)
-            # < 5600 -> Cool (Red down, Blue up)
-            # colorbalance ranges -1.0 to 1.0
-            shift = (temp - 5600) / 10000.0 # Arbitrary scaling
-            # Clamp
-            shift = max(-1.0, min(1.0, shift))
-            # If shift > 0 (Warm): rs=+shift, bs=-shift
-            grade_filts.append(f"colorbalance=rs={shift}:bs={-shift}:rm={shift}:bm={-shift}:rh={shift}:bh={-shift}")
-
-        if grade_filts:
-            filters.extend(grade_filts)
-        
-        # Scale to common resolution?
-        # If we assume 1080p source, fine. If mixed, we should scale.
-        # Let's force scale to 1920:1080 to be safe?
-        # filters.append("scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2")
-        # For now assume mostly uniform or handle later. 
-        # Adding scale avoids concatenation errors.
-        # Scale to common resolution matches base_res
-        # Force scaling to avoid concatenation errors
-        w_target, h_target = base_res
-        filters.append(f"scale={w_target}:{h_target}") 
-        filters.append("setsar=1") # reset sample aspect ratio to square pixels prevents issues
-        
-        chain = ",".join(filters)
-        filter_chains.append(f"[{i:d}:v]{chain}[v{i}]")
-        concat_inputs.append(f"[v{i}]")
-        
-    # Concat
-    # [v0][v1]concat=n=N:v=1:a=0[base]
-    concat_str = "".join(concat_inputs)
-    filter_chains.append(f"{concat_str}concat=n={len(clips_info)}:v=1:a=0[vbase]")
-    
-    # 2. Process Overlays
-    # Input indices for overlays start at len(clips_info)
-    current_v_label = "vbase"
-    
-    text_input_start_idx = len(clips_info)
-    
-    # We also have an Audio Input at the very end.
-    # So text inputs are from text_input_start_idx to text_input_start_idx + len(text_assets) - 1
-    
-    for j, (path, start, dur) in enumerate(text_assets):
-        idx = text_input_start_idx + j
-        
-        # Standard Input (No offset on input level)
-        inputs.append("-i")
-        inputs.append(path)
-        
-        # Overlay Logic with setpts
-        # [curr][idx]overlay...
+
+    # Overlays: input indices start at 1 (0 is the concatenated base)
+    current_v_label = "0:v"
+
+    for j, (path, ov, size) in enumerate(text_assets):
+        idx = 1 + j
+        # Still image looped for the overlay duration, shifted to its start time
+        inputs.extend(overlay_input_args(path, ov['duration'], fps))
+
         next_label = f"vov{j}"
-        
-        start_f = float(start)
-        end_f = start_f + float(dur)
-        
-        # 1. Delay the overlay stream to start time
-        # We need to shift PTS.
-        # Note: If input is 2s long. PTS starts at 0.
-        # We want it to start at `start_f`.
-        # setpts=PTS+START_SECONDS/TB
-        
-        delay_label = f"vov_delayed_{j}"
-        filter_chains.append(f"[{idx}:v]setpts=PTS+({start_f:.3f}/TB)[{delay_label}]")
-        
-        # 2. Overlay it
-        # enable is still useful to ensure it disappears/appears cleanly
-        filter_chains.append(f"[{current_v_label}][{delay_label}]overlay=enable='between(t,{start_f:.3f},{end_f:.3f})':eof_action=pass[vov{j}]")
+        filter_chains.extend(overlay_filters(ov, idx, size, base_res, current_v_label, next_label))
         current_v_label = next_label
         
     final_output_label = current_v_label
     
     return inputs, filter_chains, final_output_label
 
-def render_hybrid_project(project_data, progress_callback=None):
-    print("🚀 Starting Hybrid Render (MoviePy + FFmpeg)...")
-    ensure_temp_dir()
+# Common format for every audio branch so concat/amix never have to guess
+AUDIO_FORMAT = "aresample=48000,aformat=sample_fmts=fltp:channel_layouts=stereo"
+
+# Reordered / jump-cut timelines break into many runs; past this many audio inputs (or one
+# per source, if there are more sources) every source gets ONE input split to all its cuts
+AUDIO_MAX_INPUTS = int(os.getenv("AUDIO_MAX_INPUTS", "8"))
+
+def plan_input_runs(clips_info, max_gap=SEGMENT_BATCH_MAX_GAP, max_inputs=AUDIO_MAX_INPUTS):
+    """
+    Groups timeline clips (with audio) into runs that can share one seeked input:
+    consecutive in the timeline, same source, ascending, gaps <= max_gap.
+    Returns lists of indices into clips_info. Decode cost follows the kept duration
+    and split branches are consumed in order (no buffering of later cuts).
+    When that needs more than max_inputs inputs (and more than one per source), it
+    falls back to one run per source, so decoders scale with sources, not cuts.
+    """
+    runs = []
+    run = []
+    run_end = 0.0
+    for i, clip in enumerate(clips_info):
+        if not clip.get('has_audio'):
+            continue
+        if run:
+            prev = clips_info[run[-1]]
+            if (clip['path'] != prev['path'] or clip['start'] < prev['start']
+                    or clip['start'] - run_end > max_gap):
+                runs.append(run)
+                run = []
+        if not run:
+            run_end = clip['end']
+        run.append(i)
+        run_end = max(run_end, clip['end'])
+    if run:
+        runs.append(run)
+
+    by_source = {}
+    for run in runs:
+        by_source.setdefault(clips_info[run[0]]['path'], []).extend(run)
+    if len(runs) > max(max_inputs, len(by_source)):
+        print(f"🔊 {len(runs)} audio runs -> one input per source ({len(by_source)})")
+        return [sorted(indices) for indices in by_source.values()]
+    return runs
+
+def build_audio_graph(clips_info, project_data, first_input_idx, total_duration, upload_dir="uploads"):
+    """
+    Expresses the whole audio mix as filtergraph chains:
+      per clip: seeked input per run, atrim + asetpts (anullsrc for silent sources) -> concat
+      music: -stream_loop -1 input, atrim to length, volume, adelay
+      sfx: atrim, volume, adelay
+      all: amix (no normalization, same as summing layers)
+    Returns (inputs, filter_chains, out_label); out_label is None when there is no audio.
+    """
+    inputs = []
+    chains = []
+    track_volumes = project_data.get('trackVolumes', {}) or {}
+
+    def add_input(path, loop=False, seek=None, length=None):
+        if loop:
+            inputs.extend(["-stream_loop", "-1"])
+        if seek is not None:
+            # Input seeking: keyframe seek + accurate trim, nothing before `seek` is decoded
+            inputs.extend(["-ss", f"{seek:.3f}", "-t", f"{length:.3f}"])
+        inputs.extend(["-i", path])
+        return first_input_idx + inputs.count("-i") - 1
+
+    # A. Source audio: one seeked input per run of clips (see plan_input_runs),
+    # split when the run holds more than one cut (atrims are relative to the run's seek)
+    branch = {}
+    for run in plan_input_runs(clips_info):
+        seek = min(clips_info[i]['start'] for i in run)
+        until = max(clips_info[i]['end'] for i in run)
+        idx = add_input(clips_info[run[0]]['path'], seek=seek, length=until - seek)
+        if len(run) == 1:
+            labels = [f"{idx}:a"]
+        else:
+            labels = [f"as{idx}_{k}" for k in range(len(run))]
+            chains.append(f"[{idx}:a]asplit={len(run)}" + "".join(f"[{l}]" for l in labels))
+        for i, label in zip(run, labels):
+            branch[i] = (label, seek)
+
+    concat_labels = []
+    for i, clip in enumerate(clips_info):
+        label = f"a{i}"
+        dur = clip['end'] - clip['start']
+        if i in branch:
+            src, seek = branch[i]
+            # Times are relative to the run's seek point
+            chains.append(
+                f"[{src}]atrim=start={clip['start'] - seek:.3f}:end={clip['end'] - seek:.3f},"
+                f"asetpts=PTS-STARTPTS,{AUDIO_FORMAT}[{label}]"
+            )
+        else:
+            # Keep the timeline in sync for clips without an audio stream
+            chains.append(f"anullsrc=r=48000:cl=stereo,atrim=duration={dur:.3f},{AUDIO_FORMAT}[{label}]")
+        concat_labels.append(f"[{label}]")
+
+    if not concat_labels:
+        return inputs, chains, None
+
+    chains.append("".join(concat_labels) + f"concat=n={len(concat_labels)}:v=0:a=1[amain]")
+    mix_labels = ["[amain]"]
+
+    # B. Background Score (looped by the demuxer, cut to length here)
+    bg_music_config = project_data.get('bgMusic')
+    if bg_music_config and bg_music_config.get('source'):
+        m_path = resolve_source_path(bg_music_config['source'], project_data, upload_dir)
+        if os.path.exists(m_path):
+            vol = float(track_volumes.get('music', bg_music_config.get('volume', 0.5)))
+            bg_start = float(bg_music_config.get('start', 0))
+            bg_user_duration = bg_music_config.get('duration')
+            bg_dur = float(bg_user_duration) if bg_user_duration else max(0, total_duration - bg_start)
+            if bg_dur > 0:
+                idx = add_input(m_path, loop=True)
+                delay_ms = int(bg_start * 1000)
+                chains.append(
+                    f"[{idx}:a]atrim=duration={bg_dur:.3f},asetpts=PTS-STARTPTS,volume={vol},"
+                    f"adelay={delay_ms}:all=1,{AUDIO_FORMAT}[abg]"
+                )
+                mix_labels.append("[abg]")
+
+    # C. Secondary Audio Clips
+    for j, clip_data in enumerate(project_data.get('audioClips', []) or []):
+        if not clip_data.get('source'):
+            continue
+        sfx_path = resolve_source_path(clip_data['source'], project_data, upload_dir)
+        if not os.path.exists(sfx_path):
+            continue
+        vol = float(track_volumes.get(f"a{clip_data.get('track', 2)}", 1.0))
+        delay_ms = int(float(clip_data.get('start', 0)) * 1000)
+        trim = f"atrim=duration={float(clip_data['duration']):.3f}," if clip_data.get('duration') else ""
+        idx = add_input(sfx_path)
+        chains.append(f"[{idx}:a]{trim}asetpts=PTS-STARTPTS,volume={vol},adelay={delay_ms}:all=1,{AUDIO_FORMAT}[asfx{j}]")
+        mix_labels.append(f"[asfx{j}]")
+
+    if len(mix_labels) == 1:
+        return inputs, chains, "amain"
+
+    # duration=first: the edit decides the length, music/sfx never extend it
+    chains.append("".join(mix_labels) + f"amix=inputs={len(mix_labels)}:duration=first:normalize=0[aout]")
+    return inputs, chains, "aout"
+
+def render_hybrid_project(project_data, progress_callback=None, profile=None):
+    # All intermediates live in a job-scoped workspace (removed even on failure),
+    # so concurrent hybrid jobs on one host never touch each other's files
+    with JobWorkspace("hybrid") as ws:
+        return _render_hybrid_in_workspace(project_data, ws, progress_callback, profile)
+
+def _render_hybrid_in_workspace(project_data, ws, progress_callback=None, profile=None):
+    profile = encoder_profiles.get_profile(profile)
+    print(f"🚀 Starting Hybrid Render (MoviePy + FFmpeg)... (profile: {profile['name']})")
     
     upload_dir = "uploads"
-    # Find resolution from first valid clip
-    base_res = (1920, 1080) # Default
-    try:
-        # Check first a few clips until we find one
-        for c in project_data.get('edl', project_data.get('clips', []))[:3]:
-             src = resolve_source_path(c.get('source', ''), project_data, upload_dir)
-             if os.path.exists(src):
-                 with VideoFileClip(src) as v:
-                     # Check rotation
-                     if v.rotation in [90, 270]:
-                         base_res = (v.h, v.w)
-                     else:
-                         base_res = (v.w, v.h)
-                     print(f"Detected Base Resolution: {base_res}")
-                     break
-    except Exception as e:
-        print(f"Warning: Could not detect resolution: {e}")
-    
     clips_list = project_data.get('edl', project_data.get('clips', []))
     processed_clips_info = []
     
-    # 1. Gather Clips & Prepare Audio
-    # We use MoviePy to handle audio logic because it's complex (mixing, split, loop)
-    # and fast enough for audio.
+    global_settings = project_data.get('globalSettings', {}) or {}
+    global_grading = global_settings.get('colorGrading', {})
+    global_filter = global_settings.get('filterSuggestion', 'None')
     
-    audio_clips = []
-    
-    # A. Source Audio
+    # 1. Gather Clips (ffprobe only, the audio mix is built in the filtergraph below)
     print("🔊 processing audio...")
     if progress_callback: progress_callback({"status": "processing", "progress": 5, "message": "Processing audio..."})
 
+    probes = {}
     for i, clip_data in enumerate(clips_list):
-        keep = clip_data.get('keep', True)
-        if isinstance(keep, str) and keep.lower() == 'false': keep = False
-        if not keep: continue
+        if not is_clip_kept(clip_data): continue
         
         src_path = resolve_source_path(clip_data['source'], project_data, upload_dir)
         if not os.path.exists(src_path): continue
-        
-        start = float(clip_data.get('start', 0))
-        # Logic for end/duration
-        end_val = clip_data.get('end')
-        if not end_val or float(end_val) == 0:
-            dur = float(clip_data.get('duration', 0))
-            if dur > 0: end_val = start + dur
-            else: 
-                # Need to know file duration. 
-                # Expensive to open each? Just use ffmpeg probe or existing knowledge?
-                # We'll trust provided duration or open quickly
-                with VideoFileClip(src_path) as v:
-                    end_val = v.duration
-        
-        end = float(end_val)
-        
+
+        if src_path not in probes:
+            probes[src_path] = get_media_info(src_path) or {}
+        info = probes[src_path]
+        
+        # Same trim rules as render_project
+        times = clip_times(clip_data, info.get('duration', 0))
+        if times is None:
+            continue
+        start, end = times
+
         # Use Exact Cut Times (No Buffer)
-        # The user wants exact EDL cuts.
-        safe_start = start
-        safe_end = end
-        
-        # Validation
-        if safe_start >= safe_end:
-             # Fallback if invalid
-             print(f"⚠️ Invalid clip times for {i}: {safe_start} to {safe_end}. Skipping.")
-             continue
-        
-        # Let's open clip for audio
-        try:
-             # Just audio
-             # Note: AudioFileClip reads the file.
-             audioclip = AudioFileClip(src_path)
-             
-             # Safety Clamp
-             if safe_end > audioclip.duration:
-                 safe_end = audioclip.duration
-                 
-             if safe_start >= safe_end:
-                 continue
-
-             # Cut
-             sub = audioclip.subclipped(safe_start, safe_end)
-             audio_clips.append(sub)
-             
-             # Store info for Video FFmpeg
-             processed_clips_info.append({
-                 "path": src_path,
-                 "start": safe_start,
-                 "end": safe_end,
-                 "grading": clip_data.get('colorGrading', {})
-             })
-             
-        except Exception as e:
-            print(f"Audio prep error clip {i}: {e}")
-
-    # B. BG Music & SFX (Reuse logic via manual implementation simplified)
-    # ... We can copy the logic from renderer.py or try to be generic
-    # For now, let's just implement the BG Music part simply
-    
-    bg_music_config = project_data.get('bgMusic')
-    if bg_music_config and bg_music_config.get('source'):
-        try:
-            m_path = resolve_source_path(bg_music_config['source'], project_data, upload_dir)
-            if os.path.exists(m_path):
-                bg = AudioFileClip(m_path)
-                bg = bg.multiply_volume(float(bg_music_config.get('volume', 0.5)))
-                # Loop/Cut logic... skipping complex loop for brevity in this step, taking full length
-                # Calculate total duration of video
-                total_video_dur = sum([c['end'] - c['start'] for c in processed_clips_info])
-                if bg.duration < total_video_dur:
-                    bg = audio_loop(bg, duration=total_video_dur)
-                else:
-                    bg = bg.subclipped(0, total_video_dur)
-                
-                bg = bg.with_start(float(bg_music_config.get('start', 0)))
-                audio_clips.append(bg)
-        except Exception as e:
-            print(f"BG Music Error: {e}")
-
-    # Mix Audio
-    final_audio_path = os.path.join(ensure_temp_dir(), "mixed_audio.m4a")
-    if audio_clips:
-        # Concatenate source audio clips?
-        # Wait, source audio clips correspond to video clips in sequence.
-        # But we added them to a flat list `audio_clips`.
-        # `CompositeAudioClip` mixes them all starting at 0 unless `set_start` is used.
-        # Source audio must be concatenated in sequence.
-        # BG music overlayed.
-        
-        # Separate source vs overlay
-        # The first N clips are source clips. They should be concatenated.
-        num_source = len(processed_clips_info)
-        source_audio_parts = audio_clips[:num_source]
-        overlay_audio_parts = audio_clips[num_source:]
-        
-        from moviepy.audio.AudioClip import concatenate_audioclips
-        try:
-            main_track = concatenate_audioclips(source_audio_parts)
-            final_mix_list = [main_track]
-            final_mix_list.extend(overlay_audio_parts)
-            
-            final_audio = CompositeAudioClip(final_mix_list)
-            final_audio.write_audiofile(final_audio_path, logger=None)
-        except Exception as e:
-            print(f"Audio Mixing Error: {e}")
-            final_audio_path = None
-    else:
-        final_audio_path = None
+        processed_clips_info.append({
+            "path": src_path,
+            "start": start,
+            "end": end,
+            "has_audio": bool(info.get('has_audio', True)),
+            "grading": merge_grading(global_grading, global_filter, clip_data)
+        })
 
-    # 2. Convert Overlays to Assets
-    print("✨ Generating Text Overlays (MoviePy)...")
+    # Timeline format from the sources (profile fps wins), then per-clip conversions
+    # Portrait: every clip is reframed (crop + lanczos) inside its segment encode
+    render_mode = project_data.get('renderMode', 'landscape')
+    base_res, fps = conform.timeline_format(
+        [probes[c['path']] for c in processed_clips_info], profile["fps"], default_fps=DEFAULT_FPS, render_mode=render_mode
+    )
+    # Subject tracks (computed on the first portrait export) make the crop follow the speaker
+    sources = sorted({c['path'] for c in processed_clips_info})
+    tracks = reframe.load_crop_tracks(project_data, sources) if render_mode == 'portrait' else {}
+    for c in processed_clips_info:
+        track = reframe.track_for(tracks, c['path'])
+        # Segment chains reset timestamps to 0 at the clip start (setpts=PTS-STARTPTS)
+        points = reframe.track_points(track, c['start'], c['end'], offset=-c['start']) if track else None
+        c['conform'] = conform.conform_filters(probes[c['path']], base_res, fps, render_mode, points)
+    print(f"Timeline Format: {base_res[0]}x{base_res[1]} @ {fps}fps")
+    print(conform.describe(sum(1 for c in processed_clips_info if c['conform']), len(processed_clips_info)))
+
+    # 2. Convert Overlays to Assets (or drawtext filters)
     if progress_callback: progress_callback({"status": "processing", "progress": 20, "message": "Generating Text..."})
     
     overlays = project_data.get('overlays', [])
     text_assets = []
-    for i, ov in enumerate(overlays):
-        res = generate_text_overlay_asset(ov, base_res, i)
-        if res:
-            text_assets.append(res)
+    drawtext_overlays = []
+    if text_overlays.choose_backend(project_data, len(overlays)) == "drawtext":
+        print("✨ Text Overlays -> ffmpeg drawtext")
+        drawtext_overlays = [ov for ov in (prepare_overlay(o, base_res[0], base_res[1]) for o in overlays) if ov]
+    else:
+        print("✨ Generating Text Overlays (MoviePy)...")
+        for i, ov in enumerate(overlays):
+            res = generate_text_overlay_asset(ov, base_res, i, ws)
+            if res:
+                text_assets.append(res)
             
-    # 3. Build FFmpeg Command
+    # 3. Clip Segments (cached per clip) + Build FFmpeg Command
     print("🎬 Assembling Video (FFmpeg)...")
     if progress_callback: progress_callback({"status": "processing", "progress": 40, "message": "Assembling Video..."})
+
+    seg_paths = render_clip_segments(processed_clips_info, base_res, fps, profile, progress_callback)
+    base_list_path = segment_cache.write_concat_list(seg_paths, ws.path("segments.txt"))
     
-    inputs, filter_chains, last_v_label = build_ffmpeg_filter_complex(
-        processed_clips_info, 
-        text_assets, 
-        0, # Duration handled by concat
-        base_res
+    inputs, video_chains, last_v_label = build_ffmpeg_filter_complex(base_list_path, text_assets, base_res, fps)
+    text_chain = text_overlays.build_drawtext_chain(drawtext_overlays, base_res, ws, last_v_label, "vtxt")
+    if text_chain:
+        video_chains.extend(text_chain)
+        last_v_label = "vtxt"
+
+    # 4. Audio graph (inputs follow the base + overlay inputs)
+    total_duration = sum([c['end'] - c['start'] for c in processed_clips_info])
+    audio_inputs, audio_chains, last_a_label = build_audio_graph(
+        processed_clips_info, project_data, inputs.count("-i"), total_duration, upload_dir
     )
+    inputs.extend(audio_inputs)
+    filter_chains = video_chains + audio_chains
     
-    # 4. Construct Final Command
-    # Inputs...
-    # Then Audio Input (if exists)
-    audio_input_idx = -1
-    if final_audio_path and os.path.exists(final_audio_path):
-        inputs.append("-i")
-        inputs.append(final_audio_path)
-        audio_input_idx = (len(inputs) // 2) - 1
-    
-    # Filter Complex file (to avoid char limit)
-    fc_script = ";".join(filter_chains)
-    fc_path = os.path.join(ensure_temp_dir(), "filter_script.txt")
-    with open(fc_path, "w") as f:
-        f.write(fc_script)
-        
+    # 5. Construct Final Command
     output_filename = f"{project_data.get('name', 'video')}_hybrid_{int(time.time())}.mp4"
     output_path = os.path.join("exports", output_filename)
     
     cmd = ["ffmpeg", "-y"]
     cmd.extend(inputs)
-    cmd.extend(["-filter_complex_script", fc_path])
-    
-    # Mapping
-    cmd.extend(["-map", f"[{last_v_label}]"])
-    if audio_input_idx >= 0:
-        cmd.extend(["-map", f"{audio_input_idx}:a"])
+
+    if filter_chains:
+        # Filter Complex file (to avoid char limit)
+        fc_script = ";".join(filter_chains)
+        fc_path = ws.path("filter_script.txt")
+        with open(fc_path, "w") as f:
+            f.write(fc_script)
+        cmd.extend(["-filter_complex_script", fc_path])
+
+    if video_chains:
+        cmd.extend(["-map", f"[{last_v_label}]"])
+        cmd.extend(encoder_profiles.video_codec_args(profile))
+    else:
+        # No overlays: the joined segments are the final video stream
+        cmd.extend(["-map", "0:v", "-c:v", "copy"])
+
+    if last_a_label:
+        cmd.extend(["-map", f"[{last_a_label}]"])
         
-    cmd.extend(["-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac"])
+    cmd.extend(encoder_profiles.audio_codec_args(profile))
     cmd.extend([output_path])
     
-    print(f"Running FFmpeg: {' '.join(cmd)}")
-    
     # Execute
-    # Calculate Total Duration for Progress
-    total_duration = sum([c['end'] - c['start'] for c in processed_clips_info])
+    # Total Duration for Progress
     if total_duration == 0: total_duration = 1.0
 
     print(f"Running FFmpeg (Duration: {total_duration:.2f}s): {' '.join(cmd)}")
-    
-    import re
-    # Regex to capture "time=00:00:00.00"
-    time_regex = re.compile(r"time=(\d{2}):(\d{2}):(\d{2}\.\d{2})")
-    
-    # Execute with stderr pipe
-    process = subprocess.Popen(
-        cmd, 
-        stdout=subprocess.DEVNULL, # Ignore stdout
-        stderr=subprocess.PIPE,    # Read progress from stderr
-        universal_newlines=True,
-        bufsize=1 # Line buffered
-    )
-    
-    # Real-time Progress Monitoring
-    while True:
-        # Read line from stderr
-        line = process.stderr.readline()
-        
-        # Check if process finished
-        if not line and process.poll() is not None:
-            break
-            
-        if line:
-            # Parse progress
-            match = time_regex.search(line)
-            if match:
-                try:
-                    h, m, s = map(float, match.groups())
-                    current_seconds = h * 3600 + m * 60 + s
-                    
-                    # Calculate percentage (Mapped from 40% to 95%)
-                    # We reserve last 5% for finalization
-                    percent_complete = min(1.0, current_seconds / total_duration)
-                    global_progress = 40 + (percent_complete * 55) 
-                    
-                    if progress_callback:
-                        progress_callback({
-                            "status": "processing", 
-                            "progress": min(99, global_progress), 
-                            "message": f"Rendering... {int(percent_complete * 100)}%"
-                        })
-                except Exception as e:
-                    # Catch cancellation from callback
-                    print(f"🛑 Render Interrupted: {e}")
-                    process.terminate()
-                    process.wait()
-                    raise e
-                except: pass
-        
-        # Always check for cancellation even if no regex match
-        # We ping with empty status check every loop? To avoid spam, maybe only every X lines?
-        # But for responsiveness, checking often is fine as it's just a dict lookup in memory.
-        try:
-            if progress_callback:
-                 # Sending just status check (pass empty dict to trigger callback logic without overwriting status)
-                 progress_callback({})
-        except Exception as e:
-            print(f"🛑 Render Action Interrupted: {e}")
-            process.terminate()
-            process.wait()
-            raise e
-
-
-    # Check for success
-    if process.returncode != 0:
-        # We might have missed the error in the loop logic if we only looked for progress
-        # Read whatever is left
-        rem_err = process.stderr.read()
-        print(f"FFmpeg Error:\n{rem_err}")
-        raise Exception("FFmpeg Rendering Failed (Check server logs)")
-    
+
+    # Progress is read from ffmpeg's -progress stream and mapped from 70% to 95%
+    # (last 5% reserved for finalization); job updates are throttled to ~1/s
+    run_ffmpeg(cmd, total_duration, progress_callback, start=70, span=25, message="Rendering")
+
     print(f"✅ Hybrid Render Complete: {output_path}")
-    
-    # Cleanup Temp
-    # shutil.rmtree(TEMP_DIR) 
+    segment_cache.evict(protect=seg_paths)
+    ws.usage()
 
     if progress_callback:
         progress_callback({"status": "completed", "progress": 100, "message": "Render Complete", "url": f"/exports/{output_filename}"})
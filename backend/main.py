@@ -4,7 +4,6 @@ from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 import shutil
 import os
-import cv2
 import json
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
@@ -20,10 +19,12 @@ try:
     from . import ai_engine
     from . import renderer
     from . import chat_engine
+    from .media_probe import get_media_info
 except ImportError:
     import ai_engine
     import renderer
     import chat_engine
+    from media_probe import get_media_info
 
 
 app = FastAPI()
@@ -53,14 +54,10 @@ app.mount("/projects", StaticFiles(directory=PROJECTS_DIR), name="projects") # E
 
 # Utils
 def get_video_duration(file_path):
+    # Served from the folder's probe index (ffprobe runs once per file version)
     try:
-        cap = cv2.VideoCapture(file_path)
-        if not cap.isOpened(): return 0
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        duration = frame_count / fps if fps > 0 else 0
-        cap.release()
-        return duration
+        info = get_media_info(file_path)
+        return info["duration"] if info else 0
     except Exception as e:
         print(f"Error getting duration for {file_path}: {e}")
         return 0
@@ -95,7 +92,7 @@ def list_projects():
                     "name": dirname,
                     "created_at": meta.get("created_at"),
                     "thumbnail": meta.get("thumbnail"), # Could be path to first video thumb
-                    "clip_count": len(os.listdir(os.path.join(path, "source_media"))) if os.path.exists(os.path.join(path, "source_media")) else 0
+                    "clip_count": len([f for f in os.listdir(os.path.join(path, "source_media")) if not f.startswith('.')]) if os.path.exists(os.path.join(path, "source_media")) else 0
                 })
     return projects
 
@@ -167,12 +164,9 @@ async def upload_batch(
             
             print(f"File saved: {file_path}")
             
-            # OPTIMIZATION: Skip duration check to prevent OpenCV hangs during upload
-            # duration = get_video_duration(file_path)
-            duration = 0
-            
-            # If it's 0 and looks like audio, we can try moviepy later or just leave it
-            # For now 0 is fine, Frontend handles it (defaulting to 5s visual or looping music)
+            # Probe once with ffprobe (no decoding) and store it in the folder's probe index;
+            # listings and renders read it from there. 0 = unknown, Frontend handles it.
+            duration = get_video_duration(file_path)
             
             uploaded_files.append({
                 "name": file.filename,
@@ -0,0 +1,218 @@
+import os
+import json
+import hashlib
+import threading
+import subprocess
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+# Thin ffprobe helpers shared by the ffmpeg-based render engines.
+# ffprobe only demuxes, so these are much cheaper than opening a VideoFileClip.
+
+def run_ffprobe(args):
+    """
+    Runs ffprobe with JSON output and returns the parsed dict ({} on failure).
+    """
+    cmd = ["ffprobe", "-v", "error", "-of", "json"] + list(args)
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            print(f"⚠️ ffprobe failed: {result.stderr.strip()}")
+            return {}
+        return json.loads(result.stdout or "{}")
+    except Exception as e:
+        print(f"⚠️ ffprobe error: {e}")
+        return {}
+
+def _parse_rate(rate):
+    # "30000/1001" -> 29.97
+    try:
+        if not rate or rate == "0/0":
+            return 0.0
+        if "/" in rate:
+            num, den = rate.split("/")
+            return float(num) / float(den) if float(den) else 0.0
+        return float(rate)
+    except Exception:
+        return 0.0
+
+def _stream_rotation(stream):
+    # Rotation lives in tags (old ffmpeg) or in the display matrix side data (new ffmpeg)
+    try:
+        rot = stream.get("tags", {}).get("rotate")
+        if rot is not None:
+            return int(float(rot)) % 360
+        for sd in stream.get("side_data_list", []):
+            if "rotation" in sd:
+                return int(float(sd["rotation"])) % 360
+    except Exception:
+        pass
+    return 0
+
+def probe_media(path):
+    """
+    Returns a flat summary of the first video/audio streams of a media file:
+    duration, width, height, fps, rotation, codecs, pix_fmt, profile, sar and audio layout.
+    """
+    data = run_ffprobe(["-show_format", "-show_streams", path])
+    if not data:
+        return None
+
+    info = {
+        "duration": 0.0,
+        "width": 0,
+        "height": 0,
+        "fps": 0.0,
+        "rotation": 0,
+        "sar": "1:1",
+        "video_codec": None,
+        "profile": None,
+        "pix_fmt": None,
+        "time_base": None,
+        "has_audio": False,
+        "audio_codec": None,
+        "sample_rate": 0,
+        "channels": 0,
+    }
+
+    try:
+        info["duration"] = float(data.get("format", {}).get("duration", 0) or 0)
+    except Exception:
+        pass
+
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind == "video" and info["video_codec"] is None:
+            # Skip cover art / attached pictures
+            if stream.get("disposition", {}).get("attached_pic"):
+                continue
+            info["video_codec"] = stream.get("codec_name")
+            info["profile"] = stream.get("profile")
+            info["pix_fmt"] = stream.get("pix_fmt")
+            info["width"] = int(stream.get("width", 0) or 0)
+            info["height"] = int(stream.get("height", 0) or 0)
+            info["fps"] = _parse_rate(stream.get("avg_frame_rate")) or _parse_rate(stream.get("r_frame_rate"))
+            info["time_base"] = stream.get("time_base")
+            info["rotation"] = _stream_rotation(stream)
+            sar = stream.get("sample_aspect_ratio")
+            if sar and sar != "0:1":
+                info["sar"] = sar
+        elif kind == "audio" and not info["has_audio"]:
+            info["has_audio"] = True
+            info["audio_codec"] = stream.get("codec_name")
+            info["sample_rate"] = int(stream.get("sample_rate", 0) or 0)
+            info["channels"] = int(stream.get("channels", 0) or 0)
+
+    return info
+
+def probe_keyframes(path, start=None, end=None):
+    """
+    Lists video keyframe timestamps (seconds) using packet flags only (no decoding).
+    start/end narrow the scan with -read_intervals.
+    """
+    args = ["-select_streams", "v:0", "-show_entries", "packet=pts_time,flags"]
+    if start is not None or end is not None:
+        s = max(0.0, float(start or 0) - 1.0)
+        interval = f"{s:.3f}%"
+        if end is not None:
+            interval += f"{float(end) + 1.0:.3f}"
+        args.extend(["-read_intervals", interval])
+    args.append(path)
+
+    data = run_ffprobe(args)
+    keyframes = []
+    for pkt in data.get("packets", []):
+        if "K" not in pkt.get("flags", ""):
+            continue
+        try:
+            keyframes.append(float(pkt["pts_time"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return sorted(set(keyframes))
+
+def file_identity(path):
+    """
+    Cheap identity of a media file for cache keys: [size, mtime_ns].
+    """
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+# --- PERSISTENT PROBE INDEX ---
+# One index per media folder (uploads/, projects/<name>/source_media/), filled at upload
+# and read by the API, the renderers and the VideoDB adapter. An entry is only trusted
+# while the file's size + mtime still match, so replaced files are re-probed.
+# Indexes live under processing/ (media folders are served publicly), and ffprobe runs
+# outside the lock so one slow file never blocks the other probes of its folder.
+PROBE_INDEX_DIR = os.path.join("processing", "probe_index")
+
+def _index_path(media_dir):
+    digest = hashlib.sha1(media_dir.encode("utf-8")).hexdigest()[:16]
+    label = "".join(c for c in os.path.basename(media_dir) if c.isalnum() or c in ('_', '-'))
+    return os.path.join(PROBE_INDEX_DIR, f"{label}_{digest}.json")
+
+@contextmanager
+def _locked_probe_index(media_dir):
+    index_path = _index_path(media_dir)
+    os.makedirs(PROBE_INDEX_DIR, exist_ok=True)
+    with open(index_path + ".lock", "a") as lock_file:
+        if fcntl: fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            index = {}
+            if os.path.exists(index_path):
+                try:
+                    with open(index_path, "r") as f: index = json.load(f)
+                except Exception:
+                    index = {}
+            before = json.dumps(index, sort_keys=True)
+            yield index
+            if json.dumps(index, sort_keys=True) != before:
+                tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(index, f, indent=1)
+                os.replace(tmp_path, index_path)
+        finally:
+            if fcntl: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _valid_entry(index, name, size, mtime_ns):
+    entry = index.get(name)
+    return entry if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns else None
+
+def get_media_info(path):
+    """
+    probe_media() through the folder's probe index, plus size and mtime_ns.
+    Returns None for missing or unreadable files.
+    """
+    if not path or not os.path.isfile(path):
+        return None
+    size, mtime_ns = file_identity(path)
+    media_dir = os.path.dirname(os.path.abspath(path))
+    name = os.path.basename(path)
+
+    try:
+        with _locked_probe_index(media_dir) as index:
+            entry = _valid_entry(index, name, size, mtime_ns)
+            if entry:
+                return entry.get("info")
+    except OSError as e:
+        # Unwritable processing dir etc. -> still answer, just don't persist
+        print(f"⚠️ Probe index unavailable for {media_dir}: {e}")
+        info = probe_media(path)
+        return dict(info, size=size, mtime_ns=mtime_ns) if info else None
+
+    # Probe without holding the lock, then record it unless someone else was faster
+    info = probe_media(path)
+    if info is not None:
+        info = dict(info, size=size, mtime_ns=mtime_ns)
+    try:
+        with _locked_probe_index(media_dir) as index:
+            entry = _valid_entry(index, name, size, mtime_ns)
+            if entry:
+                return entry.get("info")
+            index[name] = {"size": size, "mtime_ns": mtime_ns, "info": info}
+    except OSError as e:
+        print(f"⚠️ Could not update probe index for {media_dir}: {e}")
+    return info
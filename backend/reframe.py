@@ -0,0 +1,174 @@
+import os
+import json
+
+try:
+    from backend.media_probe import file_identity
+    from backend import analysis_cache
+except ImportError:
+    from media_probe import file_identity
+    import analysis_cache
+
+# Portrait (9:16) Reframing
+# Center crop to 9:16 + lanczos scale to 1080x1920 as an ffmpeg filter stage, shared by
+# every engine (hybrid segments, MoviePy segment/pipe encodes, VideoDB download fix-up)
+# so vertical exports never go through per-frame Python resizes or an extra encode.
+# When a source has a subject track (see visual_analyzer.compute_crop_track), the crop
+# follows it with a keyframed x expression.
+# A track is a full decode of the source, so by default it is computed on the first portrait
+# export that uses the source (then served from the analysis cache), not for every analyzed
+# video. CROP_TRACKS: "export" (default), "analysis" (up front, saved as <project>_reframe.json)
+# or "off" (centered crops).
+
+PORTRAIT_SIZE = (1080, 1920)
+PORTRAIT_RATIO = 9 / 16
+CROP_TRACKS = os.getenv("CROP_TRACKS", "export").lower()
+
+def portrait_filters(src_w, src_h, out_size=PORTRAIT_SIZE, points=None):
+    """
+    ffmpeg filters that turn a src_w x src_h picture into out_size (9:16).
+    Same geometry as the MoviePy path: only too-wide sources are cropped (centered,
+    or following `points` = [(t, center_x 0..1)] in the filter's own timestamps).
+    [] when the source is already exactly out_size.
+    """
+    filters = []
+    w, h = int(src_w), int(src_h)
+    new_w = int(h * PORTRAIT_RATIO)
+    if w - new_w > 2:
+        # crop=w:h:x:y (a pixel or two of rounding is left to the scale)
+        if points:
+            filters.append(f"crop={new_w}:{h}:'{crop_x_expr(points, w, new_w)}':0")
+        else:
+            filters.append(f"crop={new_w}:{h}:{(w - new_w) // 2}:0")
+        w = new_w
+    if (w, h) != tuple(out_size):
+        filters.append(f"scale={out_size[0]}:{out_size[1]}:flags=lanczos")
+    if filters:
+        filters.append("setsar=1")
+    return filters
+
+def portrait_vf(src_w, src_h, out_size=PORTRAIT_SIZE, points=None):
+    return ",".join(portrait_filters(src_w, src_h, out_size, points))
+
+def crop_x_expr(points, src_w, crop_w):
+    """
+    Piecewise-linear crop x over t as a FLAT sum of gated terms (ffmpeg's expression
+    parser limits nesting, so no if(..., if(...)) chains).
+    """
+    max_x = src_w - crop_w
+    xs = [min(max_x, max(0.0, cx * src_w - crop_w / 2)) for _, cx in points]
+    ts = [t for t, _ in points]
+    if len(points) == 1 or max(xs) - min(xs) < 1:
+        return f"{xs[0]:.1f}"
+
+    terms = [f"lt(t,{ts[0]:.3f})*{xs[0]:.1f}"]
+    for i in range(len(points) - 1):
+        t0, t1, x0, x1 = ts[i], ts[i + 1], xs[i], xs[i + 1]
+        if t1 <= t0:
+            continue
+        if abs(x1 - x0) < 0.5:
+            value = f"{x0:.1f}"
+        else:
+            value = f"({x0:.1f}{(x1 - x0) / (t1 - t0):+.4f}*(t-{t0:.3f}))"
+        terms.append(f"gte(t,{t0:.3f})*lt(t,{t1:.3f})*{value}")
+    terms.append(f"gte(t,{ts[-1]:.3f})*{xs[-1]:.1f}")
+    return "+".join(terms)
+
+def _track_x(keyframes, t):
+    if t <= keyframes[0][0]:
+        return keyframes[0][1]
+    for (t0, x0), (t1, x1) in zip(keyframes, keyframes[1:]):
+        if t0 <= t <= t1:
+            return x0 if t1 == t0 else x0 + (x1 - x0) * (t - t0) / (t1 - t0)
+    return keyframes[-1][1]
+
+def track_points(track, start, end, offset=0.0):
+    """
+    The track between source times start..end as [(t + offset, center_x)].
+    offset maps source time to the filter's time (e.g. -start after setpts=PTS-STARTPTS).
+    """
+    keyframes = track["keyframes"]
+    points = [(start + offset, _track_x(keyframes, start))]
+    points.extend((t + offset, x) for t, x in keyframes if start < t < end)
+    points.append((end + offset, _track_x(keyframes, end)))
+    return points
+
+def analyze_crop_track(video_path):
+    """
+    Smoothed horizontal subject track for portrait reframing (see visual_analyzer.compute_crop_track).
+    Returns the track dict (tagged with the source file identity) or None.
+    """
+    import subprocess
+    import sys
+
+    key = analysis_cache.content_key(video_path)
+    track = analysis_cache.load_json(key, "reframe_track.json")
+    if track:
+        # Identity is per file copy, the track itself is per content
+        track["identity"] = file_identity(video_path)
+        return track
+
+    try:
+        result = subprocess.run(
+            [sys.executable, "backend/visual_analyzer.py", video_path, "--crop-track"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if result.returncode != 0:
+            print(f"Error computing crop track: {result.stderr}")
+            return None
+        track = json.loads(result.stdout.strip().split('\n')[-1])
+        if not track or not track.get("keyframes"):
+            return None
+        analysis_cache.store_json(key, "reframe_track.json", track)
+        track["identity"] = file_identity(video_path)
+        return track
+    except Exception as e:
+        print(f"Failed to compute crop track: {e}")
+        return None
+
+def load_crop_tracks(project_data, source_paths=(), projects_dir="projects"):
+    """
+    Crop tracks for this project, keyed by source file name: the <project>_reframe.json files
+    written by the analysis (project folder, and the base project for Shorts, e.g. "LateShow_Short1"),
+    plus a track computed now for every source in `source_paths` that has none (unless CROP_TRACKS is "off").
+    """
+    p_name = project_data.get('name', '')
+    safe_name = "".join(c for c in p_name if c.isalnum() or c in (' ', '_', '-')).strip()
+    dirs = [os.path.join(projects_dir, safe_name)]
+    if '_' in safe_name:
+        dirs.append(os.path.join(projects_dir, safe_name.split('_')[0]))
+
+    tracks = {}
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        for name in os.listdir(d):
+            if name.endswith("_reframe.json"):
+                try:
+                    with open(os.path.join(d, name)) as f:
+                        tracks.update(json.load(f))
+                except Exception as e:
+                    print(f"⚠️ Could not read reframe tracks {name}: {e}")
+
+    if CROP_TRACKS == "off":
+        return tracks
+    for path in source_paths:
+        if track_for(tracks, path) or not os.path.exists(path):
+            continue
+        print(f"📱 Computing crop track for {os.path.basename(path)}...")
+        track = analyze_crop_track(path)
+        if track:
+            tracks[os.path.basename(path)] = track
+    return tracks
+
+def track_for(tracks, source_path):
+    """
+    The crop track for this source file, or None (missing, or the file changed since analysis).
+    """
+    track = tracks.get(os.path.basename(source_path))
+    if not track or not track.get("keyframes"):
+        return None
+    if track.get("identity") and os.path.exists(source_path) and track["identity"] != file_identity(source_path):
+        return None
+    return track
@@ -33,6 +33,22 @@ from moviepy.audio.AudioClip import concatenate_audioclips
 
 
 from proglog import ProgressBarLogger
+
+try:
+    from backend.grading import compile_grading, parse_grading, grading_key, lut3d_filter, is_neutral_grading
+    from backend import segment_cache, encoder_profiles
+    from backend.workspace import JobWorkspace
+    from backend.ffmpeg_progress import run_ffmpeg
+    from backend import text_overlays, conform, reframe
+    from backend.media_probe import get_media_info
+except ImportError:
+    from grading import compile_grading, parse_grading, grading_key, lut3d_filter, is_neutral_grading
+    import segment_cache, encoder_profiles
+    from workspace import JobWorkspace
+    from ffmpeg_progress import run_ffmpeg
+    import text_overlays, conform, reframe
+    from media_probe import get_media_info
+
 EXPORT_DIR = "exports"
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
@@ -201,137 +217,272 @@ def create_motion_text(content, duration=2.0, style='pop', fontsize=70, color='w
         return None
 
 
+# --- STILL OVERLAY ASSETS ---
+# Text overlays don't change from frame to frame, so each one is rasterized ONCE to a
+# bbox-sized RGBA PNG; ffmpeg loops it, positions it and fades the alpha.
+OVERLAY_FADE_SECONDS = 0.5
 
-def apply_grading(clip, grading_settings):
+def prepare_overlay(overlay, vw, vh):
     """
-    Applies color grading using raw NumPy manipulation for guaranteed results.
+    Normalizes one overlay from the project JSON (font size as % of video height,
+    center position as 0-1 of the frame). Returns a dict, or None if invalid.
+    """
+    try:
+        content = overlay.get('content', '')
+        start = float(overlay.get('start', 0))
+        dur = float(overlay.get('duration', 2.0))
+        style = overlay.get('style', 'pop')
+        
+        # Properties
+        f_size_pct = overlay.get('fontSize', 4) 
+        t_color = overlay.get('textColor', 'white')
+        font_fam = overlay.get('fontFamily', 'Arial-Bold')
+        
+        # 1. Calculate Font Size (% of video HEIGHT)
+        try:
+            f_norm = float(f_size_pct) if f_size_pct else 0.05
+        except: f_norm = 0.05
+        if f_norm > 1.0: f_norm = f_norm / 100.0
+        
+        # De-normalize and Boost
+        calc_fontsize = int(vh * f_norm * 1.5)
+        if calc_fontsize < 60: calc_fontsize = 60
+        
+        # 2. Coordinates
+        p_x = overlay.get('positionX')
+        p_y = overlay.get('positionY')
+        try:
+            pos_x = float(p_x) if p_x is not None else 0.5
+            pos_y = float(p_y) if p_y is not None else 0.8
+        except: pos_x, pos_y = 0.5, 0.8
+        if pos_x > 1.0: pos_x = pos_x / 100.0
+        if pos_y > 1.0: pos_y = pos_y / 100.0
+        
+        # 3. Text Wrapping Width
+        safe_text_width = None
+        if len(content) > 20: safe_text_width = int(vw * 0.85)
+
+        return {
+            "content": content,
+            "start": start,
+            "duration": dur,
+            "style": style,
+            "fontsize": calc_fontsize,
+            "color": t_color,
+            "font": font_fam,
+            "max_width": safe_text_width,
+            "pos_x_norm": pos_x,
+            "pos_y_norm": pos_y
+        }
+    except Exception as e:
+        print(f"❌ Failed to prepare overlay {overlay}: {e}")
+        return None
+
+def rasterize_overlay(ov, png_path):
+    """
+    Renders the styled text (shadow + stroke + fill) once and saves it as an RGBA PNG.
+    Returns (width, height) or None if the text could not be created.
     """
     import numpy as np
+    from PIL import Image
+
+    txt_clip = create_motion_text(
+        ov['content'],
+        duration=ov['duration'],
+        style=ov['style'],
+        fontsize=ov['fontsize'],
+        color=ov['color'],
+        font=ov['font'],
+        max_width=ov['max_width']
+    )
+    if not txt_clip:
+        return None
+
+    rgb = txt_clip.get_frame(0).astype(np.uint8)
+    if txt_clip.mask is not None:
+        alpha = (np.clip(txt_clip.mask.get_frame(0), 0, 1) * 255).astype(np.uint8)
+    else:
+        alpha = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+    Image.fromarray(np.dstack([rgb, alpha]), "RGBA").save(png_path)
+    return rgb.shape[1], rgb.shape[0]
+
+def overlay_input_args(png_path, duration, fps=24):
+    # A still image looped for exactly the overlay duration
+    return ["-loop", "1", "-framerate", str(fps), "-t", f"{duration:.3f}", "-i", png_path]
+
+def overlay_filters(ov, input_idx, size, canvas, in_label, out_label):
+    """
+    filter_complex chains that place overlay input `input_idx` (size=(w, h)) on `in_label`.
+    """
+    tw, th = size
+    vw, vh = canvas
+    start = ov['start']
+    end = start + ov['duration']
+
+    # De-normalize Center -> Top-Left, clamped inside the frame
+    tl_x = int(ov['pos_x_norm'] * vw - (tw / 2))
+    tl_y = int(ov['pos_y_norm'] * vh - (th / 2))
+    tl_x = max(0, min(tl_x, vw - tw))
+    tl_y = max(0, min(tl_y, vh - th))
+
+    chain = ["format=rgba"]
+    if ov['style'] == 'fade':
+        fd = min(OVERLAY_FADE_SECONDS, ov['duration'] / 2)
+        chain.append(f"fade=t=in:st=0:d={fd:.3f}:alpha=1")
+        chain.append(f"fade=t=out:st={ov['duration'] - fd:.3f}:d={fd:.3f}:alpha=1")
+    # Shift the looped still to its start time on the timeline
+    chain.append(f"setpts=PTS+{start:.3f}/TB")
+
+    src_label = f"ovs{input_idx}"
+    return [
+        f"[{input_idx}:v]{','.join(chain)}[{src_label}]",
+        f"[{in_label}][{src_label}]overlay=x={tl_x}:y={tl_y}:enable='between(t,{start:.3f},{end:.3f})':eof_action=pass[{out_label}]",
+    ]
+
+def resolve_source_path(source_name, project_data, upload_dir="uploads"):
+    """
+    Finds the media file for an EDL source name (uploads, project folders, fallbacks).
+    Returns the best candidate path, which may not exist.
+    """
+    # Priority 0: Absolute Path (Provided by Manual Mode or Direct Link)
+    if os.path.isabs(source_name) and os.path.exists(source_name):
+        source_path = source_name
+    else:
+        # Priority 1: Uploads folder (Legacy)
+        source_path = os.path.join(upload_dir, os.path.basename(source_name))
+
+    # Priority 2: Project Specific Folder
+    if not os.path.exists(source_path):
+         p_name = project_data.get('name', '')
+         # Try exact name
+         safe_name = "".join(c for c in p_name if c.isalnum() or c in (' ', '_', '-')).strip()
+         project_media_path = os.path.join("projects", safe_name, "source_media", os.path.basename(source_name))
+
+         if os.path.exists(project_media_path):
+             source_path = project_media_path
+         else:
+             # Try heuristic for Shorts (e.g. "LateShow_Short1" -> "LateShow")
+             parts = safe_name.split('_')
+             if len(parts) > 1:
+                 base_name = parts[0]
+                 heuristic_path = os.path.join("projects", base_name, "source_media", os.path.basename(source_name))
+                 if os.path.exists(heuristic_path):
+                     source_path = heuristic_path
+
+    # Priority 3: Absolute Fallback (for testing)
+    if not os.path.exists(source_path):
+        abs_fallback = os.path.join("/Users/saieshwarrampelli/Downloads/GravityEdits/source_media", os.path.basename(source_name))
+        if os.path.exists(abs_fallback):
+            source_path = abs_fallback
+
+        # Heuristic: If source_name has no extension, try adding .mp4 or .mov
+        if not os.path.exists(source_path) and '.' not in source_name:
+            for ext in ['.mp4', '.mov', '.mkv']:
+                test_path = source_path + ext
+                if os.path.exists(test_path):
+                    source_path = test_path
+                    break
+
+    # Priority 4: Deep Search in ALL valid project folders
+    # (Fix for Shorts derived from other projects where path refs might be stale)
+    if not os.path.exists(source_path):
+         projects_root = "projects"
+         if os.path.exists(projects_root):
+             for p_dir in os.listdir(projects_root):
+                 if p_dir.startswith('.'): continue
+                 possible_path = os.path.join(projects_root, p_dir, "source_media", os.path.basename(source_name))
+                 if os.path.exists(possible_path):
+                     source_path = possible_path
+                     print(f"   ✅ Found source in sibling project: {source_path}")
+                     break
+
+    return source_path
+
+
+def is_clip_kept(clip_data):
+    """
+    EDL 'keep' flag (boolean or "true"/"false" string from the XML).
+    """
+    keep_val = clip_data.get('keep', True)
+    if isinstance(keep_val, str) and keep_val.lower() == 'false':
+         keep_val = False
+    return bool(keep_val)
+
 
+def clip_times(clip_data, source_duration):
+    """
+    (start, end) of an EDL clip in source seconds, or None if it can't be cut.
+    Shared by every engine so they all cut the same timeline:
+    end 0/missing -> start + duration, else the end of the source; never past the source;
+    start >= end is treated as drift and extended to the end of the source.
+    """
+    start = float(clip_data.get('start', 0))
+    end_val = clip_data.get('end')
+
+    # If end is 0 or missing, use duration or video end
+    if not end_val or float(end_val) == 0:
+        duration = float(clip_data.get('duration', 0))
+        end_val = start + duration if duration > 0 else source_duration
+    end = float(end_val)
+
+    # Safety check: ensure we don't cut past the end of video
+    if source_duration and end > source_duration:
+        end = source_duration
+    if start >= end:
+        print(f"⚠️ Invalid trim for {clip_data.get('id')}: start {start} >= end {end}")
+        # Try to fix if it's just a small drift, otherwise skip
+        if source_duration and start < source_duration:
+            end = source_duration
+        else:
+            return None
+    return start, end
+
+
+def merge_grading(global_grading, global_filter, clip_data):
+    """
+    Merges global + clip color grading into the settings dict used by apply_grading.
+    """
+    clip_grading = clip_data.get('colorGrading', {})
+    if not isinstance(clip_grading, dict): clip_grading = {}
+
+    # Start with global
+    merged_settings = dict(global_grading) if isinstance(global_grading, dict) else {}
+    # Override with clip specific (if non-zero/default)
+    # Actually, usually users want clip grading to ADD to global or REPLACE?
+    # For simplicity, we'll let clip-specific values override global provided they exist.
+    # Or better: if clip has specific grading, use it.
+    if clip_grading:
+        merged_settings.update(clip_grading)
+
+    # Pass the named filter too
+    merged_settings['filterSuggestion'] = global_filter
+    return merged_settings
+
+
+def apply_grading(clip, grading_settings):
+    """
+    Applies color grading through lookup tables compiled once per clip (see grading.py).
+    """
     # 1. Parse Settings
-    try:
-        temp = float(grading_settings.get('temperature', 5600))
-        exp = float(grading_settings.get('exposure', 0.0))
-        con = float(grading_settings.get('contrast', 0))
-        sat = float(grading_settings.get('saturation', 100))
-        filter_name = grading_settings.get('filterSuggestion', 'None')
-    except:
+    parsed = parse_grading(grading_settings)
+    if parsed is None:
         return clip
+    temp, exp, con, sat, filter_name = parsed
 
     # Check if we need to do anything (optimization)
-    if temp == 5600 and exp == 0 and con == 0 and sat == 100 and filter_name == 'None':
+    if is_neutral_grading(grading_settings):
         return clip
 
-    print(f"🎨 NumPy Grading -> T:{temp} E:{exp} C:{con} S:{sat} F:{filter_name}", flush=True)
+    print(f"🎨 LUT Grading -> T:{temp} E:{exp} C:{con} S:{sat} F:{filter_name}", flush=True)
+
+    # 2. Compile once, then every frame is just table lookups in uint8
+    grade = compile_grading(grading_settings)
+    if grade is None:
+        return clip
 
     def filter_frame(image):
         # Image is a numpy array [H, W, 3] uint8
-        img = image.astype(float)
-
-        # 1. Temperature (Simplified)
-        if temp != 5600:
-            val = (temp - 5600) / 5000.0 # -0.8 to +0.8
-            r_gain = 1 + (val * 0.2)
-            b_gain = 1 - (val * 0.2)
-            img[:, :, 0] *= r_gain
-            img[:, :, 2] *= b_gain
-
-        # 2. Exposure
-        if exp != 0:
-            factor = 2 ** exp
-            img *= factor
-
-        # 3. Contrast
-        if con != 0:
-            factor = 1 + (con / 100.0)
-            # Pivot around 128 (midpoint)
-            img = (img - 128.0) * factor + 128.0
-
-        # 4. Saturation (Simple RGB separation)
-        if sat != 100:
-             factor = sat / 100.0
-             # Gray is approx magnitude of RGB
-             # simple avg for speed 
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray + (img - gray) * factor
-
-        # 5. Simple Filter Presets (Overwrites)
-        # 5. Advanced Filter Presets
-        if filter_name == "Cinematic":
-             # High contrast, slight desaturation, moody
-             img = (img - 128.0) * 1.2 + 128.0
-             img *= 0.95
-        
-        elif filter_name == "Teal & Orange":
-             # Shadow -> Teal, Highlight -> Orange
-             # Simplified Channel Mixer
-             r = img[:, :, 0]
-             g = img[:, :, 1]
-             b = img[:, :, 2]
-             
-             # Boost Red in highlights (Orange)
-             r = np.where(r > 128, r * 1.2, r * 0.9)
-             # Boost Blue in shadows (Teal)
-             b = np.where(b < 128, b * 1.2, b * 0.9)
-             
-             img[:, :, 0] = np.clip(r, 0, 255)
-             img[:, :, 2] = np.clip(b, 0, 255)
-             
-             # Contrast bump
-             img = (img - 128.0) * 1.1 + 128.0
-
-        elif filter_name == "Vintage":
-             # Sepia-ish
-             # R * 1.1, B * 0.9 + Lift Blacks
-             img[:, :, 0] *= 1.1 # R
-             img[:, :, 2] *= 0.85 # B
-             img = (img - 128.0) * 0.9 + 128.0 # Lower contrast
-             img += 10 # Lift blacks
-
-        elif filter_name == "Noir":
-             # B&W + High Contrast
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray
-             img = (img - 128.0) * 1.5 + 128.0
-        
-        elif filter_name == "Vivid":
-             # Boost sat strongly
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray + (img - gray) * 1.5
-        
-        elif filter_name == "Vivid Warm":
-             # Boost sat + Warm temp
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray + (img - gray) * 1.3
-             img[:, :, 0] *= 1.1 # R up
-             img[:, :, 2] *= 0.9 # B down
-
-        elif filter_name == "Vivid Cool":
-             # Boost sat + Cool temp
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray + (img - gray) * 1.3
-             img[:, :, 0] *= 0.9 # R down
-             img[:, :, 2] *= 1.1 # B up
-
-        elif filter_name == "Dramatic":
-             # Desaturated + High Contrast
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray + (img - gray) * 0.8 # Desaturate
-             img = (img - 128.0) * 1.4 + 128.0 # High Contrast
-
-        elif filter_name == "Mono" or filter_name == "B&W":
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray 
-             
-        elif filter_name == "Silvertone":
-             # B&W + Brightness push + Contrast
-             gray = np.mean(img, axis=2, keepdims=True)
-             img = gray
-             img = (img - 128.0) * 1.2 + 128.0
-             img *= 1.1 # Bright
-
-        # Clip and cast back
-        return np.clip(img, 0, 255).astype(np.uint8)
+        return grade(image)
 
     # Use fl_image if available (standard in MoviePy)
     # If using MoviePy 2.x, it might be renamed, but fl_image usually persists.
@@ -344,19 +495,226 @@ def apply_grading(clip, grading_settings):
 import time
 
 import traceback
+from collections import OrderedDict
+
+class SourceReaderCache:
+    """
+    Per-job cache of VideoFileClip readers.
+    Each unique source is opened (and probed) once and every cut is a subclip of it.
+    Readers with no subclips in use go into an LRU and are closed past max_idle.
+    """
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self.readers = {}          # path -> VideoFileClip
+        self.refs = {}             # path -> number of subclips in use
+        self.idle = OrderedDict()  # paths with refs == 0, oldest first
+
+    def acquire(self, path):
+        if path in self.readers:
+            self.idle.pop(path, None)
+        else:
+            print(f"   📂 Opening source reader: {os.path.basename(path)}")
+            self.readers[path] = VideoFileClip(path)
+            self.refs[path] = 0
+        self.refs[path] += 1
+        return self.readers[path]
+
+    def release(self, path):
+        if path not in self.refs:
+            return
+        self.refs[path] -= 1
+        if self.refs[path] <= 0:
+            self.refs[path] = 0
+            self.idle[path] = True
+            self.idle.move_to_end(path)
+            while len(self.idle) > self.max_idle:
+                old_path, _ = self.idle.popitem(last=False)
+                self._close(old_path)
+
+    def _close(self, path):
+        reader = self.readers.pop(path, None)
+        self.refs.pop(path, None)
+        self.idle.pop(path, None)
+        if reader is not None:
+            try: reader.close()
+            except Exception as e: print(f"⚠️ Failed to close reader {path}: {e}")
+
+    def close_all(self):
+        for path in list(self.readers.keys()):
+            self._close(path)
+
+def _process_cut(cut_clip, grading_settings, render_mode):
+    """
+    Per-clip processing after the trim: color grading + portrait crop/resize.
+    """
+    if grading_settings:
+        cut_clip = apply_grading(cut_clip, grading_settings)
+
+    # Heuristic: If name implies short and no mode set? 
+    # Better to rely on frontend flag we will add.
+
+    if render_mode == 'portrait':
+         w, h = cut_clip.size
+         target_ratio = 9/16
+         
+         # 1. Center Crop
+         # Calculate target width for current height to match 9:16
+         new_w = int(h * target_ratio)
+         
+         if new_w < w:
+             # Landscape or Square -> Crop width
+             center_x = w / 2
+             x1 = center_x - (new_w / 2)
+             cut_clip = cut_clip.cropped(x1=x1, width=new_w, height=h)
+             
+         # 2. Resize to 1080x1920 (Standard HD Shorts)
+         # Check if resize is needed to avoid unnecessary processing
+         if cut_clip.size != (1080, 1920):
+            cut_clip = cut_clip.resized((1080, 1920))
+
+    return cut_clip
+
+# --- CACHED SEGMENT RENDERING ---
+# Every kept cut is rendered (cut + grade + crop) as its own segment in processing/segments,
+# keyed by its effective parameters. Long cuts are split into frame-aligned chunks so they
+# still spread over cores. Unchanged clips are reused and the base layer is a lossless concat.
+# Timeline frame rate when the encoder profile keeps the source rate but none is known
+RENDER_FPS = 24
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or (os.cpu_count() or 1)
+SEGMENT_CHUNK_SECONDS = float(os.getenv("SEGMENT_CHUNK_SECONDS", "15"))
+
+def plan_clip_chunks(pieces, fps=RENDER_FPS):
+    """
+    Splits each kept cut ({path, start, end, grading}) into chunks of at most
+    SEGMENT_CHUNK_SECONDS on the frame grid of the cut itself, so chunk boundaries
+    (and cache keys) don't move when other clips change.
+    """
+    chunk_frames = max(1, int(round(SEGMENT_CHUNK_SECONDS * fps)))
+    chunks = []
+    for p in pieces:
+        n_frames = int(round((p['end'] - p['start']) * fps))
+        for f0 in range(0, n_frames, chunk_frames):
+            f1 = min(n_frames, f0 + chunk_frames)
+            chunks.append(dict(p, start=p['start'] + f0 / fps, end=p['start'] + f1 / fps, frames=f1 - f0))
+    return chunks
+
+def _render_segment(task):
+    """
+    Renders one chunk of a cut (video only). Runs in the process pool or inline.
+    """
+    piece, out_path, canvas_size, render_mode, fps, profile, reframe_vf = task
+    # reframe_vf: ffmpeg portrait stage run by the segment encoder (see reframe.py)
+    src = VideoFileClip(piece['path'])
+    try:
+        end = min(piece['end'], src.duration)
+        seg = _process_cut(src.subclipped(piece['start'], end), piece['grading'], render_mode)
+        if tuple(seg.size) != tuple(canvas_size):
+            # Same canvas as the full 'compose' timeline so the segments concat cleanly
+            seg = CompositeVideoClip([seg.with_position('center')], size=tuple(canvas_size))
+
+        # Exactly `frames` frames (t = k/fps) so joined segments stay in sync with the audio
+        seg = seg.with_duration((piece['frames'] + 0.5) / fps)
+        seg.write_videofile(
+            out_path,
+            fps=fps,
+            preset=profile["preset"],
+            codec="libx264",
+            audio=False,
+            threads=1, # Parallelism comes from the process pool
+            ffmpeg_params=encoder_profiles.x264_params(profile) + (["-vf", reframe_vf] if reframe_vf else []),
+            logger=None
+        )
+        return out_path
+    finally:
+        src.close()
+
+def plan_segments(pieces, canvas, render_mode, profile, fps=RENDER_FPS, reframe_vf=None, reframe_for=None):
+    """
+    Returns (seg_paths, missing): the cached segment path for every chunk of the
+    timeline in order, and {key: task} for the chunks that still have to be rendered.
+    reframe_vf: ffmpeg portrait stage applied by the segment encoder (see reframe.py)
+    reframe_for: optional chunk -> crop track points, for subject-following crops
+    """
+    seg_paths = []
+    missing = {}
+    chunks = plan_clip_chunks(pieces, fps)
+    for c in chunks:
+        vf = reframe_vf
+        points = reframe_for(c) if reframe_for else None
+        if points:
+            vf = reframe.portrait_vf(canvas[0], canvas[1], points=points)
+        key = segment_cache.segment_key("moviepy", c['path'], c['start'], c['end'], {
+            "grading": grading_key(c['grading']) if c['grading'] else None,
+            "render_mode": render_mode,
+            "reframe": vf or None,
+            "canvas": tuple(canvas),
+            "fps": fps,
+            "frames": c['frames'],
+            "encoder": encoder_profiles.cache_params(profile),
+        })
+        cached = segment_cache.lookup(key)
+        if cached:
+            seg_paths.append(cached)
+            continue
+        seg_paths.append(segment_cache.segment_path(key))
+        if key not in missing:
+            missing[key] = (c, segment_cache.temp_segment_path(key), tuple(canvas), render_mode, fps, profile, vf)
+
+    print(f"🧩 Segments: {len(chunks) - len(missing)} cached, {len(missing)} to render")
+    return seg_paths, missing
+
+def render_missing_segments(missing, progress_callback=None):
+    """
+    Renders the uncached chunks (process pool when there is more than one) into the cache.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    def report(done):
+        if progress_callback:
+            progress_callback({
+                "status": "rendering",
+                "progress": 20 + (done / max(1, len(missing))) * 60,
+                "message": f"Rendered segment {done}/{len(missing)}"
+            })
 
-def render_project(project_data, progress_callback=None):
+    try:
+        if len(missing) > 1 and RENDER_WORKERS > 1:
+            print(f"⚡ Parallel render: {len(missing)} segments on {RENDER_WORKERS} cores")
+            # spawn: don't fork a process that holds open ffmpeg reader pipes
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(RENDER_WORKERS, len(missing)), mp_context=ctx) as pool:
+                futures = {pool.submit(_render_segment, task): key for key, task in missing.items()}
+                for done, fut in enumerate(as_completed(futures), 1):
+                    segment_cache.commit(fut.result(), futures[fut]) # Re-raises worker errors
+                    report(done)
+        else:
+            for done, (key, task) in enumerate(missing.items(), 1):
+                segment_cache.commit(_render_segment(task), key)
+                report(done)
+    finally:
+        for task in missing.values():
+            if os.path.exists(task[1]): os.remove(task[1])
+
+def render_project(project_data, progress_callback=None, profile=None):
     """
     1. Reads the instructions from React
     2. Cuts the video
     3. Stitches it together
     4. Exports to MP4
+    profile: encoder profile name (see encoder_profiles.py)
     """
-    print("🎬 Starting Render Job...")
+    profile = encoder_profiles.get_profile(profile)
+    # None = keep the source frame rate (decided from the probed sources below)
+    fps = profile["fps"]
+    print(f"🎬 Starting Render Job... (profile: {profile['name']})")
     if progress_callback:
         progress_callback({"status": "processing", "progress": 0, "message": "Starting Render Job..."})
 
     final_clips = []
+    timeline_pieces = []
+    # One reader per unique source (not per EDL entry)
+    readers = SourceReaderCache()
     
     # We might need to adjust paths if running from root
     # "uploads" folder is likely in root.
@@ -377,15 +735,49 @@ def render_project(project_data, progress_callback=None):
         total_clips = len(clips_list)
         processed_count = 0
 
+        # If every kept clip has the same grade and we run the ffmpeg overlay pass anyway,
+        # grade there with lut3d (native threads) instead of per-frame in Python.
+        ffmpeg_grade = None
+        kept_gradings = [merge_grading(global_grading, global_filter, c) for c in clips_list if is_clip_kept(c)]
+        if project_data.get('overlays') and kept_gradings:
+            # Neutral = no grading ops (e.g. 'Natural Grade'), so lut3d_filter would be ''
+            if len({grading_key(g) for g in kept_gradings}) == 1 and not is_neutral_grading(kept_gradings[0]):
+                ffmpeg_grade = kept_gradings[0]
+                print("🎨 Uniform grade -> applying with ffmpeg lut3d in the overlay pass")
+
+        kept_sources = {resolve_source_path(c['source'], project_data, UPLOAD_DIR) for c in clips_list if is_clip_kept(c)}
+        infos = [i for i in (get_media_info(p) for p in kept_sources if os.path.exists(p)) if i]
+        if fps is None:
+            # Keep the (most common) source frame rate instead of resampling everything
+            _, fps = conform.timeline_format(infos, None, default_fps=RENDER_FPS)
+            print(f"🎞️ Timeline frame rate: {fps}fps (source)")
+
+        # Portrait reframing as an ffmpeg stage (crop + lanczos) instead of per-frame Python
+        # resizes. Needs one source geometry; mixed sizes keep the MoviePy crop/resize.
+        render_mode = project_data.get('renderMode', 'landscape')
+        reframe_vf = None
+        reframe_for = None
+        clip_render_mode = render_mode
+        geometries = {conform.source_geometry(i) for i in infos}
+        if render_mode == 'portrait' and len(geometries) == 1 and all(next(iter(geometries))):
+            geometry = next(iter(geometries))
+            reframe_vf = reframe.portrait_vf(*geometry)
+            clip_render_mode = 'landscape'
+            print(f"📱 Portrait reframe in ffmpeg: {reframe_vf or 'source is already 1080x1920'}")
+
+            # Subject tracks (computed on the first portrait export): the crop follows the speaker
+            tracks = reframe.load_crop_tracks(project_data, sorted(kept_sources))
+            def reframe_for(piece):
+                # Segments start at t=0, so track times shift by -start
+                track = reframe.track_for(tracks, piece['path'])
+                if not track:
+                    return None
+                return reframe.track_points(track, piece['start'], piece['end'], -piece['start'])
+
         for i, clip_data in enumerate(clips_list):
             # SKIP clips the user marked as 'Red/Remove'
-            # Handle boolean or string "false"
-            keep_val = clip_data.get('keep', True)
-            if isinstance(keep_val, str) and keep_val.lower() == 'false':
-                 keep_val = False
-            
-            if not keep_val:
-                print(f"✂️ Skipping clip {clip_data.get('id')} (keep={keep_val})")
+            if not is_clip_kept(clip_data):
+                print(f"✂️ Skipping clip {clip_data.get('id')} (keep={clip_data.get('keep')})")
                 continue
                 
             source_name = clip_data['source']
@@ -396,143 +788,53 @@ def render_project(project_data, progress_callback=None):
                     "message": f"Processing clip {i+1}/{total_clips}"
                 })
             
+            acquired_path = None
             try:
                 # A. Resolve Source Path
-
-                # Priority 0: Absolute Path (Provided by Manual Mode or Direct Link)
-                if os.path.isabs(source_name) and os.path.exists(source_name):
-                    source_path = source_name
-                else:
-                    # Priority 1: Uploads folder (Legacy)
-                    source_path = os.path.join(UPLOAD_DIR, os.path.basename(source_name))
-                
-                # Priority 2: Project Specific Folder
-                if not os.path.exists(source_path):
-                     p_name = project_data.get('name', '')
-                     # Try exact name
-                     safe_name = "".join(c for c in p_name if c.isalnum() or c in (' ', '_', '-')).strip()
-                     project_media_path = os.path.join("projects", safe_name, "source_media", os.path.basename(source_name))
-                     
-                     if os.path.exists(project_media_path):
-                         source_path = project_media_path
-                     else:
-                         # Try heuristic for Shorts (e.g. "LateShow_Short1" -> "LateShow")
-                         parts = safe_name.split('_')
-                         if len(parts) > 1:
-                             base_name = parts[0]
-                             heuristic_path = os.path.join("projects", base_name, "source_media", os.path.basename(source_name))
-                             if os.path.exists(heuristic_path):
-                                 source_path = heuristic_path
-                
-                # Priority 3: Absolute Fallback (for testing)
-                if not os.path.exists(source_path):
-                    abs_fallback = os.path.join("/Users/saieshwarrampelli/Downloads/GravityEdits/source_media", os.path.basename(source_name))
-                    if os.path.exists(abs_fallback):
-                        source_path = abs_fallback
-                    
-                    # Heuristic: If source_name has no extension, try adding .mp4 or .mov
-                    if not os.path.exists(source_path) and '.' not in source_name:
-                        for ext in ['.mp4', '.mov', '.mkv']:
-                            test_path = source_path + ext
-                            if os.path.exists(test_path):
-                                source_path = test_path
-                                break
-
-                # Priority 4: Deep Search in ALL valid project folders
-                # (Fix for Shorts derived from other projects where path refs might be stale)
-                if not os.path.exists(source_path):
-                     projects_root = "projects"
-                     if os.path.exists(projects_root):
-                         for p_dir in os.listdir(projects_root):
-                             if p_dir.startswith('.'): continue
-                             possible_path = os.path.join(projects_root, p_dir, "source_media", os.path.basename(source_name))
-                             if os.path.exists(possible_path):
-                                 source_path = possible_path
-                                 print(f"   ✅ Found source in sibling project: {source_path}")
-                                 break
+                source_path = resolve_source_path(source_name, project_data, UPLOAD_DIR)
 
                 if not os.path.exists(source_path):
                      print(f"⚠️ Source file missing: {source_path}")
                      continue
 
-                # A. Load Video
-                original_video = VideoFileClip(source_path)
+                # A. Load Video (shared reader, cut below is a cheap subclip)
+                original_video = readers.acquire(source_path)
+                acquired_path = source_path
                 
                 # B. Trim (The "Scissors" Logic)
                 # We use the start/end times we saved earlier
-                start = float(clip_data.get('start', 0))
-                end_val = clip_data.get('end')
-                
-                # If end is 0 or missing, use duration or video end
-                if not end_val or float(end_val) == 0:
-                     duration = float(clip_data.get('duration', 0))
-                     if duration > 0:
-                         end_val = start + duration
-                     else:
-                         end_val = original_video.duration
-
-                end = float(end_val)
-                
-                # Safety check: ensure we don't cut past the end of video
-                if end > original_video.duration: end = original_video.duration
-                if start >= end:
-                     print(f"⚠️ Invalid trim for {clip_data['id']}: start {start} >= end {end}")
-                     # Try to fix if it's just a small drift, otherwise skip
-                     if start < original_video.duration:
-                         end = original_video.duration
-                     else:
-                         continue
+                times = clip_times(clip_data, original_video.duration)
+                if times is None:
+                     readers.release(source_path)
+                     continue
+                start, end = times
+
+                # Snap the cut to whole frames so per-clip segments line up with the audio
+                n_frames = int(round((end - start) * fps))
+                if n_frames < 1:
+                     print(f"⚠️ Clip {clip_data.get('id')} is shorter than one frame. Skipping.")
+                     readers.release(source_path)
+                     continue
+                end = min(start + n_frames / fps, original_video.duration)
                 
                 cut_clip = original_video.subclipped(start, end)
                 
                 # C. Apply Color Filter / Grading
                 # Merge Global + Clip Grading
-                clip_grading = clip_data.get('colorGrading', {})
-                if not isinstance(clip_grading, dict): clip_grading = {}
-                
-                # Start with global
-                merged_settings = global_grading.copy()
-                # Override with clip specific (if non-zero/default)
-                # Actually, usually users want clip grading to ADD to global or REPLACE?
-                # For simplicity, we'll let clip-specific values override global provided they exist.
-                # Or better: if clip has specific grading, use it.
-                if clip_grading:
-                    merged_settings.update(clip_grading)
-                
-                # Pass the named filter too
-                merged_settings['filterSuggestion'] = global_filter
-                
-                cut_clip = apply_grading(cut_clip, merged_settings)
+                merged_settings = merge_grading(global_grading, global_filter, clip_data)
+                clip_grading = merged_settings if ffmpeg_grade is None else None
 
                 # D. Aspect Ratio Transformation (Shorts/Portrait)
-                # Check for renderMode explicitly
-                render_mode = project_data.get('renderMode', 'landscape')
-                
-                # Heuristic: If name implies short and no mode set? 
-                # Better to rely on frontend flag we will add.
-
-                if render_mode == 'portrait':
-                     w, h = cut_clip.size
-                     target_ratio = 9/16
-                     
-                     # 1. Center Crop
-                     # Calculate target width for current height to match 9:16
-                     new_w = int(h * target_ratio)
-                     
-                     if new_w < w:
-                         # Landscape or Square -> Crop width
-                         center_x = w / 2
-                         x1 = center_x - (new_w / 2)
-                         cut_clip = cut_clip.cropped(x1=x1, width=new_w, height=h)
-                         
-                     # 2. Resize to 1080x1920 (Standard HD Shorts)
-                     # Check if resize is needed to avoid unnecessary processing
-                     if cut_clip.size != (1080, 1920):
-                        cut_clip = cut_clip.resized((1080, 1920))
+                # (skipped here when the reframe runs as an ffmpeg stage)
+                cut_clip = _process_cut(cut_clip, clip_grading, clip_render_mode)
 
+                # Remember the exact cut for the segment cache
+                timeline_pieces.append({"path": source_path, "start": start, "end": end, "grading": clip_grading})
                 final_clips.append(cut_clip)
+                acquired_path = None
                 
             except Exception as e:
+                if acquired_path: readers.release(acquired_path)
                 print(f"⚠️ Error processing clip {clip_data.get('id')}: {e}")
                 print(traceback.format_exc()) # CRITICAL: See exactly why it failed
 
@@ -547,7 +849,15 @@ def render_project(project_data, progress_callback=None):
         if progress_callback:
                 progress_callback({"status": "processing", "progress": 10, "message": "Stitching clips..."})
         
-        final_video = concatenate_videoclips(final_clips, method="compose")
+        # 'chain' just plays the clips back to back; 'compose' pastes every frame onto a
+        # canvas and is only needed when the cuts differ in size
+        if len({tuple(c.size) for c in final_clips}) == 1:
+            final_video = concatenate_videoclips(final_clips, method="chain")
+        else:
+            print("📐 Mixed clip sizes -> compositing onto a common canvas")
+            final_video = concatenate_videoclips(final_clips, method="compose")
+        # Output frame size (the MoviePy timeline is still source-sized when ffmpeg reframes)
+        canvas = reframe.PORTRAIT_SIZE if reframe_vf else tuple(final_video.size)
 
         # --- HYBRID PIPELINE: PREPARE OVERLAYS ---
         overlays_to_render = []
@@ -557,60 +867,12 @@ def render_project(project_data, progress_callback=None):
             if progress_callback: progress_callback({"status": "processing", "progress": 12, "message": "Preparing Overlay Data..."})
             print(f"✨ Preparing {len(overlays_data)} text overlays for Hybrid Render...")
             
-            vw, vh = final_video.size
+            vw, vh = canvas
             
             for overlay in overlays_data:
-                try:
-                    content = overlay.get('content', '')
-                    start = float(overlay.get('start', 0))
-                    dur = float(overlay.get('duration', 2.0))
-                    style = overlay.get('style', 'pop')
-                    
-                    # Properties
-                    f_size_pct = overlay.get('fontSize', 4) 
-                    t_color = overlay.get('textColor', 'white')
-                    font_fam = overlay.get('fontFamily', 'Arial-Bold')
-                    
-                    # 1. Calculate Font Size (% of video HEIGHT)
-                    try:
-                        f_norm = float(f_size_pct) if f_size_pct else 0.05
-                    except: f_norm = 0.05
-                    if f_norm > 1.0: f_norm = f_norm / 100.0
-                    
-                    # De-normalize and Boost
-                    calc_fontsize = int(vh * f_norm * 1.5)
-                    if calc_fontsize < 60: calc_fontsize = 60
-                    
-                    # 2. Coordinates
-                    p_x = overlay.get('positionX')
-                    p_y = overlay.get('positionY')
-                    try:
-                        pos_x = float(p_x) if p_x is not None else 0.5
-                        pos_y = float(p_y) if p_y is not None else 0.8
-                    except: pos_x, pos_y = 0.5, 0.8
-                    if pos_x > 1.0: pos_x = pos_x / 100.0
-                    if pos_y > 1.0: pos_y = pos_y / 100.0
-                    
-                    # 3. Text Wrapping Width
-                    safe_text_width = None
-                    if len(content) > 20: safe_text_width = int(vw * 0.85)
-
-                    # Store for Asset Generation Phase
-                    overlays_to_render.append({
-                        "content": content,
-                        "start": start,
-                        "duration": dur,
-                        "style": style,
-                        "fontsize": calc_fontsize,
-                        "color": t_color,
-                        "font": font_fam,
-                        "max_width": safe_text_width,
-                        "pos_x_norm": pos_x,
-                        "pos_y_norm": pos_y
-                    })
-
-                except Exception as e:
-                    print(f"❌ Failed to prepare overlay {overlay}: {e}")
+                ov = prepare_overlay(overlay, vw, vh)
+                if ov:
+                    overlays_to_render.append(ov)
 
         # G. Apply Audio Mixing (Background Music & Secondary Tracks)
         audio_layers = []
@@ -691,147 +953,107 @@ def render_project(project_data, progress_callback=None):
              final_video = final_video.with_audio(final_audio)
 
         # --- I. HYBRID EXPORT ---
+        # Missing per-clip segments are rendered into the cache first (process pool), then:
+        #   - no overlays: cached segments + audio are stream copied into the output
+        #   - overlays / uniform grade: the segments are decoded straight into one ffmpeg pass
+        #     (with a uniform grade the segments stay ungraded, lut3d grades them there)
+        # so a re-export only renders the clips that changed.
         timestamp = int(time.time())
         output_filename = f"{project_data.get('name', 'video')}_final_{timestamp}.mp4"
         output_path = os.path.join(EXPORT_DIR, output_filename)
         
-        # Temp paths
-        temp_base_path = os.path.join(EXPORT_DIR, f"temp_base_{timestamp}.mp4")
+        # Temp paths (job-scoped, so concurrent renders never collide)
+        ws = JobWorkspace("render")
+        audio_path = ws.path("audio.m4a")
+        list_path = ws.path("segments.txt")
         temp_assets = []
 
         try:
-            # 1. Render Base Video (Low Memory safe)
-            if progress_callback: progress_callback({"status": "rendering", "progress": 20, "message": "Rendering Base Video Layer..."})
-            print("💾 Rendering Base Video Layer...")
-            final_video.write_videofile(
-                temp_base_path, 
-                fps=24, 
-                preset="ultrafast", 
-                codec="libx264", 
-                audio_codec="aac", 
-                threads=1,
-                logger=None # Silence MoviePy to keep logs clean
-            )
-
-            # 2. Render Overlay Assets
-            if progress_callback: progress_callback({"status": "rendering", "progress": 50, "message": "Generating Text Assets..."})
+            # 1. Render Overlay Assets
+            if progress_callback: progress_callback({"status": "rendering", "progress": 15, "message": "Generating Text Assets..."})
             print("🎨 Generating Text Assets (Hybrid Mode)...")
             
-            ffmpeg_inputs = ['-i', temp_base_path]
+            overlay_inputs = []
             filter_complex = []
             
-            # Map [0:v] is base
+            # [vbase] is input 0 after the base stage (reframe/grade, added below)
             # Overlays start at index 1
+            current_label = "vbase"
             
+            overlay_backend = text_overlays.choose_backend(project_data, len(overlays_to_render))
+            if overlay_backend == "drawtext":
+                # Whole overlay track as drawtext filters: no assets, no extra inputs
+                text_chain = text_overlays.build_drawtext_chain(overlays_to_render, (vw, vh), ws, current_label, "vtxt")
+                if text_chain:
+                    filter_complex.extend(text_chain)
+                    current_label = "vtxt"
+                overlays_to_render = []
+
             for i, ov in enumerate(overlays_to_render):
                 # asset path
-                asset_path = os.path.join(EXPORT_DIR, f"temp_ov_{timestamp}_{i}.mov")
-                
-                # Generate Clip
-                txt_clip = create_motion_text(
-                    ov['content'],
-                    duration=ov['duration'],
-                    style=ov['style'],
-                    fontsize=ov['fontsize'],
-                    color=ov['color'],
-                    font=ov['font'],
-                    max_width=ov['max_width']
-                )
-                
-                if txt_clip:
-                    # Write Transparent Video Asset
-                    txt_clip.write_videofile(
-                        asset_path, 
-                        fps=24, 
-                        codec="png", # Supports Alpha
-                        audio=False, 
-                        threads=2,
-                        logger=None
-                    )
-                    temp_assets.append(asset_path)
-                    
-                    # Add to Inputs
-                    ffmpeg_inputs.extend(['-i', asset_path])
-                    input_idx = i + 1
-                    
-                    # Calculate Pixel Position for FFmpeg
-                    # txt_clip size
-                    tw, th = txt_clip.size
-                    
-                    # De-normalize Center
-                    center_x = ov['pos_x_norm'] * vw
-                    center_y = ov['pos_y_norm'] * vh
-                    
-                    # Top-Left for FFmpeg
-                    tl_x = int(center_x - (tw / 2))
-                    tl_y = int(center_y - (th / 2))
-                    
-                    # Clamp
-                    tl_x = max(0, min(tl_x, vw - tw))
-                    tl_y = max(0, min(tl_y, vh - th))
-                    
-                    # Filter Chain
-                    # Chain: [prev_layer][new_layer]overlay=...[next_layer]
-                    prev_label = f"{input_idx-1}:v" if i == 0 else f"v{i}" # 0:v is base
-                    if i == 0: prev_label = "0:v"
-                    
-                    next_label = f"v{i+1}"
-                    
-                    # enable='between(t,start,end)'
-                    enable_expr = f"enable='between(t,{ov['start']},{ov['start']+ov['duration']})'"
-                    
-                    cmd = f"[{prev_label}][{input_idx}:v]overlay=x={tl_x}:y={tl_y}:{enable_expr}"
-                    if i < len(overlays_to_render) - 1:
-                        cmd += f"[{next_label}]"
-                    
-                    filter_complex.append(cmd)
-            
-            # 3. Stitch with FFmpeg
-            if progress_callback: progress_callback({"status": "rendering", "progress": 80, "message": "Stitching Final Video..."})
-            print("🧵 Stitching Final Video with FFmpeg...")
-
-            if not filter_complex:
-                # No overlays, just rename base to output
-                os.rename(temp_base_path, output_path)
-            else:
-                # Build Full Command
-                full_filter = ";".join(filter_complex)
-                
-                cmd = [
-                    "ffmpeg", "-y",
-                    *ffmpeg_inputs,
-                    "-filter_complex", full_filter,
-                    "-c:v", "libx264", "-preset", "medium", "-crf", "23",
-                    "-c:a", "copy", # Copy audio from Base (input 0)
-                    "-map", f"{len(overlays_to_render) if len(overlays_to_render) > 0 else 0}:v" if len(overlays_to_render) == 0 else (f"[v{len(overlays_to_render)}]" if len(overlays_to_render) > 0 else "0:v"),
-                    "-map", "0:a", # Map audio from base
-                    output_path
-                ]
-                
-                # Fix map logic: The last overlay output is [vN]
-                last_label = f"[v{len(overlays_to_render)}]"
-                
-                # Command Construction Refined
-                cmd_args = ["ffmpeg", "-y"]
-                cmd_args.extend(ffmpeg_inputs)
-                cmd_args.extend(["-filter_complex", full_filter])
-                cmd_args.extend([
-                    "-map", last_label, 
-                    "-map", "0:a", 
-                    "-c:v", "libx264", "-preset", "ultrafast",
-                    "-c:a", "copy",
-                    output_path
-                ])
+                asset_path = ws.path(f"overlay_{i}.png")
                 
+                # Rasterize once (bbox-sized RGBA still)
+                size = rasterize_overlay(ov, asset_path)
+                if not size:
+                    continue
+                temp_assets.append(asset_path)
+
+                # Add to Inputs
+                input_idx = len(temp_assets)
+                overlay_inputs.extend(overlay_input_args(asset_path, ov['duration'], fps))
+
+                # Filter Chain
+                # Chain: [prev_layer][new_layer]overlay=...[next_layer]
+                next_label = f"v{i+1}"
+                filter_complex.extend(overlay_filters(ov, input_idx, size, (vw, vh), current_label, next_label))
+                current_label = next_label
+
+            # 2. Audio is cheap: mix it once so segment joins never click
+            has_audio = final_video.audio is not None
+            if has_audio:
+                final_video.audio.write_audiofile(audio_path, fps=44100, codec="aac", bitrate=profile["audio_bitrate"], logger=None)
+
+            ws.usage()
+
+            # 3. Video
+            if progress_callback: progress_callback({"status": "rendering", "progress": 20, "message": "Rendering Video..."})
+            print("💾 Rendering Video...")
+            seg_paths, missing = plan_segments(timeline_pieces, final_video.size, clip_render_mode, profile, fps, reframe_vf, reframe_for)
+            render_missing_segments(missing, progress_callback)
+            segment_cache.write_concat_list(seg_paths, list_path)
+
+            if not filter_complex and not ffmpeg_grade:
+                # Nothing to burn in: join cached segments + audio without re-encoding
+                cmd_args = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+                if has_audio:
+                    cmd_args.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a"])
+                cmd_args.extend(["-c", "copy", "-movflags", "+faststart", output_path])
                 print(f"   Run: {' '.join(cmd_args)}")
                 subprocess.run(cmd_args, check=True)
+            else:
+                # Base stage on input 0 (segments are already reframed; graded unless ffmpeg_grade)
+                grade_filter = lut3d_filter(ffmpeg_grade) if ffmpeg_grade else ""
+                filter_complex.insert(0, f"[0:v]{grade_filter or 'null'}[vbase]")
+
+                print("🧵 Encoding Final Video with FFmpeg (single pass)...")
+                cmd_args = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path] + overlay_inputs
+                if has_audio:
+                    cmd_args.extend(["-i", audio_path])
+                cmd_args.extend(["-filter_complex", ";".join(filter_complex), "-map", f"[{current_label}]"])
+                if has_audio:
+                    cmd_args.extend(["-map", f"{1 + len(temp_assets)}:a", "-c:a", "copy"])
+                cmd_args.extend(encoder_profiles.video_codec_args(profile))
+                cmd_args.append(output_path)
+                print(f"   Run: {' '.join(cmd_args)}")
+                # Segment rendering reported 20-80%
+                start = 80 if missing else 20
+                run_ffmpeg(cmd_args, final_video.duration, progress_callback, start=start, span=95 - start, message="Rendering")
+            segment_cache.evict(protect=seg_paths)
 
         finally:
             # Cleanup
-            print("🧹 Cleaning up temp files...")
-            if os.path.exists(temp_base_path): os.remove(temp_base_path)
-            for p in temp_assets:
-                if os.path.exists(p): os.remove(p)
+            ws.cleanup()
 
         print(f"✅ Video Saved: {output_path}")
         if progress_callback:
@@ -848,10 +1070,6 @@ def render_project(project_data, progress_callback=None):
             print(f"⚠️ Subtitle generation failed: {e}")
         # -------------------------------
         
-        # Clean up
-        for c in final_clips:
-            c.close()
-            
         return output_path
         
     except Exception as e:
@@ -859,3 +1077,6 @@ def render_project(project_data, progress_callback=None):
         if progress_callback:
             progress_callback({"status": "failed", "message": str(e)})
         raise e
+    finally:
+        # Clean up (subclips share their source reader, so close per source)
+        readers.close_all()
@@ -4,6 +4,7 @@ from typing import Optional, List, Dict, Any
 import os
 import json
 from ..redis_config import q_render, q_videodb
+from ..encoder_profiles import ENCODER_PROFILES
 from . import export  # Check circular import?? No, this is the file itself. 
 # We don't need to import self.
 # We need imports for file size checking logic if possible.
@@ -19,6 +20,8 @@ class ExportRequest(BaseModel):
     project: dict 
     mode: Optional[str] = "local" 
     videodb_key: Optional[str] = None
+    # Encoder profile: draft / balanced / archival / social-vertical (None = server default)
+    profile: Optional[str] = None
 
 def get_project_source_size(project_data):
     """
@@ -78,6 +81,12 @@ def get_project_duration(project_data):
 async def export_video(request: ExportRequest):
     mode = getattr(request, 'mode', 'local')
     
+    if request.profile and request.profile not in ENCODER_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown profile: {request.profile}. Choose one of {', '.join(ENCODER_PROFILES)}"
+        )
+
     if mode == "local":
         # Traffic Cop Checks
         try:
@@ -110,6 +119,7 @@ async def export_video(request: ExportRequest):
             "backend.worker.tasks.perform_export_task",
             request.project, 
             EXPORT_DIR,
+            profile=request.profile,
             job_timeout='1h'
         )
         return {"status": "queued", "job_id": job.id, "mode": "local"}
@@ -131,6 +141,7 @@ async def export_video(request: ExportRequest):
             request.project, 
             EXPORT_DIR,
             videodb_key=request.videodb_key,
+            profile=request.profile,
             job_timeout='1h',
             at_front=True 
         )
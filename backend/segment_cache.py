@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+try:
+    from backend.media_probe import file_identity
+except ImportError:
+    from media_probe import file_identity
+
+# Per-Clip Segment Cache
+# Every kept clip (trim + grade + crop/scale) is encoded once to an intermediate
+# keyed by its effective parameters. Re-exports only encode clips whose key changed,
+# then the timeline is a concat of cached files (no re-encode).
+
+SEGMENT_CACHE_DIR = os.path.join("processing", "segments")
+SEGMENT_CACHE_MAX_MB = float(os.getenv("SEGMENT_CACHE_MAX_MB", "10000"))
+# Segments looked up (or temp files written) this recently may be read by another
+# worker's running export: eviction leaves them alone
+EVICT_GRACE_SECONDS = float(os.getenv("SEGMENT_CACHE_EVICT_GRACE_SECONDS", "3600"))
+# Bump when the way segments are encoded changes
+SEGMENT_CACHE_VERSION = 1
+
+def segment_key(engine, source_path, start, end, params):
+    """
+    Hash of everything that changes the encoded segment.
+    engine: which renderer made it (segments of different engines never mix)
+    params: dict of grade / render mode / canvas / encoder settings
+    """
+    payload = {
+        "v": SEGMENT_CACHE_VERSION,
+        "engine": engine,
+        "source": os.path.abspath(source_path),
+        "identity": file_identity(source_path),
+        "start": round(float(start), 3),
+        "end": round(float(end), 3),
+        "params": params,
+    }
+    canon = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:32]
+
+def segment_path(key, cache_dir=SEGMENT_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f"seg_{key}.mp4")
+
+def temp_segment_path(key, cache_dir=SEGMENT_CACHE_DIR):
+    # Render here, then commit() -> readers never see a half-written segment
+    # (unique per call, so two exports rendering the same key never share a temp file)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=f"seg_{key}.", suffix=".tmp.mp4", dir=cache_dir)
+    os.close(fd)
+    return path
+
+def lookup(key, cache_dir=SEGMENT_CACHE_DIR):
+    """
+    Returns the cached segment path (and bumps its mtime for LRU), or None.
+    """
+    path = segment_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return path
+
+def commit(tmp_path, key, cache_dir=SEGMENT_CACHE_DIR):
+    path = segment_path(key, cache_dir)
+    os.replace(tmp_path, path)
+    return path
+
+def write_concat_list(paths, list_path):
+    """
+    Writes an ffmpeg concat demuxer list for the given segment files.
+    """
+    with open(list_path, "w") as f:
+        for p in paths:
+            f.write(f"file '{os.path.abspath(p)}'\n")
+    return list_path
+
+def evict(protect=(), cache_dir=SEGMENT_CACHE_DIR, max_mb=SEGMENT_CACHE_MAX_MB, grace=EVICT_GRACE_SECONDS):
+    """
+    Deletes least recently used segments until the cache fits in max_mb.
+    Segments in `protect` (the ones the current export uses) are kept, and so are segments
+    looked up or written in the last `grace` seconds (other workers' exports). Temp files
+    older than `grace` are leftovers of a crashed render and are deleted.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    protect = {os.path.abspath(p) for p in protect}
+    now = time.time()
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.startswith("seg_"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+            if ".tmp." in name:
+                if now - st.st_mtime >= grace:
+                    os.remove(path)
+                continue
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(e[1] for e in entries)
+    max_bytes = int(max_mb * 1024 * 1024)
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in protect or now - mtime < grace:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError as e:
+            print(f"⚠️ Segment cache eviction failed for {path}: {e}")
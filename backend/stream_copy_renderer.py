@@ -0,0 +1,261 @@
+import os
+import subprocess
+import time
+import traceback
+
+# Stream-Copy Engine ("smart cut")
+# For plain keep/reject edits we don't need to decode anything:
+#   [in ... first keyframe)      -> re-encode (partial GOP)
+#   [first keyframe ... last kf) -> stream copy (no decode, no encode)
+#   [last keyframe ... out)      -> re-encode (partial GOP)
+# All pieces are written as MPEG-TS (in-band SPS/PPS) and joined with the concat demuxer.
+
+try:
+    from backend.media_probe import get_media_info, probe_keyframes
+    from backend.renderer import resolve_source_path, merge_grading, is_clip_kept, clip_times, EXPORT_DIR
+    from backend.grading import is_neutral_grading
+    from backend.workspace import JobWorkspace
+    from backend import encoder_profiles
+except ImportError:
+    from media_probe import get_media_info, probe_keyframes
+    from renderer import resolve_source_path, merge_grading, is_clip_kept, clip_times, EXPORT_DIR
+    from grading import is_neutral_grading
+    from workspace import JobWorkspace
+    import encoder_profiles
+
+# Edges shorter than this are not worth a separate encode (roughly one frame)
+MIN_EDGE_SECONDS = 0.04
+
+# ffprobe profile name -> x264 profile name
+X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+def _stream_signature(info):
+    # Everything that has to match for copied + re-encoded pieces to concat cleanly
+    return (
+        info["video_codec"], info["width"], info["height"], info["pix_fmt"],
+        round(info["fps"], 3), info["has_audio"], info["audio_codec"],
+        info["sample_rate"], info["channels"],
+    )
+
+def plan_stream_copy(project_data, upload_dir="uploads", profile=None):
+    """
+    Checks whether the project is a plain cut list (and copying the sources honours the
+    encoder profile) and returns the per-clip plan.
+    Returns (segments, reason): segments is None when the project needs a real render.
+    """
+    profile = profile or encoder_profiles.get_profile()
+    if project_data.get('overlays'):
+        return None, "project has text overlays"
+    bg_music = project_data.get('bgMusic')
+    if bg_music and bg_music.get('source'):
+        return None, "project has background music"
+    if project_data.get('audioClips'):
+        return None, "project has secondary audio clips"
+    if project_data.get('renderMode', 'landscape') == 'portrait':
+        return None, "portrait render needs a crop"
+
+    global_settings = project_data.get('globalSettings', {}) or {}
+    global_grading = global_settings.get('colorGrading', {})
+    global_filter = global_settings.get('filterSuggestion', 'None')
+
+    clips_list = project_data.get('edl', project_data.get('clips', []))
+    segments = []
+    probes = {}
+    signature = None
+
+    for clip_data in clips_list:
+        if not is_clip_kept(clip_data):
+            continue
+
+        if not is_neutral_grading(merge_grading(global_grading, global_filter, clip_data)):
+            return None, f"clip {clip_data.get('id')} is color graded"
+
+        source_path = resolve_source_path(clip_data['source'], project_data, upload_dir)
+        if not os.path.exists(source_path):
+            print(f"⚠️ Source file missing: {source_path}")
+            continue
+
+        if source_path not in probes:
+            probes[source_path] = get_media_info(source_path)
+        info = probes[source_path]
+        if not info:
+            return None, f"could not probe {source_path}"
+        if info["video_codec"] != "h264" or info["pix_fmt"] != "yuv420p":
+            return None, f"{os.path.basename(source_path)} is not 8-bit H.264"
+        if info["has_audio"] and info["audio_codec"] != "aac":
+            return None, f"{os.path.basename(source_path)} audio is not AAC"
+        if info["rotation"]:
+            # Rotation side data doesn't survive the TS intermediates
+            return None, f"{os.path.basename(source_path)} has rotation metadata"
+        if not encoder_profiles.stream_copy_compatible(profile, info):
+            return None, f"{os.path.basename(source_path)} doesn't match the '{profile['name']}' profile"
+
+        sig = _stream_signature(info)
+        if signature is None:
+            signature = sig
+        elif sig != signature:
+            return None, "sources have different stream parameters"
+
+        # Same trim rules as render_project (so both engines cut the same timeline)
+        times = clip_times(clip_data, info["duration"])
+        if times is None:
+            continue
+        start, end = times
+
+        segments.append({
+            "id": clip_data.get('id'),
+            "path": source_path,
+            "start": start,
+            "end": end,
+            "info": info,
+        })
+
+    if not segments:
+        return None, "no valid clips"
+    return segments, None
+
+def _split_on_keyframes(start, end, keyframes):
+    """
+    Returns [(kind, s, e)] pieces where kind is 'encode' or 'copy'.
+    """
+    inner = [k for k in keyframes if start <= k <= end]
+    if len(inner) < 2:
+        # No complete GOP inside the cut
+        return [("encode", start, end)]
+
+    k_first, k_last = inner[0], inner[-1]
+    pieces = []
+    if k_first - start > MIN_EDGE_SECONDS:
+        pieces.append(("encode", start, k_first))
+    pieces.append(("copy", k_first, k_last))
+    if end - k_last > MIN_EDGE_SECONDS:
+        pieces.append(("encode", k_last, end))
+    return pieces
+
+def _run(cmd):
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        print(f"FFmpeg Error:\n{result.stderr[-2000:]}")
+        raise Exception(f"FFmpeg failed: {' '.join(cmd[:6])} ...")
+
+def _copy_piece(path, start, end, info, out_path):
+    # A copy starts on the keyframe at or before -ss: seek half a frame past `start` (a
+    # keyframe pts) so rounding can never land before it and pull in the previous GOP
+    half_frame = 0.5 / (info.get("fps") or 30.0)
+    seek = start + half_frame
+    _run([
+        "ffmpeg", "-y", "-ss", f"{seek:.6f}", "-i", path, "-t", f"{end - seek:.6f}",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c", "copy", "-bsf:v", "h264_mp4toannexb",
+        "-avoid_negative_ts", "make_zero",
+        "-f", "mpegts", out_path
+    ])
+
+def _encode_piece(path, start, end, info, out_path):
+    # Match the source stream so the decoder sees one continuous H.264 stream
+    cmd = [
+        "ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", path, "-t", f"{end - start:.6f}",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+        "-pix_fmt", info["pix_fmt"],
+    ]
+    profile = X264_PROFILES.get(info.get("profile") or "")
+    if profile:
+        cmd.extend(["-profile:v", profile])
+    if info["has_audio"]:
+        cmd.extend(["-c:a", "aac", "-ar", str(info["sample_rate"]), "-ac", str(info["channels"])])
+    cmd.extend(["-bsf:v", "h264_mp4toannexb", "-f", "mpegts", out_path])
+    _run(cmd)
+
+def render_stream_copy_project(project_data, progress_callback=None, profile=None):
+    """
+    Renders a plain keep/reject edit by stream-copying whole GOPs and re-encoding
+    only the partial GOPs at each cut. Returns None if the project needs a real render.
+    profile: the export's encoder profile (copying is skipped when the sources don't match it)
+    """
+    print("⚡ Starting Stream-Copy Render...")
+    if progress_callback:
+        progress_callback({"status": "processing", "progress": 0, "message": "Planning stream copy..."})
+
+    segments, reason = plan_stream_copy(project_data, profile=profile)
+    if segments is None:
+        print(f"ℹ️ Stream copy not possible: {reason}")
+        return None
+
+    timestamp = int(time.time())
+    output_filename = f"{project_data.get('name', 'video')}_final_{timestamp}.mp4"
+    output_path = os.path.join(EXPORT_DIR, output_filename)
+    ws = JobWorkspace("streamcopy")
+    list_path = ws.path("concat.txt")
+    temp_pieces = []
+
+    try:
+        total = len(segments)
+        copied_sec = 0.0
+        encoded_sec = 0.0
+
+        for i, seg in enumerate(segments):
+            if progress_callback:
+                progress_callback({
+                    "status": "processing",
+                    "progress": (i / total) * 90,
+                    "message": f"Cutting clip {i+1}/{total}"
+                })
+
+            keyframes = probe_keyframes(seg["path"], seg["start"], seg["end"])
+            for kind, s, e in _split_on_keyframes(seg["start"], seg["end"], keyframes):
+                piece_path = ws.path(f"piece_{len(temp_pieces)}.ts")
+                if kind == "copy":
+                    _copy_piece(seg["path"], s, e, seg["info"], piece_path)
+                    copied_sec += e - s
+                else:
+                    _encode_piece(seg["path"], s, e, seg["info"], piece_path)
+                    encoded_sec += e - s
+                temp_pieces.append(piece_path)
+
+        print(f"   Copied {copied_sec:.1f}s, re-encoded {encoded_sec:.1f}s across {total} clips")
+        ws.usage()
+
+        # Join with the concat demuxer (no re-encode)
+        if progress_callback:
+            progress_callback({"status": "processing", "progress": 92, "message": "Joining segments..."})
+
+        with open(list_path, "w") as f:
+            for p in temp_pieces:
+                f.write(f"file '{os.path.abspath(p)}'\n")
+
+        _run([
+            "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-bsf:a", "aac_adtstoasc",
+            "-movflags", "+faststart", output_path
+        ])
+
+    except Exception as e:
+        print(f"Stream copy error: {e}")
+        traceback.print_exc()
+        if os.path.exists(output_path): os.remove(output_path)
+        raise e
+    finally:
+        ws.cleanup()
+
+    print(f"✅ Video Saved: {output_path}")
+    if progress_callback:
+        progress_callback({"status": "completed", "progress": 100, "message": "Render Complete", "url": f"/exports/{output_filename}"})
+
+    # Subtitles (same as render_project)
+    try:
+        try:
+            from backend import subtitle_generator
+        except ImportError:
+            import subtitle_generator
+        srt_path = os.path.join(EXPORT_DIR, output_filename.replace('.mp4', '.srt'))
+        subtitle_generator.generate_srt(project_data, srt_path)
+    except Exception as e:
+        print(f"⚠️ Subtitle generation failed: {e}")
+
+    return output_path
@@ -0,0 +1,171 @@
+import os
+import subprocess
+import textwrap
+from functools import lru_cache
+
+# Native Text Overlays (ffmpeg drawtext)
+# Instead of building each caption from three MoviePy TextClips and rasterizing it,
+# the whole overlay track becomes one chain of drawtext filters inside the encode pass:
+# stroke = borderw, shadow = shadowx/shadowy, fade = alpha expression.
+# Overlay text goes through tiny textfiles in the job workspace (no escaping games with
+# quotes/colons/% in user captions). Falls back to the raster (PNG) path when the
+# ffmpeg build has no drawtext (needs libfreetype).
+#
+# OVERLAY_BACKEND: auto | drawtext | raster  (project JSON "overlayBackend" wins)
+# auto picks drawtext once a project has DRAWTEXT_MIN_OVERLAYS captions or more.
+
+OVERLAY_BACKEND = os.getenv("OVERLAY_BACKEND", "auto")
+DRAWTEXT_MIN_OVERLAYS = int(os.getenv("DRAWTEXT_MIN_OVERLAYS", "1"))
+
+# Same look as create_motion_text
+STROKE_RATIO = 0.08
+SHADOW_RATIO = 0.05
+LINE_SPACING = 1.2
+# Rough average glyph width of a bold sans font (for caption wrapping)
+CHAR_WIDTH_RATIO = 0.6
+FADE_SECONDS = 0.5
+
+FONT_DIRS = [
+    "/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+    "/Library/Fonts", "/System/Library/Fonts", "C:\\Windows\\Fonts",
+]
+
+@lru_cache(maxsize=1)
+def drawtext_available():
+    try:
+        out = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True, timeout=10).stdout
+        return " drawtext " in out
+    except Exception:
+        return False
+
+def choose_backend(project_data, overlay_count):
+    """
+    Returns "drawtext" or "raster" for this project.
+    """
+    backend = (project_data.get('overlayBackend') or OVERLAY_BACKEND or "auto").lower()
+    if backend == "raster" or overlay_count == 0:
+        return "raster"
+    if not drawtext_available():
+        if backend == "drawtext":
+            print("⚠️ ffmpeg has no drawtext filter, falling back to raster overlays")
+        return "raster"
+    if backend == "drawtext" or overlay_count >= DRAWTEXT_MIN_OVERLAYS:
+        return "drawtext"
+    return "raster"
+
+@lru_cache(maxsize=32)
+def resolve_font_file(font_name):
+    """
+    "Arial-Bold" -> a font file path (fontconfig first, then a scan of the usual dirs).
+    Returns None if nothing matches (drawtext then uses its default font).
+    """
+    family, _, style = (font_name or "Arial-Bold").partition("-")
+    pattern = f"{family}:style={style}" if style else family
+    try:
+        res = subprocess.run(["fc-match", "-f", "%{file}", pattern], capture_output=True, text=True, timeout=5)
+        if res.returncode == 0 and os.path.exists(res.stdout.strip()):
+            return res.stdout.strip()
+    except Exception:
+        pass
+
+    wanted = [f"{family}{style}".lower(), f"{family}-{style}".lower(), f"{family}bd".lower(), family.lower()]
+    candidates = {}
+    for root_dir in FONT_DIRS:
+        if not os.path.isdir(root_dir):
+            continue
+        for root, _, files in os.walk(root_dir):
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in (".ttf", ".otf"):
+                    candidates.setdefault(stem.lower(), os.path.join(root, name))
+    for stem in wanted:
+        if stem in candidates:
+            return candidates[stem]
+    return None
+
+def _ffmpeg_color(color):
+    color = str(color or "white").strip()
+    if color.startswith("#"):
+        return "0x" + color[1:]
+    return color
+
+def _escape_value(value):
+    # For values inside a '...' quoted filter option
+    return str(value).replace("\\", "/").replace("'", "\\'").replace(":", "\\:")
+
+def wrap_caption(ov):
+    """
+    Splits the caption into lines the way the MoviePy 'caption' method wraps at max_width.
+    """
+    lines = str(ov['content']).splitlines() or [""]
+    if not ov.get('max_width'):
+        return lines
+    per_line = max(1, int(ov['max_width'] / (ov['fontsize'] * CHAR_WIDTH_RATIO)))
+    wrapped = []
+    for line in lines:
+        wrapped.extend(textwrap.wrap(line, per_line) or [""])
+    return wrapped
+
+def drawtext_filters(ov, canvas, ws, idx):
+    """
+    drawtext filters (one per line, each centered on the overlay x) for one prepared overlay.
+    """
+    vw, vh = canvas
+    fontsize = ov['fontsize']
+    stroke_w = max(4, int(fontsize * STROKE_RATIO))
+    shadow_off = max(4, int(fontsize * SHADOW_RATIO))
+    start = ov['start']
+    end = start + ov['duration']
+
+    lines = wrap_caption(ov)
+    line_h = int(fontsize * LINE_SPACING)
+    block_h = line_h * len(lines)
+    # De-normalize Center -> Top, clamped inside the frame
+    top = int(ov['pos_y_norm'] * vh - block_h / 2)
+    top = max(0, min(top, vh - block_h))
+    cx = ov['pos_x_norm'] * vw
+
+    opts = [
+        f"fontsize={fontsize}",
+        f"fontcolor={_ffmpeg_color(ov['color'])}",
+        f"borderw={stroke_w}", "bordercolor=black",
+        f"shadowx={shadow_off}", f"shadowy={shadow_off}", "shadowcolor=black",
+        "expansion=none",
+        f"enable='between(t,{start:.3f},{end:.3f})'",
+    ]
+    font_file = resolve_font_file(ov.get('font'))
+    if font_file:
+        opts.insert(0, f"fontfile='{_escape_value(font_file)}'")
+    if ov['style'] == 'fade':
+        fd = min(FADE_SECONDS, ov['duration'] / 2)
+        opts.append(
+            f"alpha='if(lt(t,{start + fd:.3f}),(t-{start:.3f})/{fd:.3f},"
+            f"if(gt(t,{end - fd:.3f}),({end:.3f}-t)/{fd:.3f},1))'"
+        )
+
+    filters = []
+    for j, line in enumerate(lines):
+        if not line.strip():
+            continue
+        text_path = ws.path(f"overlay_{idx}_{j}.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(line)
+        x = f"max(0,min({cx:.1f}-text_w/2,w-text_w))"
+        y = top + j * line_h
+        filters.append("drawtext=" + ":".join(
+            [f"textfile='{_escape_value(text_path)}'"] + opts + [f"x='{x}'", f"y={y}"]
+        ))
+    return filters
+
+def build_drawtext_chain(overlays, canvas, ws, in_label, out_label):
+    """
+    The whole overlay track as a single filter_complex chain [in_label] -> [out_label].
+    overlays: prepared overlay dicts (renderer.prepare_overlay). Returns [] if nothing to draw.
+    """
+    filters = []
+    for i, ov in enumerate(overlays):
+        filters.extend(drawtext_filters(ov, canvas, ws, i))
+    if not filters:
+        return []
+    print(f"🔤 {len(overlays)} overlays -> {len(filters)} drawtext filters")
+    return [f"[{in_label}]{','.join(filters)}[{out_label}]"]
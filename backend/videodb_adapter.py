@@ -5,6 +5,15 @@ import time
 import traceback
 from videodb import timeline, TextStyle
 
+try:
+    from backend import encoder_profiles
+    from backend.media_probe import get_media_info
+    from backend import reframe
+except ImportError:
+    import encoder_profiles
+    from media_probe import get_media_info
+    import reframe
+
 class VideoDBAdapter:
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv("VIDEODB_API_KEY")
@@ -57,7 +66,7 @@ class VideoDBAdapter:
 
         return source_path if os.path.exists(source_path) else None
 
-    def render_project(self, project_data, progress_callback=None):
+    def render_project(self, project_data, progress_callback=None, profile=None):
         if not self.coll:
             raise Exception("VideoDB Connection not initialized")
 
@@ -164,14 +173,10 @@ class VideoDBAdapter:
                     elif hasattr(video, 'length'): duration = float(video.length)
                     
                     if duration == 0 and local_path:
+                        # Probe index (ffprobe once per file version)
                         try:
-                            import cv2
-                            cap = cv2.VideoCapture(local_path)
-                            if cap.isOpened():
-                                fps = cap.get(cv2.CAP_PROP_FPS)
-                                fc = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                                if fps > 0: duration = fc / fps
-                                cap.release()
+                            info = get_media_info(local_path)
+                            if info: duration = info["duration"]
                         except: pass
                     
                     if duration == 0: duration = 10.0 # Default
@@ -285,16 +290,23 @@ class VideoDBAdapter:
                     ydl.download([stream_url])
                 
                 # Check for Portrait Mode Crop
-                if project_data.get('renderMode') == 'portrait' and os.path.exists(output_path):
-                    print("📱 Transforming to Portrait (9:16)...")
+                # The assets were already reframed in the cloud: only re-encode locally
+                # when the stream isn't 1080x1920 yet (reframe failed, or a smaller size)
+                info = get_media_info(output_path) if project_data.get('renderMode') == 'portrait' and os.path.exists(output_path) else None
+                vf = reframe.portrait_vf(info["width"], info["height"]) if info and info["width"] and info["height"] else ""
+                if vf:
+                    print(f"📱 Transforming to Portrait (9:16): {vf}")
                     if progress_callback:
                          progress_callback({"status": "processing", "progress": 95, "message": "Converting to Portrait..."})
                     
                     cropped_path = output_path.replace(".mp4", "_cropped.mp4")
-                    # ffmpeg crop=ih*(9/16):ih,scale=1080:1920
+                    encoder = encoder_profiles.get_profile(profile)
+                    if encoder["fps"]:
+                        vf += f",fps={encoder['fps']}"
                     cmd = [
                         "ffmpeg", "-y", "-i", output_path,
-                        "-vf", "crop=ih*(9/16):ih,scale=1080:1920:flags=lanczos", 
+                        "-vf", vf,
+                    ] + encoder_profiles.video_codec_args(encoder) + [
                         "-c:a", "copy",
                         cropped_path
                     ]
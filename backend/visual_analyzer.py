@@ -53,10 +53,115 @@ def analyze_video(video_path):
     cap.release()
     print(json.dumps(results))
 
+# --- REFRAME CROP TRACK ---
+# Where the subject is, horizontally, over the whole source: computed ONCE here at
+# analysis time on small frames, so portrait exports can follow the speaker with a
+# keyframed ffmpeg crop and never run detection while rendering.
+TRACK_SAMPLE_FPS = 2.0      # detections per second of video
+TRACK_WIDTH = 320           # frames are downscaled to this width before detection
+TRACK_DEADZONE = 0.06       # ignore subject moves smaller than this (fraction of width)
+TRACK_SMOOTHING = 0.35      # 0..1, how fast the crop follows once it moves
+TRACK_MAX_KEYFRAMES = 400
+
+def _subject_center(small, face_cascade, saliency):
+    """
+    Normalized horizontal center (0..1) of the subject in a downscaled BGR frame, or None.
+    Largest face first, then the static saliency map's center of mass.
+    """
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    if face_cascade is not None:
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=4, minSize=(20, 20))
+        if len(faces):
+            x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+            return (x + w / 2) / small.shape[1]
+    if saliency is not None:
+        ok, sal_map = saliency.computeSaliency(small)
+        if ok:
+            col_energy = sal_map.sum(axis=0)
+            total = col_energy.sum()
+            if total > 0:
+                return float((col_energy * np.arange(len(col_energy))).sum() / total) / small.shape[1]
+    return None
+
+def _smooth_track(samples):
+    """
+    samples: list of (t, cx or None) -> keyframes [(t, cx)] with gaps filled, median
+    filtered, dead-zoned and eased so the crop only pans for real subject moves.
+    """
+    # Fill gaps with the last known position (center until the first detection)
+    filled, last = [], 0.5
+    for t, cx in samples:
+        if cx is not None: last = cx
+        filled.append((t, last))
+    if not filled:
+        return []
+
+    xs = np.array([cx for _, cx in filled])
+    k = 2
+    medians = [float(np.median(xs[max(0, i - k):i + k + 1])) for i in range(len(xs))]
+
+    keyframes = []
+    pos = medians[0]
+    for (t, _), target in zip(filled, medians):
+        if abs(target - pos) > TRACK_DEADZONE:
+            pos += (target - pos) * TRACK_SMOOTHING
+        if not keyframes or abs(pos - keyframes[-1][1]) > 0.005:
+            keyframes.append((round(t, 3), round(pos, 4)))
+    # Hold the last position to the end
+    if keyframes[-1][0] != round(filled[-1][0], 3):
+        keyframes.append((round(filled[-1][0], 3), keyframes[-1][1]))
+
+    if len(keyframes) > TRACK_MAX_KEYFRAMES:
+        step = len(keyframes) / TRACK_MAX_KEYFRAMES
+        keyframes = [keyframes[int(i * step)] for i in range(TRACK_MAX_KEYFRAMES)] + [keyframes[-1]]
+    return keyframes
+
+def compute_crop_track(video_path):
+    print(f"Computing crop track for {video_path}...", file=sys.stderr)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    step = max(1, int(round(fps / TRACK_SAMPLE_FPS)))
+
+    try:
+        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        if face_cascade.empty(): face_cascade = None
+    except Exception:
+        face_cascade = None
+    try:
+        # Needs opencv-contrib; faces alone are fine without it
+        saliency = cv2.saliency.StaticSaliencySpectralResidual_create()
+    except Exception:
+        saliency = None
+
+    samples = []
+    index = 0
+    scale = TRACK_WIDTH / width if width > TRACK_WIDTH else 1.0
+    while True:
+        # grab() skips the colour conversion for frames we don't look at
+        if not cap.grab():
+            break
+        if index % step == 0:
+            ok, frame = cap.retrieve()
+            if ok:
+                small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else frame
+                samples.append((index / fps, _subject_center(small, face_cascade, saliency)))
+        index += 1
+    cap.release()
+
+    keyframes = _smooth_track(samples)
+    return {"width": width, "height": height, "keyframes": keyframes}
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python visual_analyzer.py <video_path>", file=sys.stderr)
+        print("Usage: python visual_analyzer.py <video_path> [--crop-track]", file=sys.stderr)
         sys.exit(1)
         
     video_path = sys.argv[1]
-    analyze_video(video_path)
+    if "--crop-track" in sys.argv[2:]:
+        print(json.dumps(compute_crop_track(video_path)))
+    else:
+        analyze_video(video_path)
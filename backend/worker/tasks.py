@@ -1,7 +1,7 @@
 import os
 import traceback
 from rq import get_current_job
-from backend import renderer, ai_engine
+from backend import renderer, ai_engine, stream_copy_renderer, export_cache, encoder_profiles
 
 def update_job_progress(progress=None, message=None, **kwargs):
     """Helper to update RQ job meta with progress info."""
@@ -27,7 +27,7 @@ def update_job_progress(progress=None, message=None, **kwargs):
         job.save_meta()
 
 # --- TASK: EXPORT VIDEO ---
-def perform_export_task(project_data, output_dir):
+def perform_export_task(project_data, output_dir, profile=None):
     job = get_current_job()
     print(f"🚀 Starting Export Task: Job {job.id if job else 'Unknown'}")
     
@@ -60,9 +60,36 @@ def perform_export_task(project_data, output_dir):
         update_job_progress(progress=p, message=m, **extra_args)
 
     try:
+        # Unchanged project + unchanged sources -> hand back the previous export
+        cache_key = None
+        try:
+            cache_key = export_cache.export_cache_key(project_data, extra={"profile": profile or encoder_profiles.DEFAULT_PROFILE})
+        except Exception as e:
+            print(f"⚠️ Export cache key failed: {e}")
+        output_file_path = export_cache.lookup(cache_key)
+        cache_hit = bool(output_file_path)
+
         # Run the renderer
+        # Plain keep/reject edits go through the stream-copy engine (no full re-encode).
+        # It returns None when the project needs grading/overlays/audio mixing, or when
+        # copying the sources can't honour the profile (bitrate cap, other frame rate).
+        if not output_file_path:
+            try:
+                output_file_path = stream_copy_renderer.render_stream_copy_project(
+                    project_data, progress_callback=render_progress, profile=encoder_profiles.get_profile(profile)
+                )
+            except Exception as e:
+                print(f"⚠️ Stream copy failed, falling back to full render: {e}")
+
         # Note: renderer.render_project writes to file and returns path
-        output_file_path = renderer.render_project(project_data, progress_callback=render_progress)
+        if not output_file_path:
+            output_file_path = renderer.render_project(project_data, progress_callback=render_progress, profile=profile)
+
+        if output_file_path and not cache_hit:
+            try:
+                export_cache.store(cache_key, output_file_path)
+            except Exception as e:
+                print(f"⚠️ Export cache store failed: {e}")
         
         if output_file_path:
             filename = os.path.basename(output_file_path)
@@ -73,7 +100,7 @@ def perform_export_task(project_data, output_dir):
             update_job_progress(
                 progress=100, 
                 status="completed", 
-                message="Render Complete", 
+                message="Render Complete (cached)" if cache_hit else "Render Complete", 
                 url=url, 
                 output_path=output_file_path
             )
@@ -122,7 +149,7 @@ def perform_analysis_task(video_paths, project_name, output_dir, user_descriptio
 
 
 # --- TASK: VIDEODB EXPORT ---
-def perform_videodb_export_task(project_data, output_dir, videodb_key=None):
+def perform_videodb_export_task(project_data, output_dir, videodb_key=None, profile=None):
     job = get_current_job()
     print(f"☁️ Starting VideoDB Export: Job {job.id if job else 'Unknown'}")
     
@@ -146,7 +173,7 @@ def perform_videodb_export_task(project_data, output_dir, videodb_key=None):
         
         # Run Adapter
         # Note: We now return a local file path usually.
-        result = adapter.render_project(project_data, progress_callback=render_progress)
+        result = adapter.render_project(project_data, progress_callback=render_progress, profile=profile)
         
         url = result
         if result and os.path.exists(result):
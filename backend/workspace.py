@@ -0,0 +1,74 @@
+import os
+import time
+import uuid
+import shutil
+
+# Per-Job Temp Workspaces
+# Every render gets its own directory under processing/jobs/ for intermediates
+# (overlay stills, concat lists, filter scripts, mixed audio, TS pieces).
+# Nothing is shared between jobs, so several render workers can run on one box.
+# The directory is always removed at the end and its peak size is logged.
+
+WORKSPACE_ROOT = os.getenv("RENDER_WORKSPACE_ROOT", os.path.join("processing", "jobs"))
+# Workspaces left behind by a killed worker are removed after this long
+STALE_WORKSPACE_HOURS = float(os.getenv("STALE_WORKSPACE_HOURS", "12"))
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def cleanup_stale_workspaces(root=WORKSPACE_ROOT, max_age_hours=STALE_WORKSPACE_HOURS):
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age_hours * 3600
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                print(f"🧹 Removing stale workspace: {path}")
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+class JobWorkspace:
+    """
+    Job-scoped temp directory. Use as a context manager (or call cleanup()).
+    """
+    def __init__(self, kind="render", root=WORKSPACE_ROOT):
+        os.makedirs(root, exist_ok=True)
+        cleanup_stale_workspaces(root)
+        self.name = f"{kind}_{int(time.time())}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.root = os.path.join(root, self.name)
+        os.makedirs(self.root)
+        self.peak_bytes = 0
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def usage(self):
+        """
+        Current size in bytes (also tracks the peak). Call after large writes.
+        """
+        size = _dir_size(self.root)
+        self.peak_bytes = max(self.peak_bytes, size)
+        return size
+
+    def cleanup(self):
+        if not os.path.isdir(self.root):
+            return
+        self.usage()
+        print(f"🧹 Workspace {self.name}: peak {self.peak_bytes / (1024 * 1024):.1f} MB, removing")
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
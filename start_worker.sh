@@ -17,4 +17,17 @@ else
     PYTHON_CMD=python
 fi
 
-rq worker default analysis render videodb
+# Jobs use isolated temp workspaces, so several workers can share one machine.
+# WORKER_COUNT=4 ./start_worker.sh
+WORKER_COUNT=${WORKER_COUNT:-1}
+
+# Stopping this script stops every worker it started (SIGTERM = RQ warm shutdown)
+pids=()
+trap 'kill "${pids[@]}" 2>/dev/null' EXIT INT TERM
+
+for ((i = 0; i < WORKER_COUNT; i++)); do
+    rq worker default analysis render videodb &
+    pids+=($!)
+done
+
+wait
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from backend import ai_engine
+
+
+def test_merge_numbers_clips_in_input_order():
+    results = [
+        ([{"start": 0, "end": 1}, {"start": 1, "end": 2}], {"keyframes": [[0, 0.5]]}),
+        ([{"start": 0, "end": 3}], None),
+    ]
+    timeline, tracks = ai_engine.merge_analysis_results(["/up/a.mp4", "/up/b.mp4"], results)
+    assert [(c["id"], c["source_video"]) for c in timeline] == [(1, "a.mp4"), (2, "a.mp4"), (3, "b.mp4")]
+    assert list(tracks) == ["a.mp4"]
+
+
+def test_transcribe_workers_scale_with_cores_and_memory(monkeypatch):
+    monkeypatch.setenv("WHISPER_MODEL", "base.en")
+    monkeypatch.setattr(ai_engine.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(ai_engine, "_total_memory_gb", lambda: 32)
+    assert ai_engine.default_transcribe_workers() == 3
+    monkeypatch.setattr(ai_engine, "_total_memory_gb", lambda: 4)
+    assert ai_engine.default_transcribe_workers() == 2
+    monkeypatch.setattr(ai_engine.os, "cpu_count", lambda: 2)
+    assert ai_engine.default_transcribe_workers() == 1
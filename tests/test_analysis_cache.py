@@ -0,0 +1,51 @@
+import os
+import time
+
+from backend import analysis_cache
+
+
+def write_entry(cache_dir, key, size, age):
+    path = analysis_cache.entry_path(key, "audio.flac", str(cache_dir))
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    then = time.time() - age
+    os.utime(os.path.dirname(path), (then, then))
+    return path
+
+
+def test_content_key_follows_content_not_name(tmp_path):
+    a = tmp_path / "a" / "clip1.mp4"
+    b = tmp_path / "b" / "clip1.mp4"
+    c = tmp_path / "c" / "other.mp4"
+    for path, data in ((a, b"first"), (b, b"second"), (c, b"first")):
+        path.parent.mkdir()
+        path.write_bytes(data)
+    assert analysis_cache.content_key(str(a)) != analysis_cache.content_key(str(b))
+    assert analysis_cache.content_key(str(a)) == analysis_cache.content_key(str(c))
+
+
+def test_temp_paths_are_unique_and_commit_tolerates_a_lost_race(tmp_path):
+    cache_dir = str(tmp_path)
+    first = analysis_cache.temp_path("k", "visual.json", cache_dir)
+    second = analysis_cache.temp_path("k", "visual.json", cache_dir)
+    assert first != second
+    assert analysis_cache.commit_file(first, "k", "visual.json", cache_dir)
+    # Same temp file again: already moved, the committed copy is a hit
+    assert analysis_cache.commit_file(first, "k", "visual.json", cache_dir) == os.path.join(cache_dir, "k", "visual.json")
+
+
+def test_evict_drops_oldest_unprotected_idle_entries(tmp_path):
+    mb = 1024 * 1024
+    write_entry(tmp_path, "old", mb, age=7200)
+    write_entry(tmp_path, "older_protected", mb, age=9000)
+    write_entry(tmp_path, "recent", mb, age=10)
+    analysis_cache.evict(protect={"older_protected"}, cache_dir=str(tmp_path), max_mb=1.5, grace=3600)
+    assert sorted(os.listdir(tmp_path)) == ["older_protected", "recent"]
+
+
+def test_evict_spares_entries_still_being_written(tmp_path):
+    write_entry(tmp_path, "busy", 1024 * 1024, age=7200)
+    tmp = analysis_cache.temp_path("busy", "transcript.json", str(tmp_path))
+    os.utime(os.path.join(str(tmp_path), "busy"), (0, 0))
+    analysis_cache.evict(cache_dir=str(tmp_path), max_mb=0.1, grace=3600)
+    assert os.path.exists(tmp)
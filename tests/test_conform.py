@@ -0,0 +1,21 @@
+from backend import conform, reframe
+
+HD = {"width": 1920, "height": 1080, "fps": 30.0, "sar": "1:1", "rotation": 0}
+
+
+def test_timeline_format_keeps_the_common_source_rate():
+    infos = [HD, dict(HD, fps=25.0), dict(HD)]
+    assert conform.timeline_format(infos) == ((1920, 1080), 30.0)
+    assert conform.timeline_format(infos, profile_fps=24) == ((1920, 1080), 24)
+    assert conform.timeline_format(infos, render_mode='portrait')[0] == reframe.PORTRAIT_SIZE
+
+
+def test_matching_clips_need_no_conform_filters():
+    assert conform.conform_filters(HD, (1920, 1080), 30.0) == []
+    assert conform.conform_filters(dict(HD, fps=25.0), (1920, 1080), 30.0) == ["fps=30.0"]
+    assert conform.conform_filters(dict(HD, width=1280, height=720), (1920, 1080), 30.0) == ["scale=1920:1080", "setsar=1"]
+    assert conform.conform_filters(dict(HD, sar="4:3"), (1920, 1080), 30.0) == ["setsar=1"]
+
+
+def test_rotated_source_uses_display_geometry():
+    assert conform.source_geometry(dict(HD, rotation=90)) == (1080, 1920)
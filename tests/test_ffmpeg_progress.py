@@ -0,0 +1,46 @@
+import os
+import stat
+
+import pytest
+
+from backend.ffmpeg_progress import run_ffmpeg, ProgressThrottle
+
+
+def fake_ffmpeg(tmp_path, body, code=0):
+    # Stands in for ffmpeg: ignores its arguments, prints -progress blocks
+    path = tmp_path / "ffmpeg"
+    path.write_text(f"#!/bin/sh\nprintf '{body}'\nexit {code}\n")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_progress_blocks_are_mapped_into_the_span(tmp_path):
+    exe = fake_ffmpeg(tmp_path, "frame=1\\nout_time_us=5000000\\nspeed=2.0x\\nprogress=continue\\n"
+                                "out_time_us=10000000\\nspeed=2.0x\\nprogress=end\\n")
+    updates = []
+    run_ffmpeg([exe, "-i", "in.mp4", "out.mp4"], 10.0, updates.append, start=20, span=50)
+    assert [u["progress"] for u in updates] == [45.0, 70.0]
+    assert updates[0]["eta_seconds"] == 2.5
+    assert updates[0]["speed"] == 2.0
+
+
+def test_out_time_ms_is_microseconds_too(tmp_path):
+    exe = fake_ffmpeg(tmp_path, "out_time_ms=2500000\\nspeed=N/A\\nprogress=end\\n")
+    updates = []
+    run_ffmpeg([exe], 10.0, updates.append)
+    assert updates[-1]["progress"] == 25.0
+
+
+def test_failure_raises(tmp_path):
+    exe = fake_ffmpeg(tmp_path, "progress=end\\n", code=1)
+    with pytest.raises(Exception):
+        run_ffmpeg([exe], 1.0)
+
+
+def test_throttle_drops_fast_updates_but_never_the_final_one():
+    seen = []
+    throttle = ProgressThrottle(seen.append, interval=60)
+    throttle(1)
+    throttle(2)
+    throttle(3, force=True)
+    assert seen == [1, 3]
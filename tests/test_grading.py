@@ -0,0 +1,44 @@
+from backend.grading import is_neutral_grading, grading_ops, lut3d_filter
+
+# What the frontend XML parser / ai_engine write for an untouched AI project
+DEFAULT_AI_GRADING = {
+    "temperature": 5600, "exposure": 0, "contrast": 0, "saturation": 100,
+    "filterStrength": 100, "filterSuggestion": "Natural Grade",
+}
+
+
+def test_natural_grade_is_neutral():
+    assert grading_ops(DEFAULT_AI_GRADING) == []
+    assert is_neutral_grading(DEFAULT_AI_GRADING)
+
+
+def test_none_and_unparseable_are_neutral():
+    assert is_neutral_grading({"filterSuggestion": "None"})
+    assert is_neutral_grading({"filterSuggestion": None})
+    assert is_neutral_grading({"exposure": "bright"})
+
+
+def test_real_grades_are_not_neutral():
+    assert not is_neutral_grading(dict(DEFAULT_AI_GRADING, filterSuggestion="Cinematic"))
+    assert not is_neutral_grading(dict(DEFAULT_AI_GRADING, exposure=0.5))
+    assert not is_neutral_grading(dict(DEFAULT_AI_GRADING, saturation=120))
+
+
+def test_neutral_grade_has_no_lut3d_filter():
+    # Never an empty stage in the filtergraph
+    assert lut3d_filter(DEFAULT_AI_GRADING) == ""
+
+
+def test_grade_key_and_lut_file(tmp_path):
+    from backend.grading import grading_key, get_cube_lut
+    cinematic = dict(DEFAULT_AI_GRADING, filterSuggestion="Cinematic")
+    # Same effective grade -> same key, whatever the unused fields say
+    assert grading_key(cinematic) == grading_key(dict(cinematic, filterStrength=50))
+    assert grading_key(cinematic) != grading_key(dict(cinematic, exposure=0.5))
+
+    path = get_cube_lut(cinematic, cache_dir=str(tmp_path))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert "LUT_3D_SIZE 33" in lines
+    assert len([l for l in lines if l[:1].isdigit()]) == 33 ** 3
+    assert get_cube_lut(DEFAULT_AI_GRADING, cache_dir=str(tmp_path)) is None
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("moviepy")
+
+from backend.hybrid_renderer import plan_input_runs
+
+
+def clip(path, start, end):
+    return {"path": path, "start": start, "end": end, "has_audio": True}
+
+
+def test_sequential_cuts_share_one_audio_input():
+    clips = [clip("a", 0, 2), clip("a", 3, 5), clip("b", 0, 1), clip("a", 40, 41)]
+    assert plan_input_runs(clips) == [[0, 1], [2], [3]]
+
+
+def test_silent_clips_get_no_input():
+    clips = [clip("a", 0, 2), dict(clip("a", 3, 5), has_audio=False), clip("a", 6, 7)]
+    assert plan_input_runs(clips) == [[0, 2]]
+
+
+def test_jump_cut_timeline_falls_back_to_one_input_per_source():
+    clips = [clip("a" if i % 2 == 0 else "b", i * 20.0, i * 20.0 + 1) for i in range(12)]
+    assert plan_input_runs(clips, max_inputs=8) == [[0, 2, 4, 6, 8, 10], [1, 3, 5, 7, 9, 11]]
@@ -0,0 +1,54 @@
+import os
+
+from backend import conform, reframe
+
+
+def test_portrait_filters_center_crop_and_scale():
+    assert reframe.portrait_filters(1920, 1080) == [
+        "crop=607:1080:656:0", "scale=1080:1920:flags=lanczos", "setsar=1",
+    ]
+    assert reframe.portrait_filters(1080, 1920) == []
+    # Narrower than 9:16: no crop, only the scale
+    assert reframe.portrait_filters(720, 1440) == ["scale=1080:1920:flags=lanczos", "setsar=1"]
+
+
+def test_portrait_phone_footage_is_not_reframed():
+    phone = {"width": 1920, "height": 1080, "fps": 30.0, "rotation": 90}
+    assert conform.conform_filters(phone, reframe.PORTRAIT_SIZE, 30.0, render_mode='portrait') == []
+
+
+def test_crop_x_expression_is_a_flat_clamped_sum():
+    expr = reframe.crop_x_expr([(0.0, 0.0), (2.0, 1.0)], 1920, 607)
+    assert "if(" not in expr
+    assert expr.startswith("lt(t,0.000)*0.0+")
+    assert expr.endswith("gte(t,2.000)*1313.0")
+    assert reframe.crop_x_expr([(0.0, 0.5), (4.0, 0.5)], 1920, 607) == "656.5"
+
+
+def test_track_points_cover_the_cut_in_filter_time():
+    track = {"keyframes": [[0.0, 0.2], [10.0, 0.8]]}
+    assert reframe.track_points(track, 5.0, 10.0, offset=-5.0) == [(0.0, 0.5), (5.0, 0.8)]
+
+
+def test_crop_tracks_are_computed_on_first_use(tmp_path, monkeypatch):
+    saved, fresh = tmp_path / "saved.mp4", tmp_path / "fresh.mp4"
+    saved.write_bytes(b"a")
+    fresh.write_bytes(b"b")
+    project = tmp_path / "projects" / "Show"
+    project.mkdir(parents=True)
+    (project / "Show_reframe.json").write_text('{"saved.mp4": {"keyframes": [[0.0, 0.3]]}}')
+
+    computed = []
+    def analyze(path):
+        computed.append(os.path.basename(path))
+        return {"keyframes": [[0.0, 0.7]]}
+    monkeypatch.setattr(reframe, "analyze_crop_track", analyze)
+
+    tracks = reframe.load_crop_tracks({"name": "Show"}, [str(saved), str(fresh)], projects_dir=str(tmp_path / "projects"))
+    assert computed == ["fresh.mp4"]
+    assert set(tracks) == {"saved.mp4", "fresh.mp4"}
+
+    monkeypatch.setattr(reframe, "CROP_TRACKS", "off")
+    computed.clear()
+    tracks = reframe.load_crop_tracks({"name": "Show"}, [str(fresh)], projects_dir=str(tmp_path / "projects"))
+    assert computed == [] and set(tracks) == {"saved.mp4"}
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+from backend import segment_cache
+
+
+def write_segment(cache_dir, name, size, age):
+    path = os.path.join(str(cache_dir), name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def test_evict_spares_segments_in_use_by_other_exports(tmp_path):
+    mb = 1024 * 1024
+    old = write_segment(tmp_path, "seg_old.mp4", mb, age=7200)
+    protected = write_segment(tmp_path, "seg_protected.mp4", mb, age=9000)
+    recent = write_segment(tmp_path, "seg_recent.mp4", mb, age=60)
+    stale_tmp = write_segment(tmp_path, "seg_crashed.123.tmp.mp4", mb, age=7200)
+    live_tmp = write_segment(tmp_path, "seg_writing.456.tmp.mp4", mb, age=5)
+
+    segment_cache.evict(protect=[protected], cache_dir=str(tmp_path), max_mb=0.5, grace=3600)
+
+    assert not os.path.exists(old)
+    assert not os.path.exists(stale_tmp)
+    assert os.path.exists(protected)
+    assert os.path.exists(recent)
+    assert os.path.exists(live_tmp)
+
+
+def test_temp_segment_paths_are_unique(tmp_path):
+    first = segment_cache.temp_segment_path("k", str(tmp_path))
+    second = segment_cache.temp_segment_path("k", str(tmp_path))
+    assert first != second
+    assert ".tmp." in os.path.basename(first)
+
+
+def test_plan_segments_reuses_identical_chunks(tmp_path, monkeypatch):
+    pytest.importorskip("moviepy")
+    from backend import renderer, encoder_profiles
+
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "a.mp4"
+    source.write_bytes(b"x")
+    piece = {"path": str(source), "start": 0.0, "end": 20.0, "grading": None}
+    profile = encoder_profiles.get_profile()
+
+    seg_paths, missing = renderer.plan_segments([piece, dict(piece)], (1920, 1080), "landscape", profile, fps=30)
+    # 20 s at 15 s chunks -> 2 chunks per piece; the repeated piece shares its keys
+    assert len(seg_paths) == 4
+    assert len(missing) == 2
+    assert seg_paths[:2] == seg_paths[2:]
+    assert sorted(task[0]["frames"] for task in missing.values()) == [150, 450]
+
+
+def test_second_overlay_export_reuses_committed_segments(tmp_path, monkeypatch):
+    pytest.importorskip("moviepy")
+    from backend import renderer, encoder_profiles
+
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "a.mp4"
+    source.write_bytes(b"x")
+    # Uniform grade exports plan ungraded pieces (lut3d grades them in the overlay pass)
+    piece = {"path": str(source), "start": 0.0, "end": 20.0, "grading": None}
+    profile = encoder_profiles.get_profile()
+    # Inline rendering, so the spies below see every segment
+    monkeypatch.setattr(renderer, "RENDER_WORKERS", 1)
+
+    def export(render):
+        seg_paths, missing = renderer.plan_segments([piece], (1920, 1080), "landscape", profile, fps=30)
+        monkeypatch.setattr(renderer, "_render_segment", render)
+        renderer.render_missing_segments(missing)
+        return seg_paths, missing
+
+    def fake_render(task):
+        assert task[0]["grading"] is None
+        with open(task[1], "wb") as f:
+            f.write(b"segment")
+        return task[1]
+
+    first_paths, first_missing = export(fake_render)
+    assert len(first_missing) == 2
+    assert all(os.path.exists(p) for p in first_paths)
+
+    def no_render(task):
+        raise AssertionError("segment rendered again")
+
+    second_paths, second_missing = export(no_render)
+    assert second_missing == {}
+    assert second_paths == first_paths
@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("moviepy")
+
+from backend import stream_copy_renderer, encoder_profiles
+
+SOURCE_INFO = {
+    "video_codec": "h264", "width": 1920, "height": 1080, "pix_fmt": "yuv420p",
+    "fps": 30.0, "has_audio": True, "audio_codec": "aac", "sample_rate": 48000,
+    "channels": 2, "rotation": 0, "duration": 20.0, "profile": "High",
+}
+
+DEFAULT_CLIP_GRADING = {"temperature": 5600, "exposure": 0, "contrast": 0, "saturation": 100, "filterStrength": 100}
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    path = tmp_path / "clip1.mp4"
+    path.write_bytes(b"")
+    monkeypatch.setattr(stream_copy_renderer, "get_media_info", lambda p: dict(SOURCE_INFO))
+    return str(path)
+
+
+def ai_project(source, clips):
+    return {
+        "name": "Demo",
+        "globalSettings": {"filterSuggestion": "Natural Grade", "colorGrading": dict(DEFAULT_CLIP_GRADING)},
+        "edl": [dict({"source": source, "keep": "true", "colorGrading": dict(DEFAULT_CLIP_GRADING)}, **c) for c in clips],
+    }
+
+
+def test_default_ai_clip_is_planned_for_stream_copy(source):
+    project = ai_project(source, [{"id": 1, "start": 1.0, "end": 4.0}])
+    segments, reason = stream_copy_renderer.plan_stream_copy(project)
+    assert reason is None
+    assert [(s["start"], s["end"]) for s in segments] == [(1.0, 4.0)]
+
+
+def test_graded_clip_needs_a_real_render(source):
+    project = ai_project(source, [{"id": 1, "start": 1.0, "end": 4.0}])
+    project["globalSettings"]["filterSuggestion"] = "Cinematic"
+    segments, reason = stream_copy_renderer.plan_stream_copy(project)
+    assert segments is None
+    assert "color graded" in reason
+
+
+def test_clip_times_match_render_project(source):
+    # end missing -> start + duration; start >= end -> extended to the end of the source
+    project = ai_project(source, [
+        {"id": 1, "start": 2.0, "end": 0, "duration": 3.0},
+        {"id": 2, "start": 12.0, "end": 10.0},
+        {"id": 3, "start": 25.0, "end": 30.0},
+    ])
+    segments, reason = stream_copy_renderer.plan_stream_copy(project)
+    assert [(s["id"], s["start"], s["end"]) for s in segments] == [(1, 2.0, 5.0), (2, 12.0, 20.0)]
+
+
+def test_stream_copy_only_when_the_profile_matches_the_source(source):
+    project = ai_project(source, [{"id": 1, "start": 1.0, "end": 4.0}])
+    # draft re-times to 24fps and social-vertical caps the bitrate: copying 30fps packets honours neither
+    for name in ("draft", "social-vertical"):
+        segments, reason = stream_copy_renderer.plan_stream_copy(project, profile=encoder_profiles.get_profile(name))
+        assert segments is None
+        assert f"'{name}' profile" in reason
+    segments, _ = stream_copy_renderer.plan_stream_copy(project, profile=encoder_profiles.get_profile("archival"))
+    assert segments
+    opted_in = dict(encoder_profiles.get_profile("draft"), stream_copy=True)
+    segments, _ = stream_copy_renderer.plan_stream_copy(project, profile=opted_in)
+    assert segments
+
+
+def test_copy_seeks_past_a_keyframe_between_milliseconds(monkeypatch):
+    commands = []
+    monkeypatch.setattr(stream_copy_renderer, "_run", commands.append)
+    # 29.97fps keyframes sit between milliseconds (60 frames = 2.002002s)
+    keyframe, next_keyframe = 60 / 29.97, 120 / 29.97
+    info = dict(SOURCE_INFO, fps=29.97)
+    stream_copy_renderer._copy_piece("in.mp4", keyframe, next_keyframe, info, "out.ts")
+
+    cmd = commands[0]
+    seek = float(cmd[cmd.index("-ss") + 1])
+    duration = float(cmd[cmd.index("-t") + 1])
+    # Past the keyframe (a rounded-down seek lands on the previous GOP), before the next frame
+    assert keyframe < seek < keyframe + 1 / 29.97
+    # Stops before the next keyframe, which starts the following piece
+    assert seek + duration < next_keyframe